@@ -10,89 +10,12 @@ function GitHubAnalysis() {
     const [currentUser, setCurrentUser] = useState(null);
     const [portfolioData, setPortfolioData] = useState(null);
 
-    // Portfolio analysis function
-    const analyzePortfolio = (repos, username) => {
-        console.log("🔍 Analyzing portfolio with", repos?.length, "repos for", username);
-        
-        if (!repos || repos.length === 0) {
-            return {
-                totalScore: 0,
-                completeness: 0,
-                codeQuality: 0,
-                bestPractices: 0,
-                presentation: 0,
-                stats: {
-                    hasPortfolio: false,
-                    repoName: 'Not found',
-                    hasDescription: false,
-                    hasLiveDemo: false,
-                    showsProjects: false
-                },
-                recommendations: ['No repositories to analyze']
-            };
-        }
-
-        // Find portfolio repo
-        const portfolioKeywords = ['portfolio', 'personal', 'website', 'cv', 'resume', 'showcase'];
-        
-        // Score each repo as potential portfolio
-        const scoredRepos = repos.map(repo => {
-            const repoName = repo.name?.toLowerCase() || '';
-            const repoDesc = repo.description?.toLowerCase() || '';
-            const combined = `${repoName} ${repoDesc}`;
-            
-            let score = 0;
-            let reasons = [];
-            
-            // Name contains "portfolio"
-            if (repoName.includes('portfolio')) {
-                score += 200;
-                reasons.push('Name contains "portfolio"');
-            }
-            
-            // Description contains "portfolio"
-            if (repoDesc.includes('portfolio')) {
-                score += 150;
-                reasons.push('Description mentions "portfolio"');
-            }
-            
-            // Name matches username
-            if (username && repoName === username.toLowerCase()) {
-                score += 100;
-                reasons.push('Repository name matches username');
-            }
-            
-            // Contains other portfolio keywords
-            const hasKeywords = portfolioKeywords.some(keyword => 
-                combined.includes(keyword) && keyword !== 'portfolio'
-            );
-            if (hasKeywords) {
-                score += 50;
-                reasons.push('Contains portfolio keywords');
-            }
-            
-            // Has description
-            if (repo.description) {
-                score += 40;
-                reasons.push('Has description');
-            }
-            
-            // Has GitHub Pages
-            if (repo.has_pages || repo.homepage) {
-                score += 30;
-                reasons.push('Has live deployment');
-            }
-            
-            return { repo, score, reasons };
-        });
-
-        // Sort by score (highest first)
-        scoredRepos.sort((a, b) => b.score - a.score);
-        console.log("🏆 Top portfolio candidates:", scoredRepos.slice(0, 3));
+    // Portfolio analysis, from the candidates the server scored when it synced the repos
+    const analyzePortfolio = (portfolio) => {
+        const bestCandidate = portfolio?.portfolio;
+        console.log("🏆 Top portfolio candidates:", portfolio?.candidates);
 
-        const bestCandidate = scoredRepos[0];
-        
-        if (!bestCandidate || bestCandidate.score < 50) {
+        if (!bestCandidate) {
             return {
                 totalScore: 0,
                 completeness: 0,
@@ -110,7 +33,7 @@ function GitHubAnalysis() {
             };
         }
 
-        const foundPortfolio = bestCandidate.repo;
+        const foundPortfolio = bestCandidate;
         console.log("✅ Selected portfolio:", foundPortfolio.name, "score:", bestCandidate.score);
 
         // Analyze the portfolio repo
@@ -151,7 +74,7 @@ function GitHubAnalysis() {
                 hasLiveDemo,
                 showsProjects,
                 lastUpdated: foundPortfolio.updated_at || 'Unknown',
-                stars: foundPortfolio.stargazers_count || 0,
+                stars: foundPortfolio.stars || 0,
                 descriptionLength: foundPortfolio.description?.length || 0
             },
             recommendations,
@@ -196,14 +119,15 @@ function GitHubAnalysis() {
             console.log("✅ GitHub analysis data received:", data);
             setAnalysis(data);
             
-            // Analyze portfolio
-            if (data.repos) {
-                const portfolioResult = analyzePortfolio(data.repos, user.github_username);
-                console.log("📊 Portfolio analysis result:", portfolioResult);
-                setPortfolioData(portfolioResult);
-            }
-            
-            setLoading(false);
+            // Portfolio candidates were scored on the server while the repos were saved
+            return fetch(`http://127.0.0.1:5555/users/${data.user_id}/portfolio`)
+                .then(res => res.ok ? res.json() : null)
+                .then(portfolio => {
+                    const portfolioResult = analyzePortfolio(portfolio);
+                    console.log("📊 Portfolio analysis result:", portfolioResult);
+                    setPortfolioData(portfolioResult);
+                    setLoading(false);
+                });
         })
         .catch(err => {
             console.error("Analysis error:", err);
@@ -4,6 +4,8 @@ import { useNavigate } from 'react-router-dom';
 
 function Projects() {
     const [projects, setProjects] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
     const [filters, setFilters] = useState({
@@ -18,15 +20,26 @@ function Projects() {
         fetchProjects();
     }, [filters]);
 
+    // Filters are applied by the server, pages are fetched with its cursor
+    const buildQuery = (cursor) => {
+        const params = new URLSearchParams();
+        Object.entries(filters).forEach(([key, value]) => {
+            if (value !== '') params.append(key, value);
+        });
+        if (cursor) params.append('cursor', cursor);
+        return params.toString();
+    };
+
     const fetchProjects = async () => {
         try {
             setLoading(true);
-            const response = await fetch('http://127.0.0.1:5555/projects');
+            const response = await fetch(`http://127.0.0.1:5555/projects?${buildQuery()}`);
             if (!response.ok) {
                 throw new Error('Failed to fetch projects');
             }
             const data = await response.json();
-            setProjects(data);
+            setProjects(data.projects);
+            setNextCursor(data.next_cursor);
             setLoading(false);
         } catch (err) {
             setError(err.message);
@@ -34,6 +47,23 @@ function Projects() {
         }
     };
 
+    const loadMore = async () => {
+        try {
+            setLoadingMore(true);
+            const response = await fetch(`http://127.0.0.1:5555/projects?${buildQuery(nextCursor)}`);
+            if (!response.ok) {
+                throw new Error('Failed to fetch projects');
+            }
+            const data = await response.json();
+            setProjects(prev => [...prev, ...data.projects]);
+            setNextCursor(data.next_cursor);
+            setLoadingMore(false);
+        } catch (err) {
+            setError(err.message);
+            setLoadingMore(false);
+        }
+    };
+
     const handleFilterChange = (e) => {
         const { name, value } = e.target;
         setFilters(prev => ({
@@ -51,15 +81,6 @@ function Projects() {
         });
     };
 
-    // Filter projects
-    const filteredProjects = projects.filter(project => {
-        if (filters.difficulty && project.difficulty !== filters.difficulty) return false;
-        if (filters.project_type && project.project_type !== filters.project_type) return false;
-        if (filters.min_budget && project.budget_min < parseInt(filters.min_budget)) return false;
-        if (filters.max_budget && project.budget_max > parseInt(filters.max_budget)) return false;
-        return true;
-    });
-
     if (loading) {
         return (
             <div className="projects-loading">
@@ -147,13 +168,13 @@ function Projects() {
 
             {/* Projects Grid */}
             <div className="projects-grid">
-                {filteredProjects.length === 0 ? (
+                {projects.length === 0 ? (
                     <div className="no-projects">
                         <h3>No projects match your filters</h3>
                         <p>Try changing your filter criteria or check back later</p>
                     </div>
                 ) : (
-                    filteredProjects.map(project => (
+                    projects.map(project => (
                         <div key={project.id} className="project-card">
                             <div className="project-header">
                                 <h3>{project.title}</h3>
@@ -215,15 +236,19 @@ function Projects() {
                 )}
             </div>
 
+            {nextCursor && (
+                <div className="projects-load-more">
+                    <button onClick={loadMore} disabled={loadingMore}>
+                        {loadingMore ? 'Loading...' : 'Load More Projects'}
+                    </button>
+                </div>
+            )}
+
             {/* Stats */}
             <div className="projects-stats">
                 <div className="stat-card">
-                    <h3>{projects.length}</h3>
-                    <p>Total Projects</p>
-                </div>
-                <div className="stat-card">
-                    <h3>{filteredProjects.length}</h3>
-                    <p>Filtered Projects</p>
+                    <h3>{projects.length}{nextCursor ? '+' : ''}</h3>
+                    <p>Matching Projects</p>
                 </div>
                 <div className="stat-card">
                     <h3>
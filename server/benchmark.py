@@ -0,0 +1,687 @@
+"""
+Per-endpoint latency and throughput benchmarks.
+
+For each database size it generates a dataset with generate_data.py (cached
+between runs), starts the app against a fresh copy of it in a child process
+with a local fake GitHub API, and drives every resource twice: sequentially
+through Flask's test client, then through a real threaded HTTP server with a
+pool of concurrent client threads. Each endpoint reports p50/p95/p99 latency,
+requests per second and SQL statements per request. Results are written as a
+JSON baseline that `compare` diffs against another run.
+
+    python benchmark.py run --sizes 1000 10000 100000 --output benchmarks/before.json
+    python benchmark.py compare benchmarks/before.json benchmarks/after.json
+    python benchmark.py startup --size 10000 --workers 4
+
+`startup` measures the cold import and create_app time in fresh interpreters,
+then boots gunicorn (gunicorn.conf.py) with and without preload_app and
+reports each worker's resident memory (RSS, and PSS/USS, which show how much
+of it is shared with the master) after serving a few requests. Linux only.
+
+SQL statements are counted per request on the request's own thread, so work
+done by background analysis jobs or while streaming a response body is not
+included.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PASSWORD = 'password123'
+END_DATE = '2026-01-01'  # fixed so a size always generates the same database
+
+
+# Fake GitHub
+
+def fake_repos(username, count):
+    rng = random.Random(username)
+    languages = ['JavaScript', 'Python', 'TypeScript', 'Go', 'HTML', None]
+    base_id = int(hashlib.sha1(username.encode('utf-8')).hexdigest()[:8], 16) * 100000
+    return [{
+        'id': base_id + n, 'name': f"{username}-repo-{n}", 'description': f"Benchmark repository {n}",
+        'language': rng.choice(languages), 'stargazers_count': rng.randint(0, 50),
+        'fork': rng.random() < 0.1, 'has_pages': rng.random() < 0.2, 'homepage': None,
+        'updated_at': f"2025-12-01T{n // 3600 % 24:02d}:{n // 60 % 60:02d}:{n % 60:02d}Z",
+        'pushed_at': '2025-11-30T00:00:00Z',
+    } for n in range(count)]
+
+
+def start_fake_github(repos_per_user):
+    """A local GitHub API serving /users/<name> and /users/<name>/repos with Link pagination and ETags"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip('/').split('/')
+            if len(parts) == 2 and parts[0] == 'users':
+                body = json.dumps({'login': parts[1], 'public_repos': repos_per_user}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            if len(parts) != 3 or parts[0] != 'users' or parts[2] != 'repos':
+                self.send_error(404)
+                return
+            params = parse_qs(url.query)
+            per_page = int(params.get('per_page', ['30'])[0])
+            page = int(params.get('page', ['1'])[0])
+            repos = fake_repos(parts[1], repos_per_user)
+            body = json.dumps(repos[(page - 1) * per_page:page * per_page]).encode('utf-8')
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            last_page = max(1, -(-repos_per_user // per_page))
+            if last_page > 1:
+                base = f"http://{self.headers['Host']}{url.path}?per_page={per_page}"
+                links = [f'<{base}&page={last_page}>; rel="last"']
+                if page < last_page:
+                    links.append(f'<{base}&page={page + 1}>; rel="next"')
+                self.send_header('Link', ', '.join(links))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        # Concurrent analyses open many connections at once; the default
+        # backlog of 5 drops some and the client retries a second later
+        request_queue_size = 128
+
+    server = Server(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Scenarios
+
+class Scenario:
+    def __init__(self, name, method, path, body=None, expect=(200,), login=False, slow=False):
+        """
+        path and body are values or callables taking the Context. expect lists
+        the status codes that count as success. slow scenarios (bcrypt, GitHub
+        syncs) run --slow-requests times instead of --requests.
+        """
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.expect = expect
+        self.login = login
+        self.slow = slow
+
+    def build(self, ctx):
+        path = self.path(ctx) if callable(self.path) else self.path
+        body = self.body(ctx) if callable(self.body) else self.body
+        return path, body
+
+
+class Context:
+    """Ids and tokens the scenarios pick from, read once from the generated database"""
+
+    def __init__(self, database_path):
+        connection = sqlite3.connect(database_path)
+        self.project_ids = [row[0] for row in connection.execute('SELECT id FROM projects')]
+        self.open_project_ids = [row[0] for row in connection.execute("SELECT id FROM projects WHERE status = 'open'")]
+        self.user_id, self.email = connection.execute('SELECT id, email FROM users ORDER BY id LIMIT 1').fetchone()
+        connection.close()
+        self.rng = random.Random(0)
+        self.signups = itertools.count()
+        self.cursor = None
+        self.job_id = None
+
+    def project_id(self):
+        return self.rng.choice(self.project_ids)
+
+    def open_project_id(self):
+        return self.rng.choice(self.open_project_ids)
+
+
+SCENARIOS = [
+    Scenario('GET /welcome', 'GET', '/welcome'),
+    Scenario('GET /projects', 'GET', '/projects'),
+    Scenario('GET /projects (filtered)', 'GET', '/projects?difficulty=beginner&skills=react,python&skills_match=any'),
+    Scenario('GET /projects (popular)', 'GET', '/projects?sort=popular'),
+    Scenario('GET /projects (next page)', 'GET', lambda ctx: f"/projects?cursor={ctx.cursor}"),
+    Scenario('GET /projects/search', 'GET', '/projects/search?q=dashboard'),
+    Scenario('GET /projects/<id>', 'GET', lambda ctx: f"/projects/{ctx.project_id()}", expect=(200, 404)),
+    Scenario('GET /projects/<id>/apply', 'GET', lambda ctx: f"/projects/{ctx.project_id()}/apply", expect=(200, 404)),
+    Scenario('POST /projects/<id>/apply', 'POST', lambda ctx: f"/projects/{ctx.open_project_id()}/apply",
+             {'proposal': 'Benchmark proposal', 'estimated_time': 2, 'estimated_cost': 500},
+             expect=(201, 400)),  # 400 once the benchmark developer already applied
+    Scenario('POST /projects', 'POST', '/projects', lambda ctx: {
+        'user_id': ctx.user_id, 'title': 'Benchmark project', 'description': 'Created by the benchmark',
+        'budget_min': 100, 'budget_max': 200, 'timeline_weeks': 2, 'skills_required': ['React', 'Python'],
+    }, expect=(201,)),
+    Scenario('GET /user/repositories', 'GET', '/user/repositories', login=True),
+    Scenario('GET /user/repositories (stream)', 'GET', '/user/repositories?stream=1', login=True),
+    Scenario('GET /users/<id>/language-stats', 'GET', lambda ctx: f"/users/{ctx.user_id}/language-stats"),
+    Scenario('GET /users/<id>/portfolio', 'GET', lambda ctx: f"/users/{ctx.user_id}/portfolio"),
+    Scenario('GET /users/<id>/recommended-projects', 'GET', lambda ctx: f"/users/{ctx.user_id}/recommended-projects"),
+    Scenario('POST /signup', 'POST', '/signup', lambda ctx: {
+        'first_name': 'Bench', 'last_name': 'User', 'github_username': 'benchuser',
+        'email': f"bench{next(ctx.signups)}-{os.getpid()}@example.com", 'password': PASSWORD,
+    }, expect=(201,), slow=True),
+    Scenario('POST /login', 'POST', '/login', lambda ctx: {'email': ctx.email, 'password': PASSWORD}, slow=True),
+    Scenario('POST /logout', 'POST', '/logout'),
+    Scenario('POST /githubanalysis', 'POST', '/githubanalysis', {'github_username': 'benchuser'}, slow=True),
+    Scenario('POST /githubanalysis?mode=job', 'POST', '/githubanalysis?mode=job', {'github_username': 'benchjob'},
+             expect=(202,)),
+    Scenario('GET /githubanalysis/<job_id>', 'GET', lambda ctx: f"/githubanalysis/{ctx.job_id}"),
+]
+
+
+# Measurement
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(samples, elapsed, scenario):
+    """samples are (seconds, status, sql statements) tuples"""
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    sql = [sample[2] for sample in samples if sample[2] is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, status, _ in samples if status not in scenario.expect),
+        'statuses': statuses,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'requests_per_second': round(len(samples) / elapsed, 1) if elapsed else None,
+        'sql_per_request': round(sum(sql) / len(sql), 2) if sql else None,
+    }
+
+
+def sql_count(headers):
+    value = headers.get('X-SQL-Statements')
+    return int(value) if value is not None else None
+
+
+def install_statement_counter(app):
+    """Count SQL statements per request and report them in an X-SQL-Statements header"""
+    from flask import g, has_request_context
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            g._sql_statements = g.get('_sql_statements', 0) + 1
+
+    @app.after_request
+    def add_statement_header(response):
+        response.headers['X-SQL-Statements'] = str(g.get('_sql_statements', 0))
+        return response
+
+
+def run_test_client(app, ctx, scenarios, args):
+    anonymous, logged_in = app.test_client(), app.test_client()
+    logged_in.post('/login', json={'email': ctx.email, 'password': PASSWORD})
+    results = {}
+    for scenario in scenarios:
+        client = logged_in if scenario.login else anonymous
+        count = args.slow_requests if scenario.slow else args.requests
+        for _ in range(args.warmup):
+            path, body = scenario.build(ctx)
+            client.open(path, method=scenario.method, json=body).close()
+        samples = []
+        started = time.perf_counter()
+        for _ in range(count):
+            path, body = scenario.build(ctx)
+            begin = time.perf_counter()
+            response = client.open(path, method=scenario.method, json=body)
+            response.get_data()
+            samples.append((time.perf_counter() - begin, response.status_code, sql_count(response.headers)))
+            response.close()
+        results[scenario.name] = summarize(samples, time.perf_counter() - started, scenario)
+        print(f"  client {scenario.name:38} p50 {results[scenario.name]['p50_ms']:8.2f}ms", file=sys.stderr)
+    return results
+
+
+def run_http(app, ctx, scenarios, args):
+    import requests
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    local = threading.local()
+
+    def sessions():
+        if not hasattr(local, 'anonymous'):
+            local.anonymous, local.logged_in = requests.Session(), requests.Session()
+            local.logged_in.post(base + '/login', json={'email': ctx.email, 'password': PASSWORD})
+        return local.anonymous, local.logged_in
+
+    def one(scenario):
+        anonymous, logged_in = sessions()
+        path, body = scenario.build(ctx)
+        begin = time.perf_counter()
+        try:
+            response = (logged_in if scenario.login else anonymous).request(
+                scenario.method, base + path, json=body, timeout=60
+            )
+            status, sql = response.status_code, sql_count(response.headers)
+        except requests.RequestException:
+            status, sql = 'connection error', None
+        return time.perf_counter() - begin, status, sql
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(lambda _: sessions(), range(args.concurrency * 2)))
+        for scenario in scenarios:
+            count = args.slow_requests if scenario.slow else args.requests
+            list(pool.map(one, [scenario] * args.warmup))
+            started = time.perf_counter()
+            samples = list(pool.map(one, [scenario] * count))
+            results[scenario.name] = summarize(samples, time.perf_counter() - started, scenario)
+            print(f"  http   {scenario.name:38} {results[scenario.name]['requests_per_second']:8.1f} req/s",
+                  file=sys.stderr)
+    server.shutdown()
+    return results
+
+
+def bench_size(args):
+    """Child process: benchmark one prepared database and write its results to --result-file"""
+    github_server = start_fake_github(args.github_repos)
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.abspath(args.database)}"
+    os.environ['GITHUB_API_URL'] = f"http://127.0.0.1:{github_server.server_port}"
+
+    from app import create_app
+    from cache import response_cache
+    app = create_app()
+    install_statement_counter(app)
+    if args.no_cache:
+        response_cache.enabled = False
+
+    ctx = Context(args.database)
+    client = app.test_client()
+    ctx.cursor = client.get('/projects').get_json()['next_cursor']
+    ctx.job_id = client.post('/githubanalysis?mode=job', json={'github_username': 'benchjob'}).get_json()['job_id']
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.only or scenario.name in args.only]
+    results = {}
+    if 'client' in args.modes:
+        results['client'] = run_test_client(app, ctx, scenarios, args)
+    if 'http' in args.modes:
+        results['http'] = run_http(app, ctx, scenarios, args)
+    with open(args.result_file, 'w') as f:
+        json.dump(results, f)
+    github_server.shutdown()
+
+
+# Startup and memory
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+built = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000, 'create_app_ms': (built - imported) * 1000,
+                  'modules': len(sys.modules)}))
+"""
+STARTUP_PATHS = ['/welcome', '/projects', '/projects/search?q=dashboard', '/users/1/language-stats',
+                 '/users/1/portfolio', '/users/1/recommended-projects']
+
+
+def measure_import(database, repeat):
+    """Median cold import and create_app times over `repeat` fresh interpreters"""
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}")
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', IMPORT_PROBE], cwd=HERE, env=env, capture_output=True,
+                                text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: sorted(sample[key] for sample in samples)[len(samples) // 2] for key in samples[0]}
+
+
+def process_memory(pid):
+    """RSS, PSS and USS (private pages) of a process in MiB, from /proc"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss_mb': round(values['Rss'], 1),
+        'pss_mb': round(values['Pss'], 1),
+        'uss_mb': round(values['Private_Clean'] + values['Private_Dirty'], 1),
+    }
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # the command name may contain spaces, the fields after it don't
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def measure_server(database, args, preload):
+    """Boot gunicorn on a copy of the database and measure time to first response and memory per worker"""
+    import requests
+
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    env = dict(
+        os.environ, DATABASE_URL=f"sqlite:///{database}", PORT=str(port), WEB_CONCURRENCY=str(args.workers),
+        WEB_THREADS=str(args.threads), PRELOAD_APP='1' if preload else '0', WEB_ACCESS_LOG='',
+    )
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    master = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if master.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {master.returncode}")
+            if time.perf_counter() - started > 120:
+                raise RuntimeError("gunicorn did not answer within 120s")
+            try:
+                if requests.get(base + '/welcome', timeout=5).status_code == 200:
+                    break
+            except (requests.ConnectionError, requests.Timeout):
+                time.sleep(0.05)
+        first_response_ms = (time.perf_counter() - started) * 1000
+        while len(child_pids(master.pid)) < args.workers:
+            time.sleep(0.05)
+        all_ready_ms = (time.perf_counter() - started) * 1000
+
+        # Let every worker serve (and lazily build) what it would in production
+        with requests.Session() as session:
+            for _ in range(args.startup_requests):
+                for path in STARTUP_PATHS:
+                    session.get(base + path, timeout=60)
+
+        workers = [process_memory(pid) for pid in child_pids(master.pid)]
+        return {
+            'first_response_ms': round(first_response_ms, 1),
+            'all_workers_ms': round(all_ready_ms, 1),
+            'master': process_memory(master.pid),
+            'workers': workers,
+            'total_pss_mb': round(sum(worker['pss_mb'] for worker in workers) + process_memory(master.pid)['pss_mb'], 1),
+        }
+    finally:
+        master.terminate()
+        master.wait(timeout=30)
+
+
+def startup(args):
+    pristine = prepare_database(args.size, args)
+    report = {
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'size': args.size, 'workers': args.workers, 'threads': args.threads,
+                     'repeat': args.repeat, 'requests': args.startup_requests},
+        'servers': {},
+    }
+    with tempfile.TemporaryDirectory() as scratch:
+        database = os.path.join(scratch, 'bench.db')
+        shutil.copy(pristine, database)
+        print("measuring cold import", file=sys.stderr)
+        report['import'] = measure_import(database, args.repeat)
+        for preload in (True, False):
+            name = 'preload' if preload else 'no-preload'
+            print(f"booting gunicorn ({name}, {args.workers} workers)", file=sys.stderr)
+            report['servers'][name] = measure_server(database, args, preload)
+
+    output = args.output or os.path.join(HERE, 'benchmarks', f"startup-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    imported = report['import']
+    print(f"\ncold import {imported['import_ms']:.0f}ms, create_app {imported['create_app_ms']:.0f}ms, "
+          f"{imported['modules']} modules loaded")
+    print(f"\n  {'server':12} {'first ms':>9} {'ready ms':>9} {'worker RSS':>11} {'worker PSS':>11} "
+          f"{'worker USS':>11} {'total PSS':>10}")
+    for name, server in report['servers'].items():
+        workers = server['workers']
+
+        def mean(key):
+            return sum(worker[key] for worker in workers) / len(workers)
+        print(f"  {name:12} {server['first_response_ms']:9.0f} {server['all_workers_ms']:9.0f} "
+              f"{mean('rss_mb'):9.1f}MB {mean('pss_mb'):9.1f}MB {mean('uss_mb'):9.1f}MB {server['total_pss_mb']:8.1f}MB")
+    print(f"\nwrote {output}")
+
+
+# Orchestration
+
+def prepare_database(size, args):
+    """Path of a pristine generated database with `size` projects, generating it once"""
+    os.makedirs(args.workdir, exist_ok=True)
+    path = os.path.join(args.workdir, f"bench-{size}-seed{args.seed}.db")
+    if args.regenerate or not os.path.exists(path):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        print(f"generating {size} projects into {path}", file=sys.stderr)
+        subprocess.run([
+            sys.executable, os.path.join(HERE, 'generate_data.py'), '--database', f"sqlite:///{path}", '--reset',
+            '--projects', str(size), '--users', str(max(200, size // 2)), '--seed', str(args.seed),
+            '--end-date', END_DATE, '--password', PASSWORD,
+        ], check=True, cwd=HERE, stdout=sys.stderr)
+        # Fold the WAL back in so the file can be copied on its own
+        connection = sqlite3.connect(path)
+        connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        connection.close()
+    return path
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    report = {
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'settings': {
+            'requests': args.requests, 'slow_requests': args.slow_requests, 'warmup': args.warmup,
+            'concurrency': args.concurrency, 'modes': args.modes, 'cache': not args.no_cache,
+            'github_repos': args.github_repos, 'seed': args.seed,
+        },
+        'sizes': {},
+    }
+    for size in args.sizes:
+        pristine = prepare_database(size, args)
+        with tempfile.TemporaryDirectory() as scratch:
+            # The benchmark writes (applications, signups, syncs), so run on a copy
+            database = os.path.join(scratch, 'bench.db')
+            shutil.copy(pristine, database)
+            result_file = os.path.join(scratch, 'result.json')
+            command = [
+                sys.executable, os.path.abspath(__file__), '_size', '--database', database,
+                '--result-file', result_file, '--requests', str(args.requests),
+                '--slow-requests', str(args.slow_requests), '--warmup', str(args.warmup),
+                '--concurrency', str(args.concurrency), '--github-repos', str(args.github_repos),
+                '--modes', *args.modes,
+            ]
+            if args.no_cache:
+                command.append('--no-cache')
+            if args.only:
+                command.extend(['--only', *args.only])
+            print(f"benchmarking {size} projects", file=sys.stderr)
+            # The app prints to stdout; keep ours clean for the report path
+            subprocess.run(command, check=True, cwd=HERE, stdout=subprocess.DEVNULL)
+            with open(result_file) as f:
+                report['sizes'][str(size)] = json.load(f)
+
+    output = args.output or os.path.join(HERE, 'benchmarks', f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"\nwrote {output}")
+
+
+def print_report(report):
+    for size, modes in report['sizes'].items():
+        for mode, endpoints in modes.items():
+            print(f"\n{size} projects, {mode}")
+            print(f"  {'endpoint':38} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'sql/req':>8} {'errors':>7}")
+            for name, stats in endpoints.items():
+                sql = '-' if stats['sql_per_request'] is None else f"{stats['sql_per_request']:.1f}"
+                print(f"  {name:38} {stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} {stats['p99_ms']:9.2f} "
+                      f"{stats['requests_per_second']:9.1f} {sql:>8} {stats['errors']:7d}")
+
+
+def compare(args):
+    """Print per-endpoint changes between two baselines; exit 1 when something regressed"""
+    with open(args.baseline) as f:
+        old = json.load(f)
+    with open(args.current) as f:
+        new = json.load(f)
+
+    regressions = 0
+    for size, modes in new['sizes'].items():
+        for mode, endpoints in modes.items():
+            before_endpoints = old['sizes'].get(size, {}).get(mode)
+            if not before_endpoints:
+                continue
+            print(f"\n{size} projects, {mode}")
+            print(f"  {'endpoint':38} {'p95 ms':>21} {'req/s':>21} {'sql/req':>13}")
+            for name, after in endpoints.items():
+                before = before_endpoints.get(name)
+                if not before:
+                    continue
+                p95_change = change(before['p95_ms'], after['p95_ms'])
+                rps_change = change(before['requests_per_second'], after['requests_per_second'])
+                regressed = (p95_change is not None and p95_change > args.threshold) or \
+                    (rps_change is not None and rps_change < -args.threshold) or \
+                    (after['sql_per_request'] or 0) > (before['sql_per_request'] or 0)
+                regressions += regressed
+                print(f"  {name:38} {before['p95_ms']:8.2f} -> {after['p95_ms']:8.2f} "
+                      f"{before['requests_per_second']:8.1f} -> {after['requests_per_second']:8.1f} "
+                      f"{fmt(before['sql_per_request'])} -> {fmt(after['sql_per_request'])}"
+                      f"{'  REGRESSED' if regressed else ''}")
+
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0%}" if regressions else "\nno regressions")
+    return 1 if regressions else 0
+
+
+def change(before, after):
+    if not before or after is None:
+        return None
+    return (after - before) / before
+
+
+def fmt(value):
+    return '-'.rjust(4) if value is None else f"{value:4.1f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def load_options(command):
+        command.add_argument('--requests', type=int, default=200, help='per endpoint')
+        command.add_argument('--slow-requests', type=int, default=20, help='per bcrypt or GitHub sync endpoint')
+        command.add_argument('--warmup', type=int, default=5)
+        command.add_argument('--concurrency', type=int, default=8, help='HTTP client threads')
+        command.add_argument('--modes', nargs='+', choices=['client', 'http'], default=['client', 'http'])
+        command.add_argument('--github-repos', type=int, default=150, help='repositories per fake GitHub user')
+        command.add_argument('--no-cache', action='store_true', help='disable the response cache')
+        command.add_argument('--only', nargs='+', help='endpoint names to run, e.g. "GET /projects"')
+
+    run_command = commands.add_parser('run', help='benchmark generated databases of each size')
+    run_command.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='projects')
+    run_command.add_argument('--output', help='baseline JSON path, default benchmarks/benchmark-<time>.json')
+    run_command.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'launchpad-bench'),
+                             help='where generated databases are kept between runs')
+    run_command.add_argument('--regenerate', action='store_true')
+    run_command.add_argument('--seed', type=int, default=1)
+    load_options(run_command)
+
+    compare_command = commands.add_parser('compare', help='diff two baselines')
+    compare_command.add_argument('baseline')
+    compare_command.add_argument('current')
+    compare_command.add_argument('--threshold', type=float, default=0.10, help='allowed relative change')
+
+    startup_command = commands.add_parser('startup', help='cold import time and per-worker memory under gunicorn')
+    startup_command.add_argument('--size', type=int, default=1000, help='projects in the generated database')
+    startup_command.add_argument('--workers', type=int, default=4)
+    startup_command.add_argument('--threads', type=int, default=4)
+    startup_command.add_argument('--repeat', type=int, default=5, help='fresh interpreters for the import timing')
+    startup_command.add_argument('--startup-requests', type=int, default=20, help='rounds of requests before measuring')
+    startup_command.add_argument('--output', help='JSON path, default benchmarks/startup-<time>.json')
+    startup_command.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'launchpad-bench'))
+    startup_command.add_argument('--regenerate', action='store_true')
+    startup_command.add_argument('--seed', type=int, default=1)
+
+    size_command = commands.add_parser('_size')
+    size_command.add_argument('--database', required=True)
+    size_command.add_argument('--result-file', required=True)
+    load_options(size_command)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        return run(args)
+    if args.command == 'compare':
+        return compare(args)
+    if args.command == 'startup':
+        return startup(args)
+    return bench_size(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
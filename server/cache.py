@@ -0,0 +1,201 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# Response cache for the project read endpoints.
+# Keys carry a version number per scope ("projects" for the listing,
+# "project:<id>" for one project); writes bump the version instead of hunting
+# down keys, so readers go straight to fresh entries and old ones age out.
+# The in-process LRU is always on. With CACHE_SHARED_PATH set, entries and
+# versions also live in a SQLite file every worker process shares, which is
+# what keeps multi-worker deployments from serving another worker's stale data;
+# gunicorn.conf.py turns it on whenever there is more than one worker.
+
+MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU with a per-entry TTL and an entry count bound"""
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """Cache tier and version counters shared by every process through one SQLite file"""
+
+    PURGE_EVERY = 100
+
+    def __init__(self, path, max_entries=10000, ttl=60):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries (expires_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_versions (scope TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def after_fork(self):
+        # sqlite3 connections must not be used across a fork
+        self._local = threading.local()
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else MISSING
+
+    def set(self, key, value):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + self.ttl)
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge()
+
+    def purge(self):
+        """Drop expired entries, then the soonest-expiring ones beyond max_entries"""
+        conn = self._connect()
+        conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM cache_entries WHERE key IN ("
+            " SELECT key FROM cache_entries ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def version(self, scope):
+        row = self._connect().execute("SELECT version FROM cache_versions WHERE scope = ?", (scope,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, scope):
+        self._connect().execute(
+            "INSERT INTO cache_versions (scope, version) VALUES (?, 1) "
+            "ON CONFLICT(scope) DO UPDATE SET version = version + 1",
+            (scope,)
+        )
+
+
+class ResponseCache:
+    def __init__(self):
+        self.local = LRUCache()
+        self.shared = None
+        self.enabled = True
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.enabled = app.config.get('CACHE_ENABLED', True)
+        ttl = app.config.get('CACHE_TTL_SECONDS', 60)
+        self.local = LRUCache(app.config.get('CACHE_MAX_ENTRIES', 1024), ttl)
+        shared_path = app.config.get('CACHE_SHARED_PATH', os.environ.get('CACHE_SHARED_PATH'))
+        if shared_path:
+            self.shared = SQLiteCache(shared_path, app.config.get('CACHE_SHARED_MAX_ENTRIES', 10000), ttl)
+        app.extensions['response_cache'] = self
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+        self.local = LRUCache(self.local.max_entries, self.local.ttl)
+        if self.shared:
+            self.shared.after_fork()
+
+    def version(self, scope):
+        if self.shared:
+            return self.shared.version(scope)
+        return self._versions.get(scope, 0)
+
+    def bump(self, *scopes):
+        """Invalidate every key built for these scopes"""
+        for scope in scopes:
+            if self.shared:
+                self.shared.bump(scope)
+            else:
+                with self._lock:
+                    self._versions[scope] = self._versions.get(scope, 0) + 1
+
+    def key(self, scope, *parts):
+        return ':'.join([scope, f"v{self.version(scope)}", *[str(part) for part in parts]])
+
+    def get(self, key):
+        if not self.enabled:
+            return MISSING
+        value = self.local.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+        if self.shared:
+            value = self.shared.get(key)
+            if value is not MISSING:
+                self.hits += 1
+                self.shared_hits += 1
+                self.local.set(key, value)
+                return value
+        self.misses += 1
+        return MISSING
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        self.local.set(key, value)
+        if self.shared:
+            self.shared.set(key, value)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'local_entries': len(self.local)
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,98 @@
+import hashlib
+
+from flask import request, make_response
+from sqlalchemy import func, select
+from werkzeug.http import http_date
+
+from models import db, Project, ProjectApplication, ProjectTeam, Repository
+
+
+# Conditional GET support.
+# Validators come from count(*) and max(updated_at) of the tables behind a
+# response, so checking whether a client's copy is still current costs one
+# aggregate query and never serializes anything. Counts catch deletes, the
+# timestamps catch inserts and updates. Team members have no updated_at, their
+# count and max(id) stand in for it.
+
+def _aggregates(model, *criteria):
+    """
+    count(*) and max(updated_at) as separate scalar subqueries: on their own
+    SQLite answers the count from the smallest btree and the max with a single
+    probe of an updated_at index, which it can't do for both in one SELECT.
+    """
+    return [
+        select(func.count()).select_from(model).where(*criteria).scalar_subquery(),
+        select(func.max(model.updated_at)).where(*criteria).scalar_subquery(),
+    ]
+
+
+def _team_aggregates(*criteria):
+    """count(*) and max(id) of project_teams, both answered from ix_project_teams_project_id"""
+    return [
+        select(func.count()).select_from(ProjectTeam).where(*criteria).scalar_subquery(),
+        select(func.max(ProjectTeam.id)).where(*criteria).scalar_subquery(),
+    ]
+
+
+def _validators(session, *aggregates):
+    return list(session.execute(select(*aggregates)).one())
+
+
+def project_list_validators(session=None):
+    """(count, max updated_at) over projects and applications, and the team aggregates, in one statement"""
+    return _validators(
+        session or db.session,
+        *_aggregates(Project), *_aggregates(ProjectApplication), *_team_aggregates(),
+        # A member moved to another project changes neither the count nor max(id)
+        select(func.coalesce(func.sum(ProjectTeam.project_id), 0)).scalar_subquery()
+    )
+
+
+def project_validators(project_id, session=None):
+    """Validators for one project, its applications and its team"""
+    return _validators(
+        session or db.session,
+        *_aggregates(Project, Project.id == project_id),
+        *_aggregates(ProjectApplication, ProjectApplication.project_id == project_id),
+        *_team_aggregates(ProjectTeam.project_id == project_id)
+    )
+
+
+def repository_validators(user_id=None, session=None):
+    """Validators for a user's repositories, or every repository when user_id is None"""
+    criteria = [Repository.user_id == user_id] if user_id is not None else []
+    return _validators(session or db.session, *_aggregates(Repository, *criteria))
+
+
+def make_etag(scope, validators, *extra):
+    """Weak ETag hashed from the validators plus anything else the body depends on"""
+    raw = '|'.join(str(part) for part in [scope, *validators, *extra])
+    return 'W/"' + hashlib.sha1(raw.encode('utf-8')).hexdigest() + '"'
+
+
+def last_modified_of(validators):
+    timestamps = [value for value in validators if hasattr(value, 'isoformat')]
+    return max(timestamps).replace(microsecond=0) if timestamps else None
+
+
+def validator_headers(etag, last_modified):
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if last_modified:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
+
+
+def is_not_modified(etag, last_modified):
+    """Does the request's If-None-Match / If-Modified-Since still match?"""
+    if request.if_none_match:
+        # If-None-Match wins over If-Modified-Since when both are sent
+        return request.if_none_match.contains_weak(etag[2:].strip('"'))
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def not_modified_response(etag, last_modified):
+    response = make_response('', 304)
+    response.headers.update(validator_headers(etag, last_modified))
+    return response
@@ -0,0 +1,120 @@
+import os
+
+from flask import current_app, g
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db
+
+
+# Environment driven database engine configuration.
+#   DATABASE_URL          primary database (default sqlite:///lauchpad.db)
+#   DATABASE_REPLICA_URL  optional read replica the GET resources query
+# SQLite gets WAL and friends through connect-time pragmas so readers never
+# block the writer and concurrent writers wait instead of failing with
+# "database is locked". PostgreSQL gets a sized, pre-pinged pool and a
+# server-side statement timeout.
+
+DEFAULT_DATABASE_URL = 'sqlite:///lauchpad.db'
+
+
+def _int(env, name, default):
+    return int(env.get(name, default))
+
+
+def normalize_url(url):
+    # Heroku-style URLs use a scheme SQLAlchemy no longer accepts
+    if url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url, env=None):
+    env = os.environ if env is None else env
+    if url.startswith('sqlite'):
+        return {'connect_args': {'timeout': _int(env, 'SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000}}
+    if url.startswith('postgresql'):
+        return {
+            'pool_size': _int(env, 'DB_POOL_SIZE', 5),
+            'max_overflow': _int(env, 'DB_MAX_OVERFLOW', 10),
+            'pool_timeout': _int(env, 'DB_POOL_TIMEOUT', 30),
+            'pool_recycle': _int(env, 'DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': env.get('DB_POOL_PRE_PING', '1') == '1',
+            'connect_args': {
+                'options': f"-c statement_timeout={_int(env, 'DB_STATEMENT_TIMEOUT_MS', 5000)}"
+            },
+        }
+    return {}
+
+
+def database_settings(env=None):
+    """SQLALCHEMY_* config for the app, read from the environment"""
+    env = os.environ if env is None else env
+    url = normalize_url(env.get('DATABASE_URL', DEFAULT_DATABASE_URL))
+    settings = {
+        'SQLALCHEMY_DATABASE_URI': url,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options(url, env),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+    }
+    replica_url = env.get('DATABASE_REPLICA_URL')
+    if replica_url:
+        replica_url = normalize_url(replica_url)
+        settings['SQLALCHEMY_BINDS'] = {
+            'replica': dict(engine_options(replica_url, env), url=replica_url)
+        }
+    return settings
+
+
+def sqlite_pragmas(env=None):
+    env = os.environ if env is None else env
+    return [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA busy_timeout={_int(env, 'SQLITE_BUSY_TIMEOUT_MS', 5000)}",
+        f"PRAGMA mmap_size={_int(env, 'SQLITE_MMAP_SIZE', 256 * 1024 * 1024)}",
+        f"PRAGMA cache_size=-{_int(env, 'SQLITE_CACHE_KB', 64 * 1024)}",
+        'PRAGMA temp_store=MEMORY',
+    ]
+
+
+def install_sqlite_pragmas(engine, env=None):
+    """Run the tuning pragmas on every new connection to a SQLite engine"""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(env)
+    in_memory = engine.url.database in (None, '', ':memory:')
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            if in_memory and 'journal_mode' in pragma:
+                continue
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def init_app(app):
+    """Hook the pragmas onto the app's engines and clean up read sessions"""
+    with app.app_context():
+        for engine in db.engines.values():
+            install_sqlite_pragmas(engine)
+
+    @app.teardown_appcontext
+    def close_read_session(exc):
+        read = g.pop('_read_session', None)
+        if read is not None:
+            read.close()
+
+
+def read_session():
+    """
+    Session for read-only queries: bound to the replica when one is configured,
+    otherwise the normal db.session. Replica reads can lag the primary slightly,
+    so anything that must see a write it just made should keep using db.session.
+    """
+    if 'replica' not in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        return db.session
+    if '_read_session' not in g:
+        g._read_session = Session(bind=db.engines['replica'])
+    return g._read_session
@@ -0,0 +1,332 @@
+"""
+Generate a large synthetic dataset for load testing.
+
+Writes users, repositories, projects with skills, applications and team
+memberships in big executemany batches straight through the Core connection,
+with one precomputed password hash shared by every user, so a million-row
+database takes seconds instead of the hours seed.py would need. The same
+--seed and --end-date always produce the same rows.
+
+    python generate_data.py --users 50000
+    python generate_data.py --users 100000 --database sqlite:////tmp/load.db --reset
+
+Every generated user's password is --password (default "password123").
+"""
+import argparse
+import random
+import time
+from bisect import bisect
+from datetime import date, datetime, timedelta
+from itertools import accumulate, islice
+
+from sqlalchemy import create_engine, func, select
+
+from database import engine_options, install_sqlite_pragmas, normalize_url
+from language_stats import rebuild_language_stats
+from models import db, User, Repository, Project, Skill, ProjectSkill, ProjectApplication, ProjectTeam
+from passwords import PasswordHasher
+from portfolio import rescore_repositories
+from project_counters import rebuild_project_counters
+from search import install_project_search
+
+
+FIRST_NAMES = [
+    'Amina', 'Brian', 'Cheryl', 'David', 'Esther', 'Faith', 'George', 'Hassan', 'Irene', 'James',
+    'Kevin', 'Lucy', 'Mercy', 'Njeri', 'Otieno', 'Purity', 'Ruth', 'Samuel', 'Tom', 'Wanjiru',
+]
+LAST_NAMES = [
+    'Achieng', 'Barasa', 'Chebet', 'Gitau', 'Kamau', 'Kariuki', 'Kiptoo', 'Mbani', 'Mutua', 'Mwangi',
+    'Njoroge', 'Ochieng', 'Odhiambo', 'Omondi', 'Otieno', 'Wambui', 'Wanjiku', 'Wekesa',
+]
+
+# (language, weight): a few languages dominate, like on GitHub
+LANGUAGES = [
+    ('JavaScript', 30), ('Python', 22), ('TypeScript', 14), ('Java', 8), ('HTML', 8), ('CSS', 5),
+    ('Go', 3), ('C++', 3), ('PHP', 3), ('Ruby', 2), ('Rust', 1), ('Kotlin', 1), (None, 10),
+]
+REPO_WORDS = [
+    'api', 'app', 'blog', 'chat', 'clone', 'dashboard', 'demo', 'portfolio', 'shop', 'todo',
+    'tracker', 'weather', 'game', 'bot', 'notes', 'landing', 'scraper', 'cli', 'server', 'site',
+]
+
+SKILLS = [
+    'HTML', 'CSS', 'JavaScript', 'TypeScript', 'React', 'Vue', 'Angular', 'Node.js', 'Express',
+    'Python', 'Flask', 'Django', 'FastAPI', 'PostgreSQL', 'MySQL', 'MongoDB', 'Redis', 'GraphQL',
+    'REST API', 'Docker', 'AWS', 'Tailwind', 'Socket.io', 'Java', 'Spring', 'Go', 'PHP', 'Laravel',
+    'Figma', 'Testing',
+]
+PROJECT_SUBJECTS = [
+    'portfolio website', 'e-commerce dashboard', 'weather app API', 'task management system',
+    'booking platform', 'inventory tracker', 'school management portal', 'chat application',
+    'analytics dashboard', 'mobile banking prototype', 'recipe sharing site', 'event ticketing system',
+]
+PROJECT_VERBS = ['Build', 'Create', 'Redesign', 'Develop', 'Prototype', 'Extend']
+
+DIFFICULTIES = [('beginner', 45), ('intermediate', 40), ('advanced', 15)]
+PROJECT_STATUSES = [('open', 70), ('in_progress', 18), ('completed', 10), ('cancelled', 2)]
+APPLICATION_STATUSES = [('pending', 75), ('accepted', 10), ('rejected', 15)]
+TEAM_ROLES = ['developer', 'developer', 'developer', 'designer', 'lead']
+
+
+class Weighted:
+    """Draws from [(value, weight), ...] with the cumulative weights computed once"""
+
+    def __init__(self, choices):
+        self.values, weights = zip(*choices)
+        self.cum_weights = list(accumulate(weights))
+        self.total = self.cum_weights[-1]
+
+    def __call__(self, rng):
+        return self.values[bisect(self.cum_weights, rng.random() * self.total)]
+
+
+pick_languages = Weighted(LANGUAGES)
+pick_difficulties = Weighted(DIFFICULTIES)
+pick_project_statuses = Weighted(PROJECT_STATUSES)
+pick_application_statuses = Weighted(APPLICATION_STATUSES)
+
+
+class Generator:
+    def __init__(self, connection, args):
+        self.connection = connection
+        self.rng = random.Random(args.seed)
+        self.args = args
+        self.end = datetime.combine(args.end_date, datetime.min.time())
+        self.counts = {}
+        # Rows skip SQLAlchemy's per-value type processing, so timestamps go
+        # to SQLite already in the text format its DateTime type stores
+        self.sqlite = connection.dialect.name == 'sqlite'
+        self.marker = '?' if connection.dialect.paramstyle == 'qmark' else '%s'
+
+    def next_id(self, model):
+        return (self.connection.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+    def timestamp(self, days=730):
+        """A moment in the `days` before the end date, skewed towards recent"""
+        moment = self.end - timedelta(days=days * self.rng.random() ** 2)
+        return moment.isoformat(' ', 'microseconds') if self.sqlite else moment
+
+    def write(self, model, columns, rows):
+        """
+        Insert tuples of `columns` values from an iterable in executemany batches
+        of --batch-size. They go to the driver as they are: building and
+        type-processing a parameter dict per row through insert(table) costs
+        more than the insert itself.
+        """
+        table = model.__table__
+        sql = (f"INSERT INTO {table.name} ({', '.join(columns)}) "
+               f"VALUES ({', '.join([self.marker] * len(columns))})")
+        total = 0
+        for batch in iter(lambda: list(islice(rows, self.args.batch_size)), []):
+            self.connection.exec_driver_sql(sql, batch)
+            total += len(batch)
+        self.counts[table.name] = self.counts.get(table.name, 0) + total
+        return total
+
+    # Users and repositories
+
+    USER_COLUMNS = ('id', 'first_name', 'last_name', 'github_username', 'email', 'password_hash',
+                    'created_at', 'updated_at')
+
+    def users(self, first_id, password_hash):
+        rng = self.rng
+        for user_id in range(first_id, first_id + self.args.users):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            created = self.timestamp()
+            # Only the developers link a GitHub account
+            github_username = f"{first.lower()}{last.lower()}{user_id}" if rng.random() < 0.8 else None
+            yield (user_id, first, last, github_username, f"user{user_id}@example.com", password_hash,
+                   created, created)
+
+    REPOSITORY_COLUMNS = ('name', 'description', 'primary_language', 'stars', 'project_type', 'has_pages',
+                          'fork', 'updated_at', 'user_id')
+
+    def repositories(self, user_ids):
+        rng = self.rng
+        random, timestamp = rng.random, self.timestamp
+        words = len(REPO_WORDS)
+        for user_id in user_ids:
+            # Heavy tailed: most people have a handful, a few have hundreds
+            count = min(int(rng.paretovariate(1.2) * self.args.repos_per_user / 5), 500)
+            for n in range(count):
+                language = pick_languages(rng)
+                yield (
+                    f"{REPO_WORDS[int(random() * words)]}-{REPO_WORDS[int(random() * words)]}-{n}",
+                    f"A {language or 'plain'} side project" if random() < 0.6 else None,
+                    language,
+                    int(rng.lognormvariate(0, 1.6)) if random() < 0.5 else 0,
+                    'forked' if (fork := random() < 0.15) else 'personal',
+                    random() < 0.1,
+                    fork,
+                    timestamp(),
+                    user_id,
+                )
+
+    # Skills
+
+    def skill_ids(self):
+        """Skill id by name, inserting any of SKILLS that are missing"""
+        existing = dict(self.connection.execute(select(Skill.slug, Skill.id)).all())
+        missing = [name for name in SKILLS if Skill.slugify(name) not in existing]
+        if missing:
+            self.write(Skill, ('name', 'slug'), iter([(name, Skill.slugify(name)) for name in missing]))
+            existing = dict(self.connection.execute(select(Skill.slug, Skill.id)).all())
+        return [existing[Skill.slugify(name)] for name in SKILLS]
+
+    # Projects, applications and teams
+
+    PROJECT_COLUMNS = ('id', 'title', 'description', 'budget_min', 'budget_max', 'timeline_weeks', 'project_type',
+                       'difficulty', 'team_size_min', 'team_size_max', 'skills_required', 'status', 'client_id',
+                       'created_at', 'updated_at')
+
+    def projects(self, first_id, client_ids, skill_ids):
+        rng = self.rng
+        self.project_skills, self.team_projects = [], []
+        for project_id in range(first_id, first_id + self.args.projects):
+            subject = rng.choice(PROJECT_SUBJECTS)
+            difficulty = pick_difficulties(rng)
+            team = rng.random() < 0.3
+            budget_min = rng.randrange(100, 3000, 50) * {'beginner': 1, 'intermediate': 2, 'advanced': 4}[difficulty]
+            picked = rng.sample(range(len(SKILLS)), rng.randint(2, 5))
+            skills = [SKILLS[i] for i in picked]
+            created = self.timestamp(365)
+            status = pick_project_statuses(rng)
+            self.project_skills.extend((project_id, skill_ids[i]) for i in picked)
+            if team and status != 'open':
+                self.team_projects.append(project_id)
+            yield (
+                project_id,
+                f"{rng.choice(PROJECT_VERBS)} a {subject}",
+                f"Looking for help to {rng.choice(PROJECT_VERBS).lower()} a {subject} using {', '.join(skills)}. "
+                f"Scope, milestones and hand-over will be agreed with the developer.",
+                budget_min,
+                int(budget_min * rng.choice([1.5, 2, 3])),
+                rng.randint(1, 12),
+                'team' if team else 'individual',
+                difficulty,
+                2 if team else 1,
+                rng.randint(2, 5) if team else 1,
+                ','.join(skills),
+                status,
+                rng.choice(client_ids),
+                created,
+                created,
+            )
+
+    APPLICATION_COLUMNS = ('proposal', 'estimated_time', 'estimated_cost', 'status', 'project_id', 'developer_id',
+                           'created_at', 'updated_at')
+
+    def applications(self, first_project_id, developer_ids):
+        rng = self.rng
+        self.accepted = {}
+        for project_id in range(first_project_id, first_project_id + self.args.projects):
+            count = min(int(rng.expovariate(1 / self.args.applications_per_project)), len(developer_ids))
+            # sample() keeps (project_id, developer_id) unique, as the table requires
+            for developer_id in rng.sample(developer_ids, count):
+                status = pick_application_statuses(rng)
+                if status == 'accepted':
+                    self.accepted.setdefault(project_id, []).append(developer_id)
+                created = self.timestamp(365)
+                yield (
+                    "I have built similar projects before and can start this week.",
+                    rng.randint(1, 12),
+                    rng.randrange(100, 10000, 50),
+                    status,
+                    project_id,
+                    developer_id,
+                    created,
+                    created,
+                )
+
+    def teams(self):
+        rng = self.rng
+        for project_id in self.team_projects:
+            for developer_id in self.accepted.get(project_id, []):
+                yield (rng.choice(TEAM_ROLES), self.timestamp(180), project_id, developer_id)
+
+    def run(self, password_hash):
+        first_user = self.next_id(User)
+        self.write(User, self.USER_COLUMNS, self.users(first_user, password_hash))
+        user_ids = list(range(first_user, first_user + self.args.users))
+        self.write(Repository, self.REPOSITORY_COLUMNS, self.repositories(user_ids))
+        rebuild_language_stats(self.connection, user_ids=user_ids)
+        rescore_repositories(self.connection, user_ids)
+
+        # A tenth of the users post projects, everyone may apply
+        client_ids = user_ids[:max(1, len(user_ids) // 10)]
+        first_project = self.next_id(Project)
+        self.write(Project, self.PROJECT_COLUMNS, self.projects(first_project, client_ids, self.skill_ids()))
+        self.write(ProjectSkill, ('project_id', 'skill_id'), iter(self.project_skills))
+        self.write(ProjectApplication, self.APPLICATION_COLUMNS, self.applications(first_project, user_ids))
+        self.write(ProjectTeam, ('role', 'joined_at', 'project_id', 'developer_id'), self.teams())
+        rebuild_project_counters(self.connection)
+
+        if self.connection.dialect.name == 'postgresql':
+            # Explicit ids don't advance the serial sequences
+            for table in ('users', 'projects'):
+                self.connection.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+                )
+        return self.counts
+
+
+def connect(database_url):
+    """An engine for --database, or the app's own engine when it is not given"""
+    if database_url:
+        url = normalize_url(database_url)
+        engine = create_engine(url, **engine_options(url))
+        install_sqlite_pragmas(engine)
+        return engine, None
+    from app import create_app
+    context = create_app().app_context()
+    context.push()
+    return db.engine, context
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--projects', type=int, help='default: one per two users')
+    parser.add_argument('--repos-per-user', type=float, default=12, help='rough mean, the distribution is heavy tailed')
+    parser.add_argument('--applications-per-project', type=float, default=4, help='mean')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--end-date', type=date.fromisoformat, default=date.today(),
+                        help='timestamps fall before this date (YYYY-MM-DD)')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost of the shared password hash')
+    parser.add_argument('--batch-size', type=int, default=20000)
+    parser.add_argument('--database', help='SQLAlchemy URL, default: the app database')
+    parser.add_argument('--reset', action='store_true', help='drop and recreate every table first')
+    args = parser.parse_args(argv)
+    if args.projects is None:
+        args.projects = max(1, args.users // 2)
+
+    engine, context = connect(args.database)
+    started = time.perf_counter()
+    # Hash once; every user shares it so there is no per-row bcrypt cost
+    password_hash = PasswordHasher(rounds=args.rounds).hash(args.password)
+
+    if args.reset:
+        db.metadata.drop_all(engine)
+        if engine.dialect.name == 'sqlite':
+            with engine.begin() as connection:
+                connection.exec_driver_sql('DROP TABLE IF EXISTS projects_fts')
+    db.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        counts = Generator(connection, args).run(password_hash)
+        if engine.dialect.name == 'sqlite':
+            # Creates the FTS table on a fresh database and reindexes in one pass
+            install_project_search(connection)
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    for table, count in counts.items():
+        print(f"{table:24} {count:>10,}")
+    print(f"{'total':24} {total:>10,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    if context is not None:
+        context.pop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+from sqlalchemy import select
+
+from github_client import github
+from language_stats import user_language_stats
+from models import db, Repository, User
+from repo_sync import (
+    upsert_repositories, delete_missing_repositories, synced_repository_count, record_sync, parse_github_time
+)
+
+
+# GitHub analysis: sync a user's repositories, then describe what is stored.
+# A sync is incremental once the user has a watermark for the same login: it
+# walks the repository list most recently updated first and stops at the
+# first repository not updated since the watermark, so an unchanged account
+# costs the /users/<login> lookup and one page (both usually a 304). Deleted
+# repositories don't show up in that walk, so when the account's public_repos
+# disagrees with the stored count the sync falls back to a full listing, and
+# only a full listing deletes rows that are gone upstream.
+
+
+def sync_user_repositories(user_id, github_username, progress=None, priority='interactive', max_wait=0):
+    """
+    Bring user_id's stored repositories in line with github_username's on
+    GitHub, applying only the difference, and commit. Returns counts:
+    {'mode': 'incremental' | 'full', 'fetched', 'inserted', 'updated', 'deleted'}.
+    Raises GithubError / GithubUnavailable like the client.
+    """
+    progress = progress or (lambda stage: None)
+    user = db.session.get(User, user_id)
+    watermark = user.repos_watermark if user else None
+    if watermark is not None and (user.repos_synced_login or '').lower() != github_username.lower():
+        watermark = None  # synced for another account: start over
+    # Never hold a transaction open across GitHub calls: with SQLite a read
+    # snapshot kept that long can't become a write if anyone else wrote meanwhile
+    db.session.commit()
+    result = {'mode': 'incremental' if watermark is not None else 'full',
+              'fetched': 0, 'inserted': 0, 'updated': 0, 'deleted': 0}
+
+    def apply(repos):
+        inserted, updated, deleted = upsert_repositories(user_id, repos, github_username=github_username)
+        result['fetched'] += len(repos)
+        result['inserted'] += inserted
+        result['updated'] += updated
+        result['deleted'] += deleted
+        return max(filter(None, (parse_github_time(repo.get('updated_at')) for repo in repos)), default=None)
+
+    progress('fetching repositories')
+    newest = None
+    if watermark is not None:
+        # The account lookup runs alongside the walk, it is only needed once the walk is done
+        account = github.executor.submit(github.get_user, github_username, priority, max_wait)
+        changed = []
+        for page in github.iter_user_repos_by_update(github_username, priority, max_wait):
+            # Repositories updated exactly at the watermark are fetched again, which is harmless
+            fresh = [repo for repo in page if (parse_github_time(repo.get('updated_at')) or watermark) >= watermark]
+            changed.extend(fresh)
+            if len(fresh) < len(page):
+                break
+        expected = account.result().get('public_repos')
+        progress('saving repositories')
+        newest = apply(changed)
+        if expected is not None and synced_repository_count(user_id) != expected:
+            result['mode'] = 'full'  # something was deleted (or made private) upstream
+            db.session.commit()
+
+    if result['mode'] == 'full':
+        repos = github.list_user_repos(github_username, priority, max_wait)
+        progress('saving repositories')
+        newest = apply(repos)
+        result['deleted'] += delete_missing_repositories(
+            user_id, [repo['id'] for repo in repos if repo.get('id') is not None]
+        )
+
+    record_sync(user_id, github_username, max(filter(None, (newest, watermark)), default=None))
+    db.session.commit()
+    return result
+
+
+def run_github_analysis(user_id, github_username, progress=None, priority='interactive', max_wait=0):
+    """
+    Sync a GitHub user's repositories for user_id and build the analysis
+    payload the frontend renders. Raises GithubError on upstream errors,
+    GithubUnavailable when the rate limit or the circuit breaker holds the fetch back.
+    progress, if given, is called with a short stage name as the analysis moves on.
+    """
+    sync = sync_user_repositories(user_id, github_username, progress, priority, max_wait)
+    payload = _stored_payload(user_id, github_username)
+    payload.update(
+        repos_saved=sync['inserted'],
+        repos_updated=sync['updated'],
+        repos_deleted=sync['deleted'],
+        sync_mode=sync['mode'],
+        message=f"Successfully saved {sync['inserted']} repositories to database"
+    )
+    return payload
+
+
+def stored_github_analysis(user_id, github_username, unavailable):
+    """
+    The analysis payload built from what the last sync stored for user_id,
+    marked stale, for when GitHub can't be asked (unavailable is the
+    GithubUnavailable that said so). None when nothing was synced, or the
+    last sync was for another account than github_username.
+    """
+    synced = db.session.execute(
+        select(User.repos_synced_at, User.repos_synced_login).where(User.id == user_id)
+    ).one_or_none()
+    if synced is None or (synced.repos_synced_login or '').lower() != github_username.lower():
+        return None
+    payload = _stored_payload(user_id, github_username)
+    if not payload['repos']:
+        return None
+    synced_at = synced.repos_synced_at
+    payload.update(
+        repos_saved=0,
+        repos_updated=0,
+        stale=True,
+        synced_at=synced_at.isoformat() if synced_at else None,
+        retry_after=unavailable.retry_after,
+        message=f"{unavailable}. Showing the repositories saved by the last analysis"
+    )
+    return payload
+
+
+def _stored_payload(user_id, github_username):
+    # Plain rows rather than entities: this can be every repository the user has
+    repositories = db.session.execute(
+        select(Repository.name, Repository.description, Repository.primary_language, Repository.has_pages,
+               Repository.homepage, Repository.updated_at, Repository.pushed_at, Repository.stars, Repository.fork)
+        .where(Repository.user_id == user_id)
+        .order_by(Repository.pushed_at.desc().nulls_last(), Repository.id.desc())
+    ).all()
+    formatted_repos = [{
+        'name': repository.name,
+        'description': repository.description or '',
+        'language': repository.primary_language,
+        'has_pages': repository.has_pages,
+        'homepage': repository.homepage,
+        'updated_at': repository.updated_at.isoformat() if repository.updated_at else None,
+        'pushed_at': repository.pushed_at.isoformat() if repository.pushed_at else None,
+        'stargazers_count': repository.stars or 0,
+        'fork': repository.fork
+    } for repository in repositories]
+
+    # Language statistics are kept up to date by the sync, read them back in one lookup
+    stats = user_language_stats(user_id)
+    language_stats = {row.language: row.repo_count for row in stats}
+    most_used = stats[0].language if stats else "None"
+
+    return {
+        "username": github_username,
+        "user_id": user_id,
+        "total_repos_fetched": len(formatted_repos),
+        "language_stats": language_stats,
+        "most_used_language": most_used,
+        "repos": formatted_repos,
+        "stale": False
+    }
@@ -0,0 +1,269 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, quote, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from github_governor import GithubGovernor, GithubUnavailable
+from metrics import metrics
+
+
+# GitHub REST client shared by every request in a process.
+# One pooled requests.Session keeps TLS connections alive between analyses,
+# list endpoints are read with per_page=100 and their later pages fetched in
+# parallel, and every response's ETag / Last-Modified is remembered so a repeat
+# fetch is a conditional request that GitHub answers with a cheap 304.
+# Bodies are cut down to the fields we read (REPO_FIELDS, USER_FIELDS) before
+# they are cached, and the cache is bounded by approximate bytes as well as entries.
+# Every request first takes a token from the governor (github_governor.py),
+# the rate-limit budget and circuit breaker shared by all worker processes.
+
+DEFAULT_API_URL = "https://api.github.com"
+LINK_RE = re.compile(r'<([^>]+)>;\s*rel="([^"]+)"')
+# GitHub logins: alphanumerics and single hyphens, not at either end, at most 39 characters
+LOGIN_RE = re.compile(r'^[A-Za-z0-9](?:-?[A-Za-z0-9]){0,38}$')
+# What repository_values and the sync read from a repository / user payload
+REPO_FIELDS = ('id', 'name', 'description', 'language', 'stargazers_count', 'has_pages', 'homepage',
+               'pushed_at', 'updated_at', 'fork')
+USER_FIELDS = ('login', 'public_repos')
+
+
+class GithubError(Exception):
+    def __init__(self, status_code, message=None, headers=None):
+        super().__init__(message or f"GitHub API error: {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def is_valid_login(username):
+    return isinstance(username, str) and LOGIN_RE.match(username) is not None
+
+
+def parse_link_header(value):
+    """{'next': url, 'last': url, ...} from a GitHub Link header"""
+    return {rel: url for url, rel in LINK_RE.findall(value or '')}
+
+
+def select_fields(body, fields):
+    """body (an object or a list of objects) keeping only fields; absent keys stay absent"""
+    if isinstance(body, list):
+        return [select_fields(item, fields) for item in body]
+    if isinstance(body, dict):
+        return {key: body[key] for key in fields if key in body}
+    return body
+
+
+class ConditionalCache:
+    """
+    LRU of url -> (etag, last_modified, body, link) for conditional requests,
+    bounded by entries and by the approximate size of the bodies.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, size):
+        with self._lock:
+            self._bytes += size - self._sizes.get(key, 0)
+            self._entries[key] = entry
+            self._sizes[key] = size
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries or (self._bytes > self.max_bytes and len(self._entries) > 1):
+                evicted, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {'cache_entries': len(self._entries), 'cache_bytes': self._bytes}
+
+
+class GithubClient:
+    def __init__(self, base_url=None, token=None, per_page=100, max_workers=4, timeout=10, pool_size=10):
+        self.base_url = (base_url or DEFAULT_API_URL).rstrip('/')
+        self.token = token
+        self.per_page = per_page
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.cache = ConditionalCache()
+        self.governor = GithubGovernor()
+        self._session = None
+        self._executor = None
+
+    def init_app(self, app):
+        """Read GITHUB_* settings from the app config, falling back to the environment"""
+        self.base_url = app.config.get('GITHUB_API_URL', os.environ.get('GITHUB_API_URL', self.base_url)).rstrip('/')
+        self.token = app.config.get('GITHUB_TOKEN', os.environ.get('GITHUB_TOKEN', self.token))
+        self.max_workers = app.config.get('GITHUB_MAX_WORKERS', self.max_workers)
+        self.timeout = app.config.get('GITHUB_TIMEOUT', self.timeout)
+        self.cache.max_bytes = app.config.get('GITHUB_CACHE_MAX_BYTES', self.cache.max_bytes)
+        # An empty GITHUB_RATE_STATE_PATH turns the governor off
+        state_path = app.config.get('GITHUB_RATE_STATE_PATH', os.environ.get(
+            'GITHUB_RATE_STATE_PATH', os.path.join(app.instance_path, 'github_rate.db')))
+        self.governor.configure(
+            state_path or None, self.base_url, self.token,
+            reserve=app.config.get('GITHUB_RATE_RESERVE', 100),
+            failure_threshold=app.config.get('GITHUB_BREAKER_THRESHOLD', 5),
+            cooldown=app.config.get('GITHUB_BREAKER_COOLDOWN', 60),
+            probe_timeout=self.timeout * 3,
+        )
+        app.extensions['github'] = self
+
+    def after_fork(self):
+        # Pooled HTTP connections and threads don't survive a fork
+        self._session = None
+        self._executor = None
+        self.governor.after_fork()
+
+    def stats(self):
+        return dict(self.governor.stats(), **self.cache.stats())
+
+    @property
+    def session(self):
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['Accept'] = 'application/vnd.github+json'
+            if self.token:
+                session.headers['Authorization'] = f"Bearer {self.token}"
+            self._session = session
+        return self._session
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='github')
+        return self._executor
+
+    def get(self, url, priority='interactive', max_wait=0, acquired=False, fields=None):
+        """
+        GET an absolute API url, sending If-None-Match / If-Modified-Since when
+        we have seen it before. Returns (body, link_header), the body cut down
+        to fields (see select_fields) when given. Raises GithubError,
+        or GithubUnavailable when the governor holds the request back (see
+        GithubGovernor.acquire for priority and max_wait) or GitHub rate limits it.
+        acquired means the caller already took this request's token.
+        """
+        if not acquired:
+            self.governor.acquire(priority, max_wait)
+        cached = self.cache.get(url)
+        headers = {}
+        if cached:
+            etag, last_modified, _, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            metrics.observe_upstream('github', 'error', time.perf_counter() - started)
+            self.governor.record_failure()
+            raise
+        metrics.observe_upstream('github', response.status_code, time.perf_counter() - started)
+
+        if self.governor.record_response(response.status_code, response.headers):
+            raise GithubUnavailable('rate limit', self._retry_after(response.headers))
+        if response.status_code == 304 and cached:
+            # Conditional requests answered with 304 don't count against the quota
+            self.governor.refund()
+            return cached[2], cached[3]
+        if response.status_code != 200:
+            raise GithubError(response.status_code, headers=response.headers)
+
+        body = response.json()
+        if fields is not None:
+            body = select_fields(body, fields)
+        link = response.headers.get('Link')
+        if response.headers.get('ETag') or response.headers.get('Last-Modified'):
+            entry = (response.headers.get('ETag'), response.headers.get('Last-Modified'), body, link)
+            self.cache.set(url, entry, len(json.dumps(body)) + len(url))
+        return body, link
+
+    @staticmethod
+    def _retry_after(headers):
+        try:
+            if 'Retry-After' in headers:
+                return int(headers['Retry-After'])
+            return int(headers['X-RateLimit-Reset']) - time.time()
+        except (KeyError, ValueError):
+            return 60
+
+    def get_paginated(self, path, priority='interactive', max_wait=0, fields=None, **params):
+        """Every item of a list endpoint, pages 2..N fetched concurrently"""
+        params.setdefault('per_page', self.per_page)
+        query = '&'.join(f"{key}={value}" for key, value in params.items())
+        first_url = f"{self.base_url}{path}?{query}"
+
+        def get(url, acquired=False):
+            return self.get(url, priority, max_wait, acquired, fields)
+
+        first_page, link = get(first_url)
+        items = list(first_page)  # never extend a cached body in place
+        links = parse_link_header(link)
+
+        if 'last' in links:
+            last_page = int(parse_qs(urlparse(links['last']).query).get('page', ['1'])[0])
+            urls = [f"{first_url}&page={page}" for page in range(2, last_page + 1)]
+            # Budget for every remaining page up front: shed the listing now
+            # rather than run out of quota halfway through it
+            self.governor.acquire(priority, max_wait, cost=len(urls))
+            for page_items, _ in self.executor.map(lambda url: get(url, acquired=True), urls):
+                items.extend(page_items)
+        else:
+            # No last link: walk next links one at a time
+            while 'next' in links:
+                page_items, link = get(links['next'])
+                items.extend(page_items)
+                links = parse_link_header(link)
+        return items
+
+    def iter_pages(self, path, priority='interactive', max_wait=0, fields=None, **params):
+        """Pages of a list endpoint one at a time, following next links, for callers that stop early"""
+        params.setdefault('per_page', self.per_page)
+        query = '&'.join(f"{key}={value}" for key, value in params.items())
+        url = f"{self.base_url}{path}?{query}"
+        while url:
+            items, link = self.get(url, priority, max_wait, fields=fields)
+            yield items
+            url = parse_link_header(link).get('next')
+
+    def get_user(self, username, priority='interactive', max_wait=0):
+        body, _ = self.get(f"{self.base_url}/users/{quote(username, safe='')}", priority, max_wait, fields=USER_FIELDS)
+        return body
+
+    def list_user_repos(self, username, priority='interactive', max_wait=0):
+        """Every repository, in GitHub's default (name) order that concurrent updates don't reshuffle"""
+        return self.get_paginated(f"/users/{quote(username, safe='')}/repos", priority, max_wait, REPO_FIELDS)
+
+    def iter_user_repos_by_update(self, username, priority='interactive', max_wait=0):
+        """Pages of repositories, most recently updated first"""
+        return self.iter_pages(
+            f"/users/{quote(username, safe='')}/repos", priority, max_wait, REPO_FIELDS,
+            sort='updated', direction='desc'
+        )
+
+
+github = GithubClient()
@@ -0,0 +1,230 @@
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+
+
+# Shared GitHub rate-limit budget and circuit breaker.
+# GitHub's quota is per token, not per process, so every worker process keeps
+# its view of it in one small SQLite file. The budget is a token bucket that
+# GitHub refills: X-RateLimit-Remaining/-Reset from every response set the
+# tokens left and the refill time, and each request takes a token before it is
+# sent, so concurrent workers can't all spend the last few. Background callers
+# leave GITHUB_RATE_RESERVE tokens for interactive ones and either wait for the
+# refill (up to their own limit) or are shed with GithubUnavailable.
+# Consecutive upstream failures (5xx, timeouts, rate limiting) open the breaker
+# for GITHUB_BREAKER_COOLDOWN seconds; after that one probe request is let
+# through and its outcome closes or re-opens it. While GitHub is unavailable
+# the analysis endpoints serve the results persisted by the last sync.
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS github_budget ("
+    " key TEXT PRIMARY KEY, remaining INTEGER, rate_limit INTEGER, reset_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS github_breaker ("
+    " key TEXT PRIMARY KEY, state TEXT NOT NULL, failures INTEGER NOT NULL, opened_at REAL NOT NULL)",
+]
+
+
+class GithubUnavailable(Exception):
+    """GitHub calls are refused locally: the quota is spent (or reserved) or the breaker is open"""
+
+    status_code = 503
+
+    def __init__(self, reason, retry_after):
+        self.reason = reason
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+        super().__init__(f"GitHub is unavailable ({reason}), try again in {self.retry_after}s")
+
+
+def _header_int(headers, name):
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class GithubGovernor:
+    def __init__(self, path=None, reserve=100, failure_threshold=5, cooldown=60, probe_timeout=30):
+        self.path = path
+        self.key = 'default'
+        self.reserve = reserve
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+        self._local = threading.local()
+        self.waited = 0
+        self.shed = 0
+
+    def configure(self, path, base_url, token, reserve=None, failure_threshold=None, cooldown=None, probe_timeout=None):
+        """Point at the shared state file; state is kept per API url and token, like GitHub's quota"""
+        self.path = path
+        self.key = hashlib.sha1(f"{base_url}|{token or ''}".encode()).hexdigest()[:16]
+        if reserve is not None:
+            self.reserve = reserve
+        if failure_threshold is not None:
+            self.failure_threshold = failure_threshold
+        if cooldown is not None:
+            self.cooldown = cooldown
+        if probe_timeout is not None:
+            self.probe_timeout = probe_timeout
+        self._local = threading.local()
+
+    def after_fork(self):
+        # sqlite3 connections must not be used across a fork
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, fn):
+        """Run fn(conn, now) in one write transaction, so check-and-take is atomic across processes"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn, time.time())
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    # Before a request
+
+    def acquire(self, priority='interactive', max_wait=0, cost=1):
+        """
+        Take cost tokens (one per request), or raise GithubUnavailable. Waits
+        for the breaker or the quota to reset when that happens within max_wait.
+        """
+        if self.path is None:
+            return
+        deadline = time.monotonic() + max_wait
+        while True:
+            refused = self._transaction(lambda conn, now: self._take(conn, now, priority, cost))
+            if refused is None:
+                return
+            reason, retry_after = refused
+            if time.monotonic() + retry_after > deadline:
+                self.shed += 1
+                raise GithubUnavailable(reason, retry_after)
+            self.waited += 1
+            time.sleep(retry_after)
+
+    def _take(self, conn, now, priority, cost):
+        breaker = conn.execute(
+            "SELECT state, opened_at FROM github_breaker WHERE key = ?", (self.key,)
+        ).fetchone()
+        if breaker and breaker[0] == 'open':
+            if now < breaker[1] + self.cooldown:
+                return 'circuit open', breaker[1] + self.cooldown - now
+            # Cooled down: this request is the probe, everyone else waits for its outcome
+            conn.execute("UPDATE github_breaker SET state = 'half_open', opened_at = ? WHERE key = ?", (now, self.key))
+        elif breaker and breaker[0] == 'half_open' and now < breaker[1] + self.probe_timeout:
+            return 'circuit half-open', breaker[1] + self.probe_timeout - now
+
+        budget = conn.execute(
+            "SELECT remaining, reset_at FROM github_budget WHERE key = ?", (self.key,)
+        ).fetchone()
+        if budget is None or budget[0] is None or budget[1] <= now:
+            return None  # unknown, or refilled since: the response will tell
+        floor = self.reserve if priority == 'background' else 0
+        if budget[0] - cost < floor:
+            return 'rate limit', budget[1] - now
+        conn.execute("UPDATE github_budget SET remaining = remaining - ? WHERE key = ?", (cost, self.key))
+        return None
+
+    # After a request
+
+    def record_response(self, status_code, headers):
+        """Update the budget from the rate limit headers and the breaker from the outcome"""
+        if self.path is None:
+            return
+        remaining = _header_int(headers, 'X-RateLimit-Remaining')
+        reset_at = _header_int(headers, 'X-RateLimit-Reset')
+        rate_limit = _header_int(headers, 'X-RateLimit-Limit')
+        retry_after = _header_int(headers, 'Retry-After')
+        limited = status_code in (403, 429) and (remaining == 0 or retry_after is not None)
+        if limited and retry_after is not None:
+            # Secondary rate limit: nothing more until Retry-After has passed
+            remaining, reset_at = 0, time.time() + retry_after
+
+        def update(conn, now):
+            if remaining is not None and reset_at is not None:
+                # Responses to concurrent requests arrive out of order: within one
+                # window the lowest count is the most recent
+                conn.execute(
+                    "INSERT INTO github_budget (key, remaining, rate_limit, reset_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET "
+                    " remaining = CASE WHEN excluded.reset_at <= github_budget.reset_at"
+                    "   THEN MIN(github_budget.remaining, excluded.remaining) ELSE excluded.remaining END,"
+                    " rate_limit = COALESCE(excluded.rate_limit, github_budget.rate_limit),"
+                    " reset_at = MAX(github_budget.reset_at, excluded.reset_at)",
+                    (self.key, remaining, rate_limit, reset_at)
+                )
+            if limited or status_code >= 500:
+                self._failed(conn, now)
+            else:
+                self._succeeded(conn)
+        self._transaction(update)
+        return limited
+
+    def record_failure(self):
+        """A request that never got a response (timeout, connection error)"""
+        if self.path is not None:
+            self._transaction(self._failed)
+
+    def refund(self):
+        """Give back the token of a request GitHub didn't charge for (a 304)"""
+        if self.path is not None:
+            self._transaction(lambda conn, now: conn.execute(
+                "UPDATE github_budget SET remaining = remaining + 1 WHERE key = ? AND reset_at > ?", (self.key, now)
+            ))
+
+    def _failed(self, conn, now):
+        conn.execute(
+            "INSERT INTO github_breaker (key, state, failures, opened_at) VALUES (?, 'closed', 1, 0) "
+            "ON CONFLICT(key) DO UPDATE SET failures = failures + 1",
+            (self.key,)
+        )
+        state, failures = conn.execute(
+            "SELECT state, failures FROM github_breaker WHERE key = ?", (self.key,)
+        ).fetchone()
+        if state == 'half_open' or failures >= self.failure_threshold:
+            conn.execute("UPDATE github_breaker SET state = 'open', opened_at = ? WHERE key = ?", (now, self.key))
+
+    def _succeeded(self, conn):
+        conn.execute(
+            "UPDATE github_breaker SET state = 'closed', failures = 0 "
+            "WHERE key = ? AND (state != 'closed' OR failures != 0)",
+            (self.key,)
+        )
+
+    def stats(self):
+        if self.path is None:
+            return {}
+        conn = self._connect()
+        budget = conn.execute(
+            "SELECT remaining, rate_limit, reset_at FROM github_budget WHERE key = ?", (self.key,)
+        ).fetchone()
+        breaker = conn.execute(
+            "SELECT state, failures FROM github_breaker WHERE key = ?", (self.key,)
+        ).fetchone()
+        stats = {'waited': self.waited, 'shed': self.shed,
+                 'breaker_open': int(bool(breaker) and breaker[0] != 'closed'),
+                 'consecutive_failures': breaker[1] if breaker else 0}
+        if budget and budget[0] is not None:
+            stats.update(rate_remaining=budget[0], rate_reset_seconds=max(0.0, round(budget[2] - time.time(), 1)))
+            if budget[1] is not None:
+                stats['rate_limit'] = budget[1]
+        return stats
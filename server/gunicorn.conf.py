@@ -0,0 +1,53 @@
+import multiprocessing
+import os
+
+
+# gunicorn settings for `gunicorn -c gunicorn.conf.py wsgi:app`, read from the environment:
+#   PORT              listen port (5555)
+#   WEB_CONCURRENCY   worker processes (one per CPU)
+#   WEB_THREADS       threads per worker (4); above 1 uses the gthread worker
+#   WEB_TIMEOUT       seconds before a silent worker is restarted (60, long polls wait up to 30)
+#   WEB_MAX_REQUESTS  recycle a worker after this many requests (0, never)
+#   PRELOAD_APP       build the app once in the master before forking (1)
+#   WEB_ACCESS_LOG    access log path, '-' for stdout (the default), empty for none
+#   CACHE_SHARED_PATH response cache file shared by the workers (instance/response_cache.db
+#                     when there is more than one worker, which then can't be turned off)
+#   METRICS_SHARED_PATH  the same for /metrics (instance/metrics.db), emptied at startup
+# With PostgreSQL keep DB_POOL_SIZE at least WEB_THREADS: every worker has its own pool.
+# The background GitHub refresh is not part of the web server: run
+# `flask refresh-repositories` as a process of its own (see refresh.py).
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5555')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+preload_app = os.environ.get('PRELOAD_APP', '1') == '1'
+accesslog = os.environ.get('WEB_ACCESS_LOG', '-') or None
+
+# Cache invalidations are versions bumped by the worker that wrote, and
+# metrics are counted by the worker that served: other workers only see either
+# through a shared file (see cache.py, metrics.py). Set before the app is
+# built, in the master with preload and in each worker without.
+if workers > 1:
+    instance = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
+    os.environ.setdefault('CACHE_SHARED_PATH', os.path.join(instance, 'response_cache.db'))
+    os.environ.setdefault('METRICS_SHARED_PATH', os.path.join(instance, 'metrics.db'))
+    for name in ('CACHE_SHARED_PATH', 'METRICS_SHARED_PATH'):
+        if not os.environ[name]:
+            raise RuntimeError(f"{workers} workers need a shared file: leave {name} unset or point it at a file")
+    # Counters start over with the server, like a single process's would
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(os.environ['METRICS_SHARED_PATH'] + suffix):
+            os.remove(os.environ['METRICS_SHARED_PATH'] + suffix)
+
+
+def post_fork(server, worker):
+    # The worker inherited the master's app: connection pools, executors and
+    # locks included. Without preload the app is built in the worker, after this.
+    if server.cfg.preload_app:
+        from app import after_fork
+        from wsgi import app
+        after_fork(app)
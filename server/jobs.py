@@ -0,0 +1,193 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from github_analysis import run_github_analysis, stored_github_analysis
+from github_client import GithubError, is_valid_login
+from github_governor import GithubUnavailable
+from models import db, AnalysisJob
+
+
+# Background GitHub analyses.
+# Jobs are rows in analysis_jobs so their state survives a restart; a bounded
+# thread pool runs them inside an app context. A queued or running job for a
+# username is reused instead of starting a second fetch for the same account;
+# a partial unique index keeps that true across worker processes.
+# A job held back by the GitHub rate limit or circuit breaker waits for it up
+# to ANALYSIS_GITHUB_WAIT seconds, then settles for the last stored results.
+
+MAX_JOB_WAIT_SECONDS = 30
+ACTIVE_STATUSES = ("queued", "running")
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    def __init__(self, retry_after=5):
+        super().__init__("Analysis queue is full, try again shortly")
+        self.retry_after = retry_after
+
+
+class AnalysisJobRunner:
+    def __init__(self, workers=2, max_pending=100, stale_after=300, github_wait=30):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.stale_after = stale_after
+        self.github_wait = github_wait
+        self.app = None
+        self._executor = None
+        self._pending = 0
+        self._recovered = False
+        # Guards _pending and de-duplication, and wakes long-polling readers
+        self._cond = threading.Condition()
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('ANALYSIS_WORKERS', self.workers)
+        self.max_pending = app.config.get('ANALYSIS_QUEUE_SIZE', self.max_pending)
+        self.stale_after = app.config.get('ANALYSIS_STALE_SECONDS', self.stale_after)
+        self.github_wait = app.config.get('ANALYSIS_GITHUB_WAIT', self.github_wait)
+        app.extensions['analysis_jobs'] = self
+
+    def after_fork(self):
+        self._executor = None
+        self._pending = 0
+        self._cond = threading.Condition()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='analysis')
+        return self._executor
+
+    def submit(self, user_id, github_username):
+        """Queue an analysis, or return the active one for this username. Returns (job, created)"""
+        if not is_valid_login(github_username):
+            raise ValueError(f"Invalid GitHub username: {github_username!r}")
+        self._recover()
+        with self._cond:
+            active = self._active_job(github_username)
+            if active:
+                return active, False
+            if self._pending >= self.max_pending:
+                raise JobQueueFull()
+
+            job = AnalysisJob(id=uuid.uuid4().hex, github_username=github_username, user_id=user_id,
+                              status="queued", progress="queued")
+            db.session.add(job)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Another process queued one for this username in between
+                db.session.rollback()
+                active = self._active_job(github_username)
+                if active is None:
+                    raise
+                return active, False
+            self._enqueue(job.id)
+        return job, True
+
+    @staticmethod
+    def _active_job(github_username):
+        return (
+            AnalysisJob.query
+            .filter(AnalysisJob.github_username == github_username, AnalysisJob.status.in_(ACTIVE_STATUSES))
+            .order_by(AnalysisJob.created_at)
+            .first()
+        )
+
+    def get(self, job_id):
+        self._recover()
+        return db.session.get(AnalysisJob, job_id, populate_existing=True)
+
+    def wait(self, job_id, timeout):
+        """Long-poll: block until the job finishes or timeout seconds pass"""
+        deadline = datetime.utcnow() + timedelta(seconds=timeout)
+        while True:
+            job = self.get(job_id)
+            remaining = (deadline - datetime.utcnow()).total_seconds()
+            if not job or job.finished or remaining <= 0:
+                return job
+            # Woken early by local workers; the 1s cap also picks up other processes
+            with self._cond:
+                self._cond.wait(min(remaining, 1.0))
+
+    def stats(self):
+        return {'pending': self._pending, 'workers': self.workers, 'max_pending': self.max_pending}
+
+    def _enqueue(self, job_id):
+        self._pending += 1
+        self.executor.submit(self._run, job_id)
+
+    def _recover(self):
+        """Requeue jobs left queued, or stuck running, by a previous process"""
+        if self._recovered:
+            return
+        with self._cond:
+            if self._recovered:
+                return
+            self._recovered = True
+            stale = datetime.utcnow() - timedelta(seconds=self.stale_after)
+            db.session.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.status == "running", AnalysisJob.updated_at < stale)
+                .values(status="queued", progress="requeued", updated_at=datetime.utcnow())
+            )
+            db.session.commit()
+            for job in AnalysisJob.query.filter_by(status="queued").order_by(AnalysisJob.created_at):
+                self._enqueue(job.id)
+
+    def _run(self, job_id):
+        try:
+            with self.app.app_context():
+                # Claim the job atomically so two processes never run the same one
+                claimed = db.session.execute(
+                    update(AnalysisJob)
+                    .where(AnalysisJob.id == job_id, AnalysisJob.status == "queued")
+                    .values(status="running", progress="starting",
+                            started_at=datetime.utcnow(), updated_at=datetime.utcnow())
+                ).rowcount
+                db.session.commit()
+                if not claimed:
+                    return
+
+                job = db.session.get(AnalysisJob, job_id)
+
+                def progress(stage):
+                    job.progress = stage
+                    db.session.commit()
+
+                try:
+                    job.result = run_github_analysis(job.user_id, job.github_username, progress,
+                                                     max_wait=self.github_wait)
+                    job.status = "succeeded"
+                except GithubUnavailable as e:
+                    db.session.rollback()
+                    job.result = stored_github_analysis(job.user_id, job.github_username, e)
+                    job.status = "succeeded" if job.result else "failed"
+                    job.error = None if job.result else str(e)
+                except GithubError as e:
+                    db.session.rollback()
+                    job.status = "failed"
+                    job.error = f"GitHub API error: {e.status_code}"
+                except Exception as e:
+                    db.session.rollback()
+                    job.status = "failed"
+                    job.error = str(e)
+                job.progress = "done"
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+        except Exception:
+            logger.exception("Analysis job %s crashed", job_id)
+        finally:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+
+
+analysis_jobs = AnalysisJobRunner()
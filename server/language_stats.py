@@ -0,0 +1,135 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import attributes
+
+from models import db, Repository, UserLanguageStat, track_old_values
+
+
+# Per-user language statistics, maintained incrementally.
+# user_language_stats holds one row per (user_id, language) with the number of
+# repositories and their stars. Every repository write turns into +/- deltas on
+# those rows: ORM inserts, updates and deletes through the mapper events below,
+# and the bulk sync path in repo_sync through apply_deltas directly.
+
+NO_LANGUAGE = 'No language'
+
+
+def language_key(language):
+    return language or NO_LANGUAGE
+
+
+class LanguageDeltas:
+    """Accumulates (user_id, language) -> [repo delta, star delta]"""
+
+    def __init__(self):
+        self._deltas = defaultdict(lambda: [0, 0])
+
+    def add(self, user_id, language, stars, sign=1):
+        if user_id is None:
+            return
+        delta = self._deltas[(user_id, language_key(language))]
+        delta[0] += sign
+        delta[1] += sign * (stars or 0)
+
+    def remove(self, user_id, language, stars):
+        self.add(user_id, language, stars, sign=-1)
+
+    def items(self):
+        return [(key, delta) for key, delta in self._deltas.items() if delta != [0, 0]]
+
+
+def _upsert(dialect_name):
+    if dialect_name == 'postgresql':
+        return pg_insert
+    return sqlite_insert
+
+
+def apply_deltas(connection, deltas):
+    """Add the deltas onto user_language_stats in one upsert batch, dropping rows that reach zero"""
+    items = deltas.items()
+    if not items:
+        return
+    now = datetime.utcnow()
+    table = UserLanguageStat.__table__
+    stmt = _upsert(connection.dialect.name)(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.language],
+        set_={
+            'repo_count': table.c.repo_count + stmt.excluded.repo_count,
+            'total_stars': table.c.total_stars + stmt.excluded.total_stars,
+            'updated_at': stmt.excluded.updated_at,
+        }
+    )
+    connection.execute(stmt, [
+        {'user_id': user_id, 'language': language, 'repo_count': repos, 'total_stars': stars, 'updated_at': now}
+        for (user_id, language), (repos, stars) in items
+    ])
+    user_ids = {user_id for (user_id, _), _ in items}
+    connection.execute(delete(table).where(table.c.user_id.in_(user_ids), table.c.repo_count <= 0))
+
+
+def rebuild_language_stats(connection, user_ids=None):
+    """Recompute the table (or some users' rows) from repositories with one grouped INSERT ... SELECT"""
+    table = UserLanguageStat.__table__
+    criteria = [Repository.user_id.isnot(None)]
+    if user_ids is not None:
+        criteria.append(Repository.user_id.in_(user_ids))
+        connection.execute(delete(table).where(table.c.user_id.in_(user_ids)))
+    else:
+        connection.execute(delete(table))
+
+    language = func.coalesce(Repository.primary_language, NO_LANGUAGE)
+    connection.execute(insert(table).from_select(
+        ['user_id', 'language', 'repo_count', 'total_stars', 'updated_at'],
+        select(
+            Repository.user_id, language, func.count(), func.coalesce(func.sum(Repository.stars), 0),
+            func.current_timestamp()
+        ).where(*criteria).group_by(Repository.user_id, language)
+    ))
+
+
+def user_language_stats(user_id, session=None):
+    """A user's rows, most used language first (one lookup on the primary key)"""
+    session = session or db.session
+    return session.execute(
+        select(UserLanguageStat)
+        .where(UserLanguageStat.user_id == user_id)
+        .order_by(UserLanguageStat.repo_count.desc(), UserLanguageStat.language)
+    ).scalars().all()
+
+
+# ORM write paths
+
+@event.listens_for(Repository, 'after_insert')
+def _repository_inserted(mapper, connection, target):
+    deltas = LanguageDeltas()
+    deltas.add(target.user_id, target.primary_language, target.stars)
+    apply_deltas(connection, deltas)
+
+
+@event.listens_for(Repository, 'after_delete')
+def _repository_deleted(mapper, connection, target):
+    deltas = LanguageDeltas()
+    deltas.remove(target.user_id, target.primary_language, target.stars)
+    apply_deltas(connection, deltas)
+
+
+track_old_values(Repository.user_id, Repository.primary_language, Repository.stars)
+
+
+@event.listens_for(Repository, 'after_update')
+def _repository_updated(mapper, connection, target):
+    old = {}
+    for name in ('user_id', 'primary_language', 'stars'):
+        history = attributes.get_history(target, name)
+        old[name] = history.deleted[0] if history.deleted else getattr(target, name)
+    if all(old[name] == getattr(target, name) for name in old):
+        return
+    deltas = LanguageDeltas()
+    deltas.remove(old['user_id'], old['primary_language'], old['stars'])
+    deltas.add(target.user_id, target.primary_language, target.stars)
+    apply_deltas(connection, deltas)
@@ -0,0 +1,392 @@
+import atexit
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Request instrumentation exported in Prometheus text format at /metrics.
+# before/after request hooks time every request and the SQLAlchemy cursor
+# listeners attribute each statement's count and time to the endpoint (the
+# url rule, so /projects/<int:project_id> is one series, not one per id).
+# Statements run outside a request, by the analysis workers for example, are
+# recorded under endpoint="background". Requests slower than SLOW_REQUEST_MS
+# are logged with their slowest statements; statements slower than
+# SLOW_QUERY_MS are logged on their own with the SQL. Bound parameters are
+# never logged, they carry emails and password hashes.
+# Counters and histograms live in each process. With METRICS_SHARED_PATH set
+# (gunicorn.conf.py sets it whenever there is more than one worker) every
+# process writes its series to that SQLite file at most every
+# METRICS_FLUSH_SECONDS and at exit, and /metrics sums the series of all of
+# them, exited workers included, so counters only go up whichever worker
+# answers the scrape. The extension gauges are the answering process's own.
+# /metrics answers requests carrying `Authorization: Bearer <METRICS_TOKEN>`
+# when a token is set, otherwise only clients in METRICS_ALLOW (comma separated
+# addresses or networks, loopback by default).
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SLOW_STATEMENTS_KEPT = 5
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _label_order(item):
+    # Label values mix types (status 200 next to 'error'), order them as text
+    return tuple(str(value) for value in item[0])
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def snapshot(self):
+        return dict(self.values)
+
+    def reset(self):
+        self.values = {}
+
+    @staticmethod
+    def merge(total, value):
+        return (total or 0) + value
+
+    def render(self, values=None):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted((self.values if values is None else values).items(), key=_label_order):
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def snapshot(self):
+        return {labels: list(series) for labels, series in self.series.items()}
+
+    def reset(self):
+        self.series = {}
+
+    @staticmethod
+    def merge(total, series):
+        return list(series) if total is None else [a + b for a, b in zip(total, series)]
+
+    def render(self, values=None):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ('le',)
+        for labels, series in sorted((self.series if values is None else values).items(), key=_label_order):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class RequestStats:
+    __slots__ = ('started', 'statements', 'sql_seconds', 'slowest')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.slowest = []  # (seconds, statement), the slowest few only
+
+
+class SharedSeries:
+    """Every process's series in one SQLite file, one row per (process, family, labels)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.process = uuid.uuid4().hex  # not the pid: a recycled pid must not take over an exited worker's rows
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS metric_series ("
+            " process TEXT NOT NULL, family TEXT NOT NULL, labels TEXT NOT NULL, value TEXT NOT NULL,"
+            " PRIMARY KEY (process, family, labels))"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def after_fork(self):
+        # sqlite3 connections must not be used across a fork, and a worker is a process of its own
+        self._local = threading.local()
+        self.process = uuid.uuid4().hex
+
+    def write(self, snapshots):
+        rows = [
+            (self.process, name, json.dumps(list(labels)), json.dumps(value))
+            for name, values in snapshots for labels, value in values.items()
+        ]
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO metric_series VALUES (?, ?, ?, ?)", rows)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def read(self):
+        """{family: [(labels, value), ...]} over every process"""
+        totals = {}
+        for family, labels, value in self._connect().execute("SELECT family, labels, value FROM metric_series"):
+            totals.setdefault(family, []).append((tuple(json.loads(labels)), json.loads(value)))
+        return totals
+
+
+class Metrics:
+    def __init__(self, slow_request_ms=500, slow_query_ms=100, flush_seconds=5):
+        self.slow_request_ms = slow_request_ms
+        self.slow_query_ms = slow_query_ms
+        self.flush_seconds = flush_seconds
+        self.app = None
+        self.token = None
+        self.allow = ()
+        self.shared = None
+        self._lock = threading.Lock()
+        self._next_flush = 0.0
+        self.requests = Counter(
+            'launchpad_http_requests_total', 'HTTP requests handled', ('method', 'endpoint', 'status'))
+        self.latency = Histogram(
+            'launchpad_http_request_duration_seconds', 'Time to produce a response',
+            LATENCY_BUCKETS, ('method', 'endpoint'))
+        self.response_size = Histogram(
+            'launchpad_http_response_size_bytes', 'Response body size (streamed bodies are not counted)',
+            SIZE_BUCKETS, ('method', 'endpoint'))
+        self.request_statements = Histogram(
+            'launchpad_sql_statements_per_request', 'SQL statements executed while handling a request',
+            COUNT_BUCKETS, ('method', 'endpoint'))
+        self.statements = Counter(
+            'launchpad_sql_statements_total', 'SQL statements executed', ('endpoint',))
+        self.sql_seconds = Counter(
+            'launchpad_sql_duration_seconds_total', 'Time spent executing SQL statements', ('endpoint',))
+        self.slow_queries = Counter(
+            'launchpad_sql_slow_statements_total', 'Statements slower than SLOW_QUERY_MS', ('endpoint',))
+        self.upstream = Histogram(
+            'launchpad_upstream_request_duration_seconds', 'Calls to external APIs',
+            LATENCY_BUCKETS, ('service', 'status'))
+        self.families = [
+            self.requests, self.latency, self.response_size, self.request_statements,
+            self.statements, self.sql_seconds, self.slow_queries, self.upstream,
+        ]
+
+    def init_app(self, app):
+        self.app = app
+        self.slow_request_ms = float(app.config.get('SLOW_REQUEST_MS', os.environ.get('SLOW_REQUEST_MS', self.slow_request_ms)))
+        self.slow_query_ms = float(app.config.get('SLOW_QUERY_MS', os.environ.get('SLOW_QUERY_MS', self.slow_query_ms)))
+        self.token = app.config.get('METRICS_TOKEN', os.environ.get('METRICS_TOKEN')) or None
+        allow = app.config.get('METRICS_ALLOW', os.environ.get('METRICS_ALLOW', '127.0.0.1,::1'))
+        self.allow = tuple(ipaddress.ip_network(net.strip(), strict=False) for net in allow.split(',') if net.strip())
+        self.flush_seconds = float(app.config.get('METRICS_FLUSH_SECONDS', self.flush_seconds))
+        shared_path = app.config.get('METRICS_SHARED_PATH', os.environ.get('METRICS_SHARED_PATH'))
+        if shared_path:
+            self.shared = SharedSeries(shared_path)
+            atexit.register(self.flush)
+        app.extensions['metrics'] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', self.export)
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _statement_failed)
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+        # What the master counted (warming up, say) is not this worker's
+        for family in self.families:
+            family.reset()
+        if self.shared:
+            self.shared.after_fork()
+
+    def flush(self):
+        """Write this process's series to the shared store"""
+        if self.shared is None:
+            return
+        with self._lock:
+            snapshots = [(family.name, family.snapshot()) for family in self.families]
+            self._next_flush = time.monotonic() + self.flush_seconds
+        self.shared.write(snapshots)
+
+    # Requests
+
+    def _before_request(self):
+        g._request_stats = RequestStats()
+
+    def _after_request(self, response):
+        stats = g.pop('_request_stats', None)
+        if stats is None:
+            return response
+        elapsed = time.perf_counter() - stats.started
+        method, endpoint = request.method, _endpoint()
+        with self._lock:
+            self.requests.inc(method, endpoint, response.status_code)
+            self.latency.observe(elapsed, method, endpoint)
+            self.request_statements.observe(stats.statements, method, endpoint)
+            if not response.is_streamed and response.content_length is not None:
+                self.response_size.observe(response.content_length, method, endpoint)
+
+        if elapsed * 1000 >= self.slow_request_ms:
+            slowest = ''.join(
+                f"\n    {seconds * 1000:.1f}ms {' '.join(statement.split())}"
+                for seconds, statement in sorted(stats.slowest, reverse=True)
+            )
+            logger.warning(
+                "Slow request %s %s -> %s in %.1fms (%d SQL statements, %.1fms in SQL)%s",
+                method, request.full_path.rstrip('?'), response.status_code, elapsed * 1000,
+                stats.statements, stats.sql_seconds * 1000, slowest
+            )
+        if self.shared and time.monotonic() >= self._next_flush:
+            try:
+                self.flush()
+            except sqlite3.Error:
+                logger.exception("Could not write metrics to %s", self.shared.path)
+        return response
+
+    # SQL
+
+    def observe_statement(self, seconds, statement):
+        in_request = has_request_context()
+        # Streamed bodies run after _after_request: counted, but not per request
+        stats = g.get('_request_stats') if in_request else None
+        endpoint = _endpoint() if in_request else 'background'
+        slow = seconds * 1000 >= self.slow_query_ms
+        with self._lock:
+            self.statements.inc(endpoint)
+            self.sql_seconds.inc(endpoint, amount=seconds)
+            if slow:
+                self.slow_queries.inc(endpoint)
+        if stats is not None:
+            stats.statements += 1
+            stats.sql_seconds += seconds
+            stats.slowest.append((seconds, statement))
+            if len(stats.slowest) > SLOW_STATEMENTS_KEPT:
+                stats.slowest.remove(min(stats.slowest))
+        if slow:
+            logger.warning("Slow query (%s) %.1fms: %s", endpoint, seconds * 1000, ' '.join(statement.split()))
+
+    # Upstream APIs
+
+    def observe_upstream(self, service, status, seconds):
+        with self._lock:
+            self.upstream.observe(seconds, service, status)
+
+    # Export
+
+    def render(self):
+        if self.shared:
+            self.flush()
+            totals = self.shared.read()
+            lines = []
+            for family in self.families:
+                values = {}
+                for labels, value in totals.get(family.name, ()):
+                    values[labels] = family.merge(values.get(labels), value)
+                lines.extend(family.render(values))
+        else:
+            with self._lock:
+                lines = [line for family in self.families for line in family.render()]
+        lines.extend(self._extension_stats())
+        return '\n'.join(lines) + '\n'
+
+    def _extension_stats(self):
+        """stats() of the app's extensions that have one (cache, password hasher, jobs) as gauges"""
+        lines = []
+        for name, extension in sorted((self.app.extensions if self.app else {}).items()):
+            stats = getattr(extension, 'stats', None)
+            if extension is self or not callable(stats):
+                continue
+            for key, value in sorted(stats().items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f"launchpad_{name}_{key}"
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.append(f"{metric} {_number(value)}")
+        return lines
+
+    def allowed(self):
+        """Is this request's client allowed to scrape /metrics?"""
+        if self.token:
+            scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+            return scheme.lower() == 'bearer' and hmac.compare_digest(credentials.strip(), self.token)
+        try:
+            address = ipaddress.ip_address(request.remote_addr or '')
+        except ValueError:
+            return False
+        return any(address in network for network in self.allow)
+
+    def export(self):
+        if not self.allowed():
+            return Response('Forbidden\n', status=403, mimetype='text/plain')
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+def _endpoint():
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['_query_started'].pop()
+    metrics.observe_statement(time.perf_counter() - started, statement)
+
+
+def _statement_failed(context):
+    # after_cursor_execute never runs for a failed statement, drop its start time
+    started = context.connection.info.get('_query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+metrics = Metrics()
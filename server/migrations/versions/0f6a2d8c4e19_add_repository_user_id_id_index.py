@@ -0,0 +1,26 @@
+"""Add repository (user_id, id) index
+
+Revision ID: 0f6a2d8c4e19
+Revises: 7d3b5f9e1c26
+Create Date: 2026-10-18 15:02:36.418950
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0f6a2d8c4e19'
+down_revision = '7d3b5f9e1c26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('repositories', schema=None) as batch_op:
+        batch_op.create_index('ix_repositories_user_id_id', ['user_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('repositories', schema=None) as batch_op:
+        batch_op.drop_index('ix_repositories_user_id_id')
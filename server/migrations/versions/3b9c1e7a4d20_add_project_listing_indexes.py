@@ -0,0 +1,34 @@
+"""Add project listing indexes
+
+Revision ID: 3b9c1e7a4d20
+Revises: 5d86f5b7baf8
+Create Date: 2026-10-18 09:12:41.337105
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9c1e7a4d20'
+down_revision = '5d86f5b7baf8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.create_index('ix_projects_status_created_at_id', ['status', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_projects_status_difficulty', ['status', 'difficulty', 'created_at'], unique=False)
+        batch_op.create_index('ix_projects_status_project_type', ['status', 'project_type', 'created_at'], unique=False)
+        batch_op.create_index('ix_projects_status_budget_min', ['status', 'budget_min'], unique=False)
+        batch_op.create_index('ix_projects_client_id', ['client_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_index('ix_projects_client_id')
+        batch_op.drop_index('ix_projects_status_budget_min')
+        batch_op.drop_index('ix_projects_status_project_type')
+        batch_op.drop_index('ix_projects_status_difficulty')
+        batch_op.drop_index('ix_projects_status_created_at_id')
@@ -0,0 +1,31 @@
+"""Add unique repository name per user
+
+Revision ID: 4a0e9d3b7f51
+Revises: c71d5e0f2a84
+Create Date: 2026-10-18 12:40:55.126873
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a0e9d3b7f51'
+down_revision = 'c71d5e0f2a84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Drop duplicates left by earlier syncs, keeping the oldest row of each pair
+    op.execute("""
+        DELETE FROM repositories
+        WHERE id NOT IN (SELECT MIN(id) FROM repositories GROUP BY user_id, name)
+    """)
+    with op.batch_alter_table('repositories', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_repositories_user_id_name', ['user_id', 'name'])
+
+
+def downgrade():
+    with op.batch_alter_table('repositories', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_repositories_user_id_name', type_='unique')
@@ -0,0 +1,40 @@
+"""Add updated_at validator indexes
+
+Revision ID: 7d3b5f9e1c26
+Revises: e2f8a1c4b6d7
+Create Date: 2026-10-18 14:18:09.772513
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3b5f9e1c26'
+down_revision = 'e2f8a1c4b6d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.create_index('ix_projects_updated_at', ['updated_at'], unique=False)
+
+    with op.batch_alter_table('project_applications', schema=None) as batch_op:
+        batch_op.create_index('ix_project_applications_updated_at', ['updated_at'], unique=False)
+        batch_op.create_index('ix_project_applications_project_id_updated_at', ['project_id', 'updated_at'], unique=False)
+
+    with op.batch_alter_table('repositories', schema=None) as batch_op:
+        batch_op.create_index('ix_repositories_user_id_updated_at', ['user_id', 'updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('repositories', schema=None) as batch_op:
+        batch_op.drop_index('ix_repositories_user_id_updated_at')
+
+    with op.batch_alter_table('project_applications', schema=None) as batch_op:
+        batch_op.drop_index('ix_project_applications_project_id_updated_at')
+        batch_op.drop_index('ix_project_applications_updated_at')
+
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_index('ix_projects_updated_at')
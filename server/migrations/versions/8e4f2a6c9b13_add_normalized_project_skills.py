@@ -0,0 +1,66 @@
+"""Add normalized project skills
+
+Revision ID: 8e4f2a6c9b13
+Revises: 3b9c1e7a4d20
+Create Date: 2026-10-18 10:02:17.518240
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4f2a6c9b13'
+down_revision = '3b9c1e7a4d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    skills = op.create_table('skills',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('slug', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('slug')
+    )
+    project_skills = op.create_table('project_skills',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('skill_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id', 'skill_id')
+    )
+    with op.batch_alter_table('project_skills', schema=None) as batch_op:
+        batch_op.create_index('ix_project_skills_skill_id_project_id', ['skill_id', 'project_id'], unique=False)
+
+    # Backfill from the comma-separated projects.skills_required column. Skills
+    # are inserted without ids and read back, so PostgreSQL's sequence stays in step
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, skills_required FROM projects")).fetchall()
+    names = {}
+    project_slugs = []
+    for project_id, skills_required in rows:
+        seen = set()
+        for name in (skills_required or '').split(','):
+            name = name.strip()
+            slug = name.lower()
+            if not name or slug in seen:
+                continue
+            seen.add(slug)
+            names.setdefault(slug, name)
+            project_slugs.append((project_id, slug))
+    if names:
+        op.bulk_insert(skills, [{'name': name, 'slug': slug} for slug, name in names.items()])
+        skill_ids = dict(bind.execute(sa.text("SELECT slug, id FROM skills")).fetchall())
+        op.bulk_insert(project_skills, [
+            {'project_id': project_id, 'skill_id': skill_ids[slug]} for project_id, slug in project_slugs
+        ])
+
+
+def downgrade():
+    with op.batch_alter_table('project_skills', schema=None) as batch_op:
+        batch_op.drop_index('ix_project_skills_skill_id_project_id')
+
+    op.drop_table('project_skills')
+    op.drop_table('skills')
@@ -0,0 +1,40 @@
+"""Add user language stats table
+
+Revision ID: a5c7e3f1d802
+Revises: 0f6a2d8c4e19
+Create Date: 2026-10-18 15:47:22.093511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5c7e3f1d802'
+down_revision = '0f6a2d8c4e19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_language_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('language', sa.String(), nullable=False),
+    sa.Column('repo_count', sa.Integer(), nullable=False),
+    sa.Column('total_stars', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'language')
+    )
+    # Backfill from the repositories already synced
+    op.execute("""
+        INSERT INTO user_language_stats (user_id, language, repo_count, total_stars, updated_at)
+        SELECT user_id, COALESCE(primary_language, 'No language'), COUNT(*), COALESCE(SUM(stars), 0), CURRENT_TIMESTAMP
+        FROM repositories
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id, COALESCE(primary_language, 'No language')
+    """)
+
+
+def downgrade():
+    op.drop_table('user_language_stats')
@@ -0,0 +1,38 @@
+"""Add active analysis job unique index
+
+Revision ID: a9c4e2f7d1b8
+Revises: f2d8a4c6b0e3
+Create Date: 2026-10-19 09:41:26.207913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c4e2f7d1b8'
+down_revision = 'f2d8a4c6b0e3'
+branch_labels = None
+depends_on = None
+
+ACTIVE = "status IN ('queued', 'running')"
+
+
+def upgrade():
+    # Settle duplicates that already slipped through: the oldest active job per username stays
+    op.execute(f"""
+        UPDATE analysis_jobs SET status = 'failed', progress = 'done', error = 'Superseded by an earlier job',
+            finished_at = CURRENT_TIMESTAMP
+        WHERE {ACTIVE} AND id NOT IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (PARTITION BY github_username ORDER BY created_at, id) AS n
+                FROM analysis_jobs WHERE {ACTIVE}
+            ) AS ranked WHERE n = 1
+        )
+    """)
+    op.create_index('uq_analysis_jobs_active_github_username', 'analysis_jobs', ['github_username'], unique=True,
+                    sqlite_where=sa.text(ACTIVE), postgresql_where=sa.text(ACTIVE))
+
+
+def downgrade():
+    op.drop_index('uq_analysis_jobs_active_github_username', table_name='analysis_jobs')
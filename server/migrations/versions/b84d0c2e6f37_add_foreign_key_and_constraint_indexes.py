@@ -0,0 +1,41 @@
+"""Add foreign key and constraint indexes
+
+Revision ID: b84d0c2e6f37
+Revises: a5c7e3f1d802
+Create Date: 2026-10-18 16:34:50.281764
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b84d0c2e6f37'
+down_revision = 'a5c7e3f1d802'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the first application when a developer applied twice
+    op.execute("""
+        DELETE FROM project_applications
+        WHERE id NOT IN (SELECT MIN(id) FROM project_applications GROUP BY project_id, developer_id)
+    """)
+    with op.batch_alter_table('project_applications', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_project_applications_project_id_developer_id', ['project_id', 'developer_id'])
+        batch_op.create_index('ix_project_applications_developer_id', ['developer_id'], unique=False)
+
+    with op.batch_alter_table('project_teams', schema=None) as batch_op:
+        batch_op.create_index('ix_project_teams_project_id', ['project_id'], unique=False)
+        batch_op.create_index('ix_project_teams_developer_id', ['developer_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('project_teams', schema=None) as batch_op:
+        batch_op.drop_index('ix_project_teams_developer_id')
+        batch_op.drop_index('ix_project_teams_project_id')
+
+    with op.batch_alter_table('project_applications', schema=None) as batch_op:
+        batch_op.drop_index('ix_project_applications_developer_id')
+        batch_op.drop_constraint('uq_project_applications_project_id_developer_id', type_='unique')
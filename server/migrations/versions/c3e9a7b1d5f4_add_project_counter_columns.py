@@ -0,0 +1,41 @@
+"""Add project counter columns
+
+Revision ID: c3e9a7b1d5f4
+Revises: b84d0c2e6f37
+Create Date: 2026-10-18 17:12:08.518306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e9a7b1d5f4'
+down_revision = 'b84d0c2e6f37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ADD COLUMN, not a batch table rebuild, so the FTS triggers on projects survive
+    op.add_column('projects', sa.Column('applications_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('projects', sa.Column('pending_applications_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('projects', sa.Column('team_member_count', sa.Integer(), server_default='0', nullable=False))
+    # Backfill from the rows already there
+    op.execute("""
+        UPDATE projects SET
+            applications_count = (SELECT COUNT(*) FROM project_applications WHERE project_id = projects.id),
+            pending_applications_count = (
+                SELECT COUNT(*) FROM project_applications WHERE project_id = projects.id AND status = 'pending'
+            ),
+            team_member_count = (SELECT COUNT(*) FROM project_teams WHERE project_id = projects.id)
+    """)
+    op.create_index('ix_projects_status_applications_count_id', 'projects', ['status', 'applications_count', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_projects_status_applications_count_id', table_name='projects')
+    # Plain DROP COLUMN (SQLite 3.35+) for the same reason: a batch rebuild would drop the FTS triggers
+    op.drop_column('projects', 'team_member_count')
+    op.drop_column('projects', 'pending_applications_count')
+    op.drop_column('projects', 'applications_count')
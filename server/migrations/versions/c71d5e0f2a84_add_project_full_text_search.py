@@ -0,0 +1,62 @@
+"""Add project full-text search
+
+Revision ID: c71d5e0f2a84
+Revises: 8e4f2a6c9b13
+Create Date: 2026-10-18 11:25:03.904112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c71d5e0f2a84'
+down_revision = '8e4f2a6c9b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 is SQLite only
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("""
+        CREATE VIRTUAL TABLE projects_fts USING fts5(
+            title, description,
+            content='projects', content_rowid='id',
+            tokenize='porter unicode61'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER projects_fts_ai AFTER INSERT ON projects BEGIN
+            INSERT INTO projects_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER projects_fts_ad AFTER DELETE ON projects BEGIN
+            INSERT INTO projects_fts(projects_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER projects_fts_au AFTER UPDATE OF title, description ON projects BEGIN
+            INSERT INTO projects_fts(projects_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO projects_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """)
+    # Index the rows that already exist
+    op.execute("INSERT INTO projects_fts(projects_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS projects_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS projects_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS projects_fts_ai")
+    op.execute("DROP TABLE IF EXISTS projects_fts")
@@ -0,0 +1,34 @@
+"""Add repository portfolio scores
+
+Revision ID: d6a2f8c0e4b9
+Revises: c3e9a7b1d5f4
+Create Date: 2026-10-18 19:03:41.227905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6a2f8c0e4b9'
+down_revision = 'c3e9a7b1d5f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('repositories', sa.Column('has_pages', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column('repositories', sa.Column('homepage', sa.String(), nullable=True))
+    op.add_column('repositories', sa.Column('portfolio_score', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('repositories', sa.Column('portfolio_reasons', sa.String(length=200), server_default='', nullable=False))
+    op.create_index('ix_repositories_user_id_portfolio_score', 'repositories', ['user_id', 'portfolio_score', 'id'], unique=False)
+    # Existing rows are scored by `flask rescore-portfolios`, the weights live in portfolio.py
+
+
+def downgrade():
+    op.drop_index('ix_repositories_user_id_portfolio_score', table_name='repositories')
+    with op.batch_alter_table('repositories', schema=None) as batch_op:
+        batch_op.drop_column('portfolio_reasons')
+        batch_op.drop_column('portfolio_score')
+        batch_op.drop_column('homepage')
+        batch_op.drop_column('has_pages')
@@ -0,0 +1,45 @@
+"""Add analysis jobs table
+
+Revision ID: e2f8a1c4b6d7
+Revises: 4a0e9d3b7f51
+Create Date: 2026-10-18 13:31:48.660291
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f8a1c4b6d7'
+down_revision = '4a0e9d3b7f51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('analysis_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('github_username', sa.String(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('progress', sa.String(length=100), nullable=True),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('analysis_jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_analysis_jobs_github_username_status', ['github_username', 'status'], unique=False)
+        batch_op.create_index('ix_analysis_jobs_status_created_at', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('analysis_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_analysis_jobs_status_created_at')
+        batch_op.drop_index('ix_analysis_jobs_github_username_status')
+
+    op.drop_table('analysis_jobs')
@@ -0,0 +1,39 @@
+"""Add incremental repository sync
+
+Revision ID: e7b3c9d1f5a2
+Revises: d6a2f8c0e4b9
+Create Date: 2026-10-18 21:14:52.604318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3c9d1f5a2'
+down_revision = 'd6a2f8c0e4b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('repositories', sa.Column('github_id', sa.BigInteger(), nullable=True))
+    op.add_column('repositories', sa.Column('pushed_at', sa.DateTime(), nullable=True))
+    op.add_column('repositories', sa.Column('fork', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.create_index('ix_repositories_user_id_github_id', 'repositories', ['user_id', 'github_id'], unique=False)
+    op.add_column('users', sa.Column('repos_synced_at', sa.DateTime(), nullable=True))
+    op.add_column('users', sa.Column('repos_synced_login', sa.String(), nullable=True))
+    op.add_column('users', sa.Column('repos_watermark', sa.DateTime(), nullable=True))
+    # Existing rows get their GitHub id on the next sync, which is a full one (no watermark yet)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('repos_watermark')
+        batch_op.drop_column('repos_synced_login')
+        batch_op.drop_column('repos_synced_at')
+    op.drop_index('ix_repositories_user_id_github_id', table_name='repositories')
+    with op.batch_alter_table('repositories', schema=None) as batch_op:
+        batch_op.drop_column('fork')
+        batch_op.drop_column('pushed_at')
+        batch_op.drop_column('github_id')
@@ -0,0 +1,24 @@
+"""Add repository refresh queue index
+
+Revision ID: f2d8a4c6b0e3
+Revises: e7b3c9d1f5a2
+Create Date: 2026-10-18 23:02:17.385140
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2d8a4c6b0e3'
+down_revision = 'e7b3c9d1f5a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_github_username_repos_synced_at', 'users', ['github_username', 'repos_synced_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_github_username_repos_synced_at', table_name='users')
@@ -1,18 +1,17 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from flask_bcrypt import Bcrypt
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, event
 from sqlalchemy.orm import validates, relationship
 from sqlalchemy_serializer import SerializerMixin
 from sqlalchemy.ext.associationproxy import association_proxy
 from datetime import datetime
+from passwords import password_hasher
 import re
 
 
 db = SQLAlchemy()
 migrate = Migrate()
-bcrypt = Bcrypt()
 
 convention = {
     "ix": "ix_%(column_0_label)s",
@@ -23,8 +22,29 @@ convention = {
 }
 metadata = MetaData(naming_convention=convention)
 
+
+def track_old_values(*attributes):
+    """
+    Load these attributes' old values before a set on an expired instance,
+    otherwise an after_update listener has no way to tell what they changed from
+    """
+    for attribute in attributes:
+        event.listen(attribute, 'set', _keep_old_value, active_history=True)
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    pass
+
+
 class Repository(db.Model, SerializerMixin):
     __tablename__="repositories"
+    __table_args__=(
+        db.UniqueConstraint("user_id", "name", name="uq_repositories_user_id_name"),
+        db.Index("ix_repositories_user_id_updated_at", "user_id", "updated_at"),
+        db.Index("ix_repositories_user_id_id", "user_id", "id"),
+        db.Index("ix_repositories_user_id_portfolio_score", "user_id", "portfolio_score", "id"),
+        db.Index("ix_repositories_user_id_github_id", "user_id", "github_id"),
+    )
     serialize_rules=('-user.repositories',)
     id=db.Column(db.Integer, primary_key=True)
     name=db.Column(db.String, nullable=False)
@@ -32,6 +52,15 @@ class Repository(db.Model, SerializerMixin):
     primary_language=db.Column(db.String, nullable=True)
     stars=db.Column(db.Integer, default=0)
     project_type=db.Column(db.String, nullable=False)
+    has_pages=db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    homepage=db.Column(db.String)
+    # GitHub's own id (survives renames), last push and fork flag; NULL on rows never synced
+    github_id=db.Column(db.BigInteger)
+    pushed_at=db.Column(db.DateTime)
+    fork=db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    # Set from portfolio.score_repository whenever the row is written
+    portfolio_score=db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    portfolio_reasons=db.Column(db.String(200), nullable=False, default="", server_default="")  # "name,live"
     updated_at=db.Column(db.DateTime, default=datetime.utcnow)
     user_id=db.Column(db.Integer, db.ForeignKey("users.id"))
     user=db.relationship("User", back_populates="repositories")
@@ -48,8 +77,23 @@ class Repository(db.Model, SerializerMixin):
     def __repr__(self):
          return f"<Repository {self.id} {self.name}>"
     
+class UserLanguageStat(db.Model, SerializerMixin):
+    __tablename__="user_language_stats"
+    user_id=db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    language=db.Column(db.String, primary_key=True)  # "No language" for repositories without one
+    repo_count=db.Column(db.Integer, nullable=False, default=0)
+    total_stars=db.Column(db.Integer, nullable=False, default=0)
+    updated_at=db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+         return f"<UserLanguageStat {self.user_id} {self.language} {self.repo_count}>"
+
 class User(db.Model, SerializerMixin):
      __tablename__="users"
+     __table_args__=(
+          # The refresh queue and its coverage/lag report read only these two columns
+          db.Index("ix_users_github_username_repos_synced_at", "github_username", "repos_synced_at"),
+     )
      serialize_rules=('-repositories.user', '-password_hash', '-posted_projects.client',
         '-project_applications.developer',
         '-team_memberships.developer')
@@ -61,6 +105,11 @@ class User(db.Model, SerializerMixin):
      password_hash=db.Column(db.Text, nullable=False)
      created_at=db.Column(db.DateTime, default=datetime.utcnow)
      updated_at=db.Column(db.DateTime, default=datetime.utcnow)
+     # Repository sync state: when and for which GitHub login it last ran, and the
+     # newest GitHub updated_at it has seen (where the next incremental sync stops)
+     repos_synced_at=db.Column(db.DateTime)
+     repos_synced_login=db.Column(db.String)
+     repos_watermark=db.Column(db.DateTime)
      repositories=db.relationship("Repository", back_populates="user")
 
      posted_projects = db.relationship("Project", back_populates="client", cascade="all, delete-orphan")
@@ -73,11 +122,11 @@ class User(db.Model, SerializerMixin):
      
      @password.setter
      def password(self, password):
-          hashed_password=bcrypt.generate_password_hash(password.encode("utf-8"))
-          self.password_hash=hashed_password.decode("utf-8")
+          # Hashed on the password worker pool, may raise passwords.HashingBusy
+          self.password_hash=password_hasher.hash(password)
 
      def authenticate(self, password):
-          return bcrypt.check_password_hash(self.password_hash, password.encode("utf-8"))
+          return password_hasher.verify(password, self.password_hash)
      
 
      @validates("email")
@@ -94,6 +143,17 @@ class User(db.Model, SerializerMixin):
 
 class Project(db.Model, SerializerMixin):
     __tablename__ = "projects"
+    __table_args__ = (
+        # Keyset pagination of the open listing and its filters
+        db.Index("ix_projects_status_created_at_id", "status", "created_at", "id"),
+        db.Index("ix_projects_status_difficulty", "status", "difficulty", "created_at"),
+        db.Index("ix_projects_status_project_type", "status", "project_type", "created_at"),
+        db.Index("ix_projects_status_budget_min", "status", "budget_min"),
+        db.Index("ix_projects_client_id", "client_id", "created_at"),
+        db.Index("ix_projects_status_applications_count_id", "status", "applications_count", "id"),
+        # Conditional GET validators
+        db.Index("ix_projects_updated_at", "updated_at"),
+    )
     
     serialize_rules = ('-client.projects', '-applications.project', '-team_members.project')
     
@@ -116,12 +176,17 @@ class Project(db.Model, SerializerMixin):
     team_size_min = db.Column(db.Integer, default=1)
     team_size_max = db.Column(db.Integer, default=1)
     
-    # Skills required (comma-separated or JSON)
+    # Skills required (comma-separated copy of the normalized skills below)
     skills_required = db.Column(db.String(500), default="")  # "React,Python,JavaScript"
     
     # Status
     status = db.Column(db.String(50), default="open")  # "open", "in_progress", "completed", "cancelled"
     
+    # Denormalized counts, kept current by project_counters.py on every write
+    applications_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    pending_applications_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    team_member_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    
     # Client who posted the project
     client_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     
@@ -133,6 +198,21 @@ class Project(db.Model, SerializerMixin):
     client = db.relationship("User", back_populates="posted_projects")
     applications = db.relationship("ProjectApplication", back_populates="project", cascade="all, delete-orphan")
     team_members = db.relationship("ProjectTeam", back_populates="project", cascade="all, delete-orphan")
+    skills = db.relationship("Skill", secondary="project_skills", order_by="Skill.name", back_populates="projects")
+    
+    def set_skills(self, names):
+        """Replace the project's skills, reusing existing Skill rows (1 lookup query)"""
+        by_slug = {}
+        for name in names:
+            name = name.strip()
+            if name and Skill.slugify(name) not in by_slug:
+                by_slug[Skill.slugify(name)] = name
+        
+        existing = {}
+        if by_slug:
+            existing = {skill.slug: skill for skill in Skill.query.filter(Skill.slug.in_(by_slug)).all()}
+        self.skills = [existing.get(slug) or Skill(name=name, slug=slug) for slug, name in by_slug.items()]
+        self.skills_required = ','.join(by_slug.values())
     
     @validates('project_type')
     def validate_project_type(self, key, value):
@@ -168,8 +248,49 @@ class Project(db.Model, SerializerMixin):
         return f"<Project {self.id}: {self.title}>"
 
 
+class Skill(db.Model, SerializerMixin):
+    __tablename__ = "skills"
+    
+    serialize_rules = ('-projects',)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    slug = db.Column(db.String(100), unique=True, nullable=False)  # lowercased name
+    
+    projects = db.relationship("Project", secondary="project_skills", back_populates="skills")
+    
+    @staticmethod
+    def slugify(name):
+        return name.strip().lower()
+    
+    def __repr__(self):
+        return f"<Skill {self.id}: {self.name}>"
+
+
+class ProjectSkill(db.Model):
+    __tablename__ = "project_skills"
+    __table_args__ = (
+        # skill -> projects lookups for the /projects?skills= filter
+        db.Index("ix_project_skills_skill_id_project_id", "skill_id", "project_id"),
+    )
+    
+    project_id = db.Column(db.Integer, db.ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True)
+    
+    def __repr__(self):
+        return f"<ProjectSkill {self.skill_id} on {self.project_id}>"
+
+
 class ProjectApplication(db.Model, SerializerMixin):
     __tablename__ = "project_applications"
+    __table_args__ = (
+        # Conditional GET validators, overall and per project
+        db.Index("ix_project_applications_updated_at", "updated_at"),
+        db.Index("ix_project_applications_project_id_updated_at", "project_id", "updated_at"),
+        # One application per developer per project, doubles as the duplicate check
+        db.UniqueConstraint("project_id", "developer_id", name="uq_project_applications_project_id_developer_id"),
+        db.Index("ix_project_applications_developer_id", "developer_id"),
+    )
     
     serialize_rules = ('-project.applications', '-developer.applications')
     
@@ -204,6 +325,10 @@ class ProjectApplication(db.Model, SerializerMixin):
 
 class ProjectTeam(db.Model, SerializerMixin):
     __tablename__ = "project_teams"
+    __table_args__ = (
+        db.Index("ix_project_teams_project_id", "project_id"),
+        db.Index("ix_project_teams_developer_id", "developer_id"),
+    )
     
     serialize_rules = ('-project.team_members', '-developer.team_memberships')
     
@@ -220,4 +345,46 @@ class ProjectTeam(db.Model, SerializerMixin):
     developer = db.relationship("User", back_populates="team_memberships")
     
     def __repr__(self):
-        return f"<ProjectTeam {self.id}: {self.developer_id} on {self.project_id}>"
\ No newline at end of file
+        return f"<ProjectTeam {self.id}: {self.developer_id} on {self.project_id}>"
+
+
+class AnalysisJob(db.Model, SerializerMixin):
+    __tablename__ = "analysis_jobs"
+    __table_args__ = (
+        # Active job lookup for de-duplication and restart recovery
+        db.Index("ix_analysis_jobs_github_username_status", "github_username", "status"),
+        db.Index("ix_analysis_jobs_status_created_at", "status", "created_at"),
+        # At most one active job per username, whichever process submits it
+        db.Index("uq_analysis_jobs_active_github_username", "github_username", unique=True,
+                 sqlite_where=db.text("status IN ('queued', 'running')"),
+                 postgresql_where=db.text("status IN ('queued', 'running')")),
+    )
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    github_username = db.Column(db.String, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued")  # "queued", "running", "succeeded", "failed"
+    progress = db.Column(db.String(100))
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    
+    # Dates
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @validates('status')
+    def validate_status(self, key, value):
+        valid_statuses = ["queued", "running", "succeeded", "failed"]
+        if value not in valid_statuses:
+            raise ValueError(f"Status must be one of: {', '.join(valid_statuses)}")
+        return value
+    
+    @property
+    def finished(self):
+        return self.status in ("succeeded", "failed")
+    
+    def __repr__(self):
+        return f"<AnalysisJob {self.id} {self.github_username} {self.status}>"
@@ -0,0 +1,143 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+
+# Password hashing off the request threads.
+# bcrypt is deliberately CPU heavy, so hashes and checks run on a small process
+# pool instead of pinning request workers (and the GIL) for the whole
+# computation. In-flight work is capped: once PASSWORD_HASH_QUEUE calls are
+# waiting, new ones fail fast with HashingBusy so the API can answer 503 with
+# Retry-After instead of letting a login burst queue up without bound. A call
+# that outlives PASSWORD_HASH_TIMEOUT, or finds the pool broken (a worker was
+# killed), is HashingBusy too; a broken pool is replaced on the next call.
+# PASSWORD_HASH_WORKERS=0 hashes inline. Workers are spawned, so a script that
+# hashes through the pool needs the usual `if __name__ == '__main__':` guard;
+# PASSWORD_HASH_EXECUTOR=thread uses threads instead (bcrypt releases the GIL).
+
+def _truncate(password):
+    # bcrypt only ever looked at the first 72 bytes; keep that for existing hashes
+    return password.encode('utf-8')[:72]
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(password, password_hash):
+    return bcrypt.checkpw(password, password_hash)
+
+
+class HashingBusy(Exception):
+    def __init__(self, retry_after=1):
+        super().__init__("Too many sign in attempts right now, please try again")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    def __init__(self, rounds=12, workers=0, max_pending=None, timeout=30, retry_after=1, executor='process'):
+        self.rounds = rounds
+        self.workers = workers
+        self.executor_type = executor
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', self.rounds)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1))
+        self.max_pending = app.config.get('PASSWORD_HASH_QUEUE', self.workers * 8)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self.retry_after = app.config.get('PASSWORD_HASH_RETRY_AFTER', self.retry_after)
+        self.executor_type = app.config.get('PASSWORD_HASH_EXECUTOR', os.environ.get('PASSWORD_HASH_EXECUTOR', self.executor_type))
+        self.shutdown()
+        app.extensions['password_hasher'] = self
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.executor_type == 'thread':
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+                else:
+                    # spawn, so workers never inherit request threads or DB connections
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                    )
+                if self._slots is None:
+                    self._slots = threading.BoundedSemaphore(self.max_pending or self.workers)
+            return self._executor
+
+    def after_fork(self):
+        # A pool started by the parent belongs to the parent, start a fresh one on demand
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            result = fn(*args)
+            self.completed += 1
+            return result
+
+        executor = self.executor
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingBusy(self.retry_after)
+        try:
+            result = executor.submit(fn, *args).result(timeout=self.timeout)
+        except BrokenProcessPool:
+            # A worker died (OOM kill, crash): the pool never recovers, start another
+            self._discard(executor)
+            self.failed += 1
+            raise HashingBusy(self.retry_after) from None
+        except FutureTimeout:
+            self.failed += 1
+            raise HashingBusy(self.retry_after) from None
+        finally:
+            slots.release()
+        self.completed += 1
+        return result
+
+    def _discard(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                executor.shutdown(wait=False)
+                self._executor = None
+
+    def hash(self, password):
+        """A bcrypt hash at the configured cost. Raises HashingBusy when saturated"""
+        return self._run(_hash, _truncate(password), self.rounds)
+
+    def verify(self, password, password_hash):
+        return self._run(_check, _truncate(password), password_hash.encode('utf-8'))
+
+    def needs_rehash(self, password_hash):
+        """True when a stored hash was made with a different cost than configured"""
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def stats(self):
+        return {'completed': self.completed, 'rejected': self.rejected, 'failed': self.failed, 'rounds': self.rounds}
+
+
+password_hasher = PasswordHasher()
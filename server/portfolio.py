@@ -0,0 +1,196 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, event, func, select, update
+from sqlalchemy.orm import attributes
+
+from models import db, Repository, User
+
+
+# Portfolio candidate scoring.
+# Each repository is scored once, when it is written, for how likely it is to
+# be its owner's portfolio (name and description keywords, a repository named
+# after the owner, a description, a live deployment). The score and the
+# reasons behind it are stored on the row and (user_id, portfolio_score, id)
+# is indexed, so a user's best candidates are the first few entries of an
+# index range. The sync path in repo_sync scores rows itself; ORM writes are
+# scored by the mapper events below. The username a repository name is matched
+# against is owner_login(): the login the repositories were synced from, the
+# profile's github_username before the first sync. After changing WEIGHTS run
+# `flask rescore-portfolios` to re-score the rows already stored.
+
+WEIGHTS = {
+    'name': 200,
+    'description': 150,
+    'username': 100,
+    'keywords': 50,
+    'has_description': 40,
+    'live': 30,
+}
+REASONS = {
+    'name': 'Name contains "portfolio"',
+    'description': 'Description mentions "portfolio"',
+    'username': 'Repository name matches username',
+    'keywords': 'Contains portfolio keywords',
+    'has_description': 'Has description',
+    'live': 'Has live deployment',
+}
+KEYWORDS = ('personal', 'website', 'cv', 'resume', 'showcase')
+# The best candidate has to score at least this to count as a portfolio
+MIN_PORTFOLIO_SCORE = 50
+SCORED_FIELDS = ('name', 'description', 'has_pages', 'homepage')
+
+
+def score_repository(name, description, has_pages=False, homepage=None, username=None):
+    """(score, reasons) where reasons is a comma separated string of WEIGHTS keys"""
+    name = (name or '').lower()
+    text = (description or '').lower()
+    combined = f"{name} {text}"
+    reasons = []
+    if 'portfolio' in name:
+        reasons.append('name')
+    if 'portfolio' in text:
+        reasons.append('description')
+    if username and name == username.lower():
+        reasons.append('username')
+    if any(keyword in combined for keyword in KEYWORDS):
+        reasons.append('keywords')
+    if description:
+        reasons.append('has_description')
+    if has_pages or homepage:
+        reasons.append('live')
+    return sum(WEIGHTS[reason] for reason in reasons), ','.join(reasons)
+
+
+def owner_login():
+    """SQL expression for the login a user's repositories are scored against (sync and rescore alike)"""
+    users = User.__table__
+    return func.coalesce(users.c.repos_synced_login, users.c.github_username)
+
+
+def reason_texts(reasons):
+    return [REASONS.get(reason, reason) for reason in reasons.split(',')] if reasons else []
+
+
+def portfolio_candidates(user_id, limit=5, session=None):
+    """A user's best scoring repositories, best first (one range of ix_repositories_user_id_portfolio_score)"""
+    session = session or db.session
+    return session.execute(
+        select(Repository)
+        .where(Repository.user_id == user_id, Repository.portfolio_score > 0)
+        .order_by(Repository.portfolio_score.desc(), Repository.id.desc())
+        .limit(limit)
+    ).scalars().all()
+
+
+def rescore_repositories(connection, user_ids=None, chunk_size=1000):
+    """
+    Re-score the stored repositories of some users (or everyone, chunk_size
+    users at a time) and write back the rows whose score changed.
+    Returns (repositories scored, repositories changed).
+    """
+    users = User.__table__
+    repositories = Repository.__table__
+    stmt = (
+        update(repositories)
+        .where(repositories.c.id == bindparam('repository_id'))
+        .values(portfolio_score=bindparam('score'), portfolio_reasons=bindparam('reasons'))
+    )
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        chunks = [user_ids[start:start + chunk_size] for start in range(0, len(user_ids), chunk_size)]
+    else:
+        chunks = _user_id_chunks(connection, chunk_size)
+
+    scored = changed = 0
+    for chunk in chunks:
+        rows = connection.execute(
+            select(
+                repositories.c.id, repositories.c.name, repositories.c.description, repositories.c.has_pages,
+                repositories.c.homepage, repositories.c.portfolio_score, repositories.c.portfolio_reasons,
+                owner_login().label('login')
+            )
+            .join(users, users.c.id == repositories.c.user_id)
+            .where(repositories.c.user_id.in_(chunk))
+        ).all()
+        updates = []
+        for row in rows:
+            score, reasons = score_repository(row.name, row.description, row.has_pages, row.homepage,
+                                              row.login)
+            if (score, reasons) != (row.portfolio_score, row.portfolio_reasons):
+                updates.append({'repository_id': row.id, 'score': score, 'reasons': reasons})
+        if updates:
+            connection.execute(stmt, updates)
+        scored += len(rows)
+        changed += len(updates)
+    return scored, changed
+
+
+def _user_id_chunks(connection, chunk_size):
+    """Every user id, chunk_size at a time, walking the primary key"""
+    users = User.__table__
+    after = 0
+    while True:
+        chunk = connection.execute(
+            select(users.c.id).where(users.c.id > after).order_by(users.c.id).limit(chunk_size)
+        ).scalars().all()
+        if not chunk:
+            return
+        yield chunk
+        after = chunk[-1]
+
+
+def init_app(app):
+    app.cli.add_command(rescore_portfolios)
+
+
+@click.command('rescore-portfolios')
+@click.option('--user-id', 'user_ids', type=int, multiple=True, help='Only these users (repeatable)')
+@click.option('--chunk-size', type=int, default=1000, show_default=True, help='Users re-scored per transaction')
+@with_appcontext
+def rescore_portfolios(user_ids, chunk_size):
+    """Re-score every stored repository as a portfolio candidate (after changing the weights)"""
+    scored = changed = 0
+    chunks = [list(user_ids)] if user_ids else None
+    with db.engine.connect() as connection:
+        chunks = chunks or list(_user_id_chunks(connection, chunk_size))
+    for chunk in chunks:
+        # One transaction per chunk keeps write locks short on a large table
+        with db.engine.begin() as connection:
+            chunk_scored, chunk_changed = rescore_repositories(connection, chunk, chunk_size)
+        scored += chunk_scored
+        changed += chunk_changed
+    click.echo(f"Re-scored {scored} repositories, {changed} changed")
+
+
+# ORM write paths
+
+def _owner_username(connection, user_id):
+    if user_id is None:
+        return None
+    return connection.execute(select(owner_login()).where(User.__table__.c.id == user_id)).scalar()
+
+
+@event.listens_for(Repository, 'before_insert')
+def _score_new_repository(mapper, connection, target):
+    target.portfolio_score, target.portfolio_reasons = score_repository(
+        target.name, target.description, target.has_pages, target.homepage,
+        _owner_username(connection, target.user_id)
+    )
+
+
+@event.listens_for(Repository, 'before_update')
+def _rescore_repository(mapper, connection, target):
+    state = attributes.instance_state(target)
+    if not any(state.attrs[name].history.has_changes() for name in SCORED_FIELDS + ('user_id',)):
+        return
+    target.portfolio_score, target.portfolio_reasons = score_repository(
+        target.name, target.description, target.has_pages, target.homepage,
+        _owner_username(connection, target.user_id)
+    )
+
+
+@event.listens_for(User, 'after_update')
+def _rescore_renamed_user(mapper, connection, target):
+    # The username match depends on the owner's login
+    if any(attributes.get_history(target, name).has_changes() for name in ('github_username', 'repos_synced_login')):
+        rescore_repositories(connection, [target.id])
@@ -0,0 +1,146 @@
+from collections import defaultdict
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session, attributes, object_session
+
+from cache import response_cache
+from models import db, Project, ProjectApplication, ProjectTeam, track_old_values
+
+
+# Denormalized counts on projects.
+# applications_count, pending_applications_count and team_member_count are
+# bumped with relative UPDATEs (count = count + delta) inside the same flush
+# that writes the application or team row, so they commit or roll back with it
+# and concurrent writers never overwrite each other's increments. Listings read
+# and sort by the columns and never touch project_applications. Writes that
+# bypass the ORM (bulk loads, manual SQL) can be fixed with
+# `flask repair-counters`, which recomputes them from the source tables.
+# Counter writes leave updated_at alone, so the session remembers which
+# projects it counted for and bumps their response cache scopes on commit.
+
+def apply_counter_deltas(connection, deltas):
+    """deltas: {project_id: {counter: delta}}, one UPDATE per project that changed"""
+    table = Project.__table__
+    for project_id, changes in deltas.items():
+        values = {name: table.c[name] + delta for name, delta in changes.items() if delta}
+        if not values or project_id is None:
+            continue
+        # Counter changes aren't edits, keep updated_at's onupdate from firing
+        values['updated_at'] = table.c.updated_at
+        connection.execute(update(table).where(table.c.id == project_id).values(**values))
+
+
+def _application_deltas(project_id, status, sign):
+    changes = {'applications_count': sign}
+    if status == 'pending':
+        changes['pending_applications_count'] = sign
+    return {project_id: changes}
+
+
+def rebuild_project_counters(connection, project_ids=None):
+    """Recompute the counters (for every project, or some) with one UPDATE of correlated counts"""
+    applications = ProjectApplication.__table__
+    teams = ProjectTeam.__table__
+    table = Project.__table__
+
+    def count(source, *criteria):
+        return (
+            select(func.count()).select_from(source)
+            .where(source.c.project_id == table.c.id, *criteria)
+            .scalar_subquery()
+        )
+
+    stmt = update(table).values(
+        applications_count=count(applications),
+        pending_applications_count=count(applications, applications.c.status == 'pending'),
+        team_member_count=count(teams),
+        updated_at=table.c.updated_at,
+    )
+    if project_ids is not None:
+        stmt = stmt.where(table.c.id.in_(project_ids))
+    return connection.execute(stmt).rowcount
+
+
+def init_app(app):
+    app.cli.add_command(repair_counters)
+
+
+@click.command('repair-counters')
+@click.option('--project-id', 'project_ids', type=int, multiple=True, help='Only these projects (repeatable)')
+@with_appcontext
+def repair_counters(project_ids):
+    """Recompute the denormalized project application and team counts"""
+    with db.engine.begin() as connection:
+        repaired = rebuild_project_counters(connection, list(project_ids) or None)
+    click.echo(f"Recomputed counters for {repaired} projects")
+
+
+# ORM write paths
+
+def _count(connection, target, deltas):
+    apply_counter_deltas(connection, deltas)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('counted_projects', set()).update(key for key in deltas if key is not None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_counted_projects(session):
+    project_ids = session.info.pop('counted_projects', None)
+    if project_ids:
+        response_cache.bump('projects', *[f"project:{project_id}" for project_id in sorted(project_ids)])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_counted_projects(session):
+    session.info.pop('counted_projects', None)
+
+
+@event.listens_for(ProjectApplication, 'after_insert')
+def _application_inserted(mapper, connection, target):
+    _count(connection, target, _application_deltas(target.project_id, target.status, 1))
+
+
+@event.listens_for(ProjectApplication, 'after_delete')
+def _application_deleted(mapper, connection, target):
+    _count(connection, target, _application_deltas(target.project_id, target.status, -1))
+
+
+track_old_values(ProjectApplication.project_id, ProjectApplication.status, ProjectTeam.project_id)
+
+
+@event.listens_for(ProjectApplication, 'after_update')
+def _application_updated(mapper, connection, target):
+    old = {}
+    for name in ('project_id', 'status'):
+        history = attributes.get_history(target, name)
+        old[name] = history.deleted[0] if history.deleted else getattr(target, name)
+    if old['project_id'] == target.project_id and old['status'] == target.status:
+        return
+    deltas = defaultdict(lambda: defaultdict(int))
+    for sign, project_id, status in ((-1, old['project_id'], old['status']), (1, target.project_id, target.status)):
+        for counter, delta in _application_deltas(project_id, status, sign)[project_id].items():
+            deltas[project_id][counter] += delta
+    _count(connection, target, deltas)
+
+
+@event.listens_for(ProjectTeam, 'after_insert')
+def _team_member_added(mapper, connection, target):
+    _count(connection, target, {target.project_id: {'team_member_count': 1}})
+
+
+@event.listens_for(ProjectTeam, 'after_delete')
+def _team_member_removed(mapper, connection, target):
+    _count(connection, target, {target.project_id: {'team_member_count': -1}})
+
+
+@event.listens_for(ProjectTeam, 'after_update')
+def _team_member_moved(mapper, connection, target):
+    history = attributes.get_history(target, 'project_id')
+    if history.deleted and history.deleted[0] != target.project_id:
+        _count(connection, target, {
+            history.deleted[0]: {'team_member_count': -1},
+            target.project_id: {'team_member_count': 1},
+        })
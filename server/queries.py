@@ -0,0 +1,149 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import db, Project, ProjectApplication, ProjectSkill, Repository, Skill
+
+
+# Shared query layer for the project endpoints.
+# Every helper here runs a fixed number of statements no matter how many
+# rows come back, so the resources never fall into N+1 lazy loads.
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Listing orders, each the (key column, id) pair its keyset cursor holds.
+# "popular" reads the denormalized counter, so a page is an index range scan
+# on projects(status, applications_count, id). Counts move while someone
+# pages, so a project can shift between pages of a popular listing.
+SORTS = {
+    'newest': (Project.created_at, Project.id),
+    'popular': (Project.applications_count, Project.id),
+}
+
+
+def encode_cursor(project, sort='newest'):
+    """Opaque keyset cursor for the sort key and id of the last row on a page"""
+    key = getattr(project, SORTS[sort][0].key)
+    raw = json.dumps([key.isoformat() if sort == 'newest' else key, project.id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, sort='newest'):
+    """Reverse of encode_cursor, raises ValueError on anything malformed"""
+    try:
+        key, project_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return (datetime.fromisoformat(key) if sort == 'newest' else int(key)), int(project_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def projects_with_skills(slugs, match='all'):
+    """
+    Ids of projects tagged with the given skill slugs, resolved on the
+    project_skills(skill_id, project_id) index. 'any' is a union of the
+    per-skill posting lists, 'all' keeps projects present in every list.
+    """
+    stmt = (
+        select(ProjectSkill.project_id)
+        .join(Skill, Skill.id == ProjectSkill.skill_id)
+        .where(Skill.slug.in_(slugs))
+        .group_by(ProjectSkill.project_id)
+    )
+    if match == 'all':
+        stmt = stmt.having(func.count(ProjectSkill.skill_id) == len(set(slugs)))
+    return stmt
+
+
+def open_projects_page(filters=None, cursor=None, limit=DEFAULT_PAGE_SIZE, session=None, sort='newest'):
+    """
+    One page of open projects with their clients, newest (or most applied to)
+    first. Uses keyset pagination on (created_at, id), or (applications_count,
+    id), so every page is an index range scan however deep the client pages.
+    Returns (projects, next_cursor).
+    """
+    session = session or db.session
+    filters = filters or {}
+    if sort not in SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(SORTS)}")
+    stmt = (
+        select(Project)
+        .options(joinedload(Project.client), selectinload(Project.skills))
+        .where(Project.status == 'open')
+    )
+
+    if filters.get('difficulty'):
+        stmt = stmt.where(Project.difficulty == filters['difficulty'])
+    if filters.get('project_type'):
+        stmt = stmt.where(Project.project_type == filters['project_type'])
+    if filters.get('min_budget') is not None:
+        stmt = stmt.where(Project.budget_min >= filters['min_budget'])
+    if filters.get('max_budget') is not None:
+        stmt = stmt.where(Project.budget_max <= filters['max_budget'])
+    if filters.get('client_id') is not None:
+        stmt = stmt.where(Project.client_id == filters['client_id'])
+    if filters.get('min_applications') is not None:
+        stmt = stmt.where(Project.applications_count >= filters['min_applications'])
+    if filters.get('max_applications') is not None:
+        stmt = stmt.where(Project.applications_count <= filters['max_applications'])
+    if filters.get('skills'):
+        slugs = [Skill.slugify(name) for name in filters['skills']]
+        stmt = stmt.where(Project.id.in_(projects_with_skills(slugs, filters.get('skills_match', 'all'))))
+
+    key, tiebreak = SORTS[sort]
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, sort)
+        stmt = stmt.where(tuple_(key, tiebreak) < (last_key, last_id))
+
+    # Fetch one extra row to know whether there is a next page
+    stmt = stmt.order_by(key.desc(), tiebreak.desc()).limit(limit + 1)
+    projects = session.execute(stmt).unique().scalars().all()
+
+    next_cursor = None
+    if len(projects) > limit:
+        projects = projects[:limit]
+        next_cursor = encode_cursor(projects[-1], sort)
+    return projects, next_cursor
+
+
+def project_with_applications(project_id, session=None):
+    """A project with its client, applications and their developers (3 statements)"""
+    session = session or db.session
+    stmt = (
+        select(Project)
+        .options(
+            joinedload(Project.client),
+            selectinload(Project.skills),
+            selectinload(Project.applications).joinedload(ProjectApplication.developer)
+        )
+        .where(Project.id == project_id)
+    )
+    return session.execute(stmt).unique().scalar_one_or_none()
+
+
+def repositories_page(user_id, after_id=None, limit=DEFAULT_PAGE_SIZE, session=None):
+    """A user's repositories in id order, keyset paginated on (user_id, id). Returns (repos, next_after)"""
+    session = session or db.session
+    stmt = select(Repository).where(Repository.user_id == user_id)
+    if after_id is not None:
+        stmt = stmt.where(Repository.id > after_id)
+    repos = session.execute(stmt.order_by(Repository.id).limit(limit + 1)).scalars().all()
+    if len(repos) > limit:
+        return repos[:limit], repos[limit - 1].id
+    return repos, None
+
+
+def iter_repositories(user_id, batch_size=500, session=None):
+    """Stream a user's repositories from a server-side cursor, batch_size rows in memory at a time"""
+    session = session or db.session
+    stmt = (
+        select(Repository)
+        .where(Repository.user_id == user_id)
+        .order_by(Repository.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for repo in session.scalars(stmt):
+        yield repo
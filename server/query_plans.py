@@ -0,0 +1,159 @@
+"""
+Check that every hot query is answered from an index.
+
+Builds a scratch in-memory SQLite database from the models (plus the FTS
+table), runs the real query-layer functions the endpoints call while
+capturing the SQL they emit, and prints EXPLAIN QUERY PLAN for each
+statement. Exits with status 1 if any of them scans a table without an index.
+
+    python query_plans.py [--verbose]
+"""
+import argparse
+import sys
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from models import db, User, Project, ProjectApplication, ProjectTeam, Repository, Skill, AnalysisJob
+from conditional import project_list_validators, project_validators, repository_validators
+from language_stats import user_language_stats
+from portfolio import portfolio_candidates, rescore_repositories
+from recommendations import ProjectIndex, recommend_projects
+from queries import open_projects_page, project_with_applications, repositories_page, iter_repositories, encode_cursor
+from refresh import repository_refresher, fleet_freshness
+from repo_sync import upsert_repositories, synced_repository_count, delete_missing_repositories
+from search import install_project_search, search_projects
+
+
+def build_scratch_database():
+    engine = create_engine('sqlite://', poolclass=StaticPool)
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        install_project_search(connection)
+
+    session = Session(bind=engine)
+    # Hashes are irrelevant to query plans, skip bcrypt entirely
+    client = User(first_name='Plan', last_name='Client', email='client@example.com', password_hash='x')
+    developer = User(first_name='Plan', last_name='Dev', email='dev@example.com', password_hash='x', github_username='dev')
+    session.add_all([client, developer])
+    session.flush()
+    project = Project(title='Portfolio website', description='Build a portfolio website', budget_min=100,
+                      budget_max=200, timeline_weeks=2, project_type='team', difficulty='beginner',
+                      client_id=client.id, status='open')
+    project.skills = [Skill(name='React', slug='react'), Skill(name='Python', slug='python')]
+    session.add(project)
+    session.flush()
+    session.add_all([
+        ProjectApplication(project_id=project.id, developer_id=developer.id, proposal='Hi', status='pending'),
+        ProjectTeam(project_id=project.id, developer_id=developer.id, role='developer'),
+        Repository(name='portfolio', primary_language='JavaScript', stars=3, project_type='personal', user_id=developer.id),
+    ])
+    session.commit()
+    return engine, session, project, developer
+
+
+def hot_paths(session, project, developer):
+    """(name, callable) for every query an endpoint runs on a request"""
+    return [
+        ('projects listing', lambda: open_projects_page({}, None, 20, session=session)),
+        ('projects listing, next page', lambda: open_projects_page({}, encode_cursor(project), 20, session=session)),
+        ('projects by difficulty', lambda: open_projects_page({'difficulty': 'beginner'}, None, 20, session=session)),
+        ('projects by type', lambda: open_projects_page({'project_type': 'team'}, None, 20, session=session)),
+        ('projects by budget', lambda: open_projects_page({'min_budget': 50}, None, 20, session=session)),
+        ('projects by popularity', lambda: open_projects_page({}, None, 20, session=session, sort='popular')),
+        ('projects by popularity, next page', lambda: open_projects_page(
+            {}, encode_cursor(project, 'popular'), 20, session=session, sort='popular')),
+        ('projects by client', lambda: open_projects_page({'client_id': project.client_id}, None, 20, session=session)),
+        ('projects by skills (all)', lambda: open_projects_page({'skills': ['React', 'Python']}, None, 20, session=session)),
+        ('projects by skills (any)', lambda: open_projects_page({'skills': ['React'], 'skills_match': 'any'}, None, 20, session=session)),
+        ('project detail', lambda: project_with_applications(project.id, session=session)),
+        ('project search', lambda: search_projects('portfolio', session=session)),
+        ('projects validators', lambda: project_list_validators(session=session)),
+        ('project validators', lambda: project_validators(project.id, session=session)),
+        ('repository validators', lambda: repository_validators(developer.id, session=session)),
+        ('repositories page', lambda: repositories_page(developer.id, 0, 20, session=session)),
+        ('repositories stream', lambda: list(iter_repositories(developer.id, session=session))),
+        ('recommendation index build', lambda: ProjectIndex().refresh(session)),
+        ('recommended projects', lambda: recommend_projects(developer.id, session=session)),
+        ('portfolio candidates', lambda: portfolio_candidates(developer.id, session=session)),
+        ('portfolio re-score', lambda: rescore_repositories(session.connection(), [developer.id])),
+        ('language stats', lambda: user_language_stats(developer.id, session=session)),
+        ('repository sync', lambda: upsert_repositories(developer.id, [
+            {'id': 101, 'name': 'portfolio', 'language': 'TypeScript', 'stargazers_count': 4},
+            {'id': 102, 'name': 'new-repo', 'language': 'Go', 'stargazers_count': 0},
+        ], session=session)),
+        ('synced repository count', lambda: synced_repository_count(developer.id, session=session)),
+        ('prune deleted repositories', lambda: delete_missing_repositories(developer.id, [101, 102], session=session)),
+        ('refresh queue', lambda: repository_refresher.queue(session)),
+        ('refresh coverage and lag', lambda: fleet_freshness(86400, session=session)),
+        ('login lookup', lambda: session.execute(select(User).where(User.email == 'dev@example.com')).first()),
+        ('duplicate application check', lambda: session.execute(
+            select(ProjectApplication.id).where(ProjectApplication.project_id == project.id,
+                                                ProjectApplication.developer_id == developer.id)).first()),
+        ('active analysis job', lambda: session.execute(
+            select(AnalysisJob).where(AnalysisJob.github_username == 'dev',
+                                      AnalysisJob.status.in_(('queued', 'running')))
+            .order_by(AnalysisJob.created_at)).first()),
+    ]
+
+
+def capture_statements(engine, fn):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE', 'WITH')):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return statements
+
+
+def full_scans(plan):
+    """Plan rows that read a whole table rather than an index"""
+    bad = []
+    for row in plan:
+        detail = row[3]
+        if detail.startswith('SCAN ') and 'USING' not in detail and 'VIRTUAL TABLE' not in detail \
+                and 'CONSTANT ROW' not in detail:
+            bad.append(detail)
+    return bad
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--verbose', action='store_true', help='print every statement and plan')
+    args = parser.parse_args(argv)
+
+    engine, session, project, developer = build_scratch_database()
+    failures = 0
+    for name, fn in hot_paths(session, project, developer):
+        statements = capture_statements(engine, fn)
+        # Writes made by the sync path are only there to get their statements
+        session.rollback()
+        scanned = 0
+        for statement, parameters in statements:
+            with engine.connect() as connection:
+                plan = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+            scans = full_scans(plan)
+            scanned += bool(scans)
+            if scans or args.verbose:
+                print(f"  {'FULL SCAN' if scans else 'plan'}: {' '.join(statement.split())}")
+                for row in plan:
+                    print(f"      {row[3]}")
+        print(f"[{'FAIL' if scanned else 'ok'}] {name} ({len(statements)} statements)")
+        failures += scanned
+
+    if failures:
+        print(f"\n{failures} statement(s) fall back to a full table scan")
+        return 1
+    print("\nAll hot queries use an index")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
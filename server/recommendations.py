@@ -0,0 +1,290 @@
+import math
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+
+from language_stats import NO_LANGUAGE, user_language_stats
+from models import db, Project, ProjectApplication, ProjectSkill, Skill
+
+
+# Developer -> project recommendations scored with NumPy.
+# Every open project is a row of a sparse skill matrix kept in ELLPACK form:
+# fixed-width (term index, weight) arrays padded with a zero term, so one
+# project can be rewritten in place when it changes. A developer is a dense
+# vector over the same terms built from user_language_stats (already kept
+# current by the repository sync), and ranking every open project is a
+# single gather-multiply-sum over the matrix plus the difficulty and budget
+# terms: no per-project Python at request time. The index refreshes itself
+# incrementally from projects.updated_at, so only rows changed since the last
+# request are reloaded. updated_at is stamped at flush, before the commit makes
+# the row visible, so each refresh also reloads the REFRESH_OVERLAP before the
+# watermark: a write stamped earlier but committed later is still picked up.
+
+SKILL_WEIGHT = 0.7
+DIFFICULTY_WEIGHT = 0.2
+BUDGET_WEIGHT = 0.1
+STAR_WEIGHT = 0.5  # a repository's stars add log1p(stars) * this to its language
+RELATED_WEIGHT = 0.5  # a framework skill also asks a little for its languages
+MAX_TERMS = 16
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+DIFFICULTY_LEVELS = {'beginner': 0.0, 'intermediate': 0.5, 'advanced': 1.0}
+
+# Project skills that imply repository languages, so a React project finds
+# developers whose repositories are JavaScript or TypeScript
+RELATED_LANGUAGES = {
+    'react': ('javascript', 'typescript'),
+    'vue': ('javascript', 'typescript'),
+    'angular': ('typescript', 'javascript'),
+    'node.js': ('javascript', 'typescript'),
+    'express': ('javascript', 'typescript'),
+    'socket.io': ('javascript',),
+    'next.js': ('javascript', 'typescript'),
+    'flask': ('python',),
+    'django': ('python',),
+    'fastapi': ('python',),
+    'spring': ('java', 'kotlin'),
+    'laravel': ('php',),
+    'rails': ('ruby',),
+    'tailwind': ('css', 'html'),
+    'mongodb': ('javascript',),
+}
+
+
+class ProjectIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.overlap = REFRESH_OVERLAP
+        self.reset()
+
+    def reset(self):
+        self.terms = {}  # skill/language slug -> column
+        self.term_names = []
+        self.slots = {}  # project id -> row
+        self.size = 0
+        self.watermark = None
+        capacity = 1024
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.client_ids = np.zeros(capacity, dtype=np.int64)
+        self.difficulty = np.zeros(capacity, dtype=np.float32)
+        self.budget = np.zeros(capacity, dtype=np.float32)
+        # Column 0 is padding: its developer weight is always zero
+        self.term_index = np.zeros((capacity, MAX_TERMS), dtype=np.int32)
+        self.term_weight = np.zeros((capacity, MAX_TERMS), dtype=np.float32)
+
+    def init_app(self, app):
+        self.overlap = timedelta(seconds=app.config.get(
+            'RECOMMENDATIONS_REFRESH_OVERLAP', self.overlap.total_seconds()))
+        app.extensions['recommendations'] = self
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+
+    def stats(self):
+        return {'projects': int(self.active[:self.size].sum()), 'slots': self.size, 'terms': len(self.term_names)}
+
+    def term(self, slug):
+        column = self.terms.get(slug)
+        if column is None:
+            column = self.terms[slug] = len(self.term_names) + 1
+            self.term_names.append(slug)
+        return column
+
+    def _grow(self):
+        capacity = len(self.ids) * 2
+        for name in ('ids', 'active', 'client_ids', 'difficulty', 'budget', 'term_index', 'term_weight'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    # Refresh
+
+    def refresh(self, session):
+        """Load projects changed since the last refresh (everything the first time)"""
+        with self._lock:
+            stmt = select(
+                Project.id, Project.status, Project.client_id, Project.difficulty,
+                Project.budget_max, Project.updated_at
+            )
+            if self.watermark is not None:
+                # Rows already loaded are reloaded over the overlap: cheaper than missing a late commit
+                since = self.watermark - self.overlap if self.watermark - datetime.min > self.overlap else datetime.min
+                stmt = stmt.where(Project.updated_at >= since)
+            else:
+                stmt = stmt.where(Project.status == 'open')
+            rows = session.execute(stmt).all()
+            if not rows:
+                if self.watermark is None:
+                    self.watermark = datetime.min
+                return 0
+
+            if self.watermark is None:
+                skills = self._skills(session, Project.status == 'open')
+            else:
+                skills = {}
+                open_ids = [row.id for row in rows if row.status == 'open']
+                for start in range(0, len(open_ids), 500):
+                    skills.update(self._skills(session, Project.id.in_(open_ids[start:start + 500])))
+            self._store(rows, skills)
+            self.watermark = max(
+                [row.updated_at for row in rows if row.updated_at] + [self.watermark or datetime.min]
+            )
+            return len(rows)
+
+    def _skills(self, session, criterion):
+        skills = {}
+        result = session.execute(
+            select(ProjectSkill.project_id, Skill.slug)
+            .join(Skill, Skill.id == ProjectSkill.skill_id)
+            .join(Project, Project.id == ProjectSkill.project_id)
+            .where(criterion)
+        )
+        for project_id, slug in result:
+            skills.setdefault(project_id, []).append(slug)
+        return skills
+
+    def _store(self, rows, skills):
+        """Write the rows into their slots (new projects get a new one) in one assignment per array"""
+        closed = [self.slots[row.id] for row in rows if row.status != 'open' and row.id in self.slots]
+        self.active[closed] = False
+        rows = [row for row in rows if row.status == 'open']
+        if not rows:
+            return
+
+        slots, term_index, term_weight = [], [], []
+        for row in rows:
+            slot = self.slots.get(row.id)
+            if slot is None:
+                if self.size == len(self.ids):
+                    self._grow()
+                slot = self.slots[row.id] = self.size
+                self.size += 1
+            slots.append(slot)
+
+            weights = {}
+            for slug in skills.get(row.id, ()):
+                weights[slug] = 1.0
+                for language in RELATED_LANGUAGES.get(slug, ()):
+                    weights[language] = max(weights.get(language, 0.0), RELATED_WEIGHT)
+            terms = sorted(weights.items(), key=lambda item: -item[1])[:MAX_TERMS]
+            norm = math.sqrt(sum(weight * weight for _, weight in terms)) or 1.0
+            padding = [0] * (MAX_TERMS - len(terms))
+            term_index.append([self.term(slug) for slug, _ in terms] + padding)
+            term_weight.append([weight / norm for _, weight in terms] + padding)
+
+        self.ids[slots] = [row.id for row in rows]
+        self.active[slots] = True
+        self.client_ids[slots] = [row.client_id for row in rows]
+        self.difficulty[slots] = [DIFFICULTY_LEVELS.get(row.difficulty, 0.5) for row in rows]
+        self.budget[slots] = np.log1p(np.maximum([row.budget_max or 0 for row in rows], 0))
+        self.term_index[slots] = term_index
+        self.term_weight[slots] = term_weight
+
+    def discard(self, project_ids):
+        with self._lock:
+            for project_id in project_ids:
+                slot = self.slots.get(project_id)
+                if slot is not None:
+                    self.active[slot] = False
+
+    # Scoring
+
+    def score(self, profile, exclude_ids=(), exclude_client=None, limit=20):
+        """[(project_id, score, skill match)] best first, for a DeveloperProfile"""
+        with self._lock:
+            n = self.size
+            if not n:
+                return []
+            vector = profile.vector(self)
+
+            # Sparse matrix x dense vector: gather the developer weight of each
+            # stored term, weight it and sum along the row
+            skill = (self.term_weight[:n] * vector[self.term_index[:n]]).sum(axis=1)
+            fit = 1.0 - np.abs(self.difficulty[:n] - profile.level)
+            top_budget = self.budget[:n].max() or 1.0
+            scores = SKILL_WEIGHT * skill + DIFFICULTY_WEIGHT * fit + BUDGET_WEIGHT * (self.budget[:n] / top_budget)
+
+            eligible = self.active[:n].copy()
+            if exclude_client is not None:
+                eligible &= self.client_ids[:n] != exclude_client
+            for project_id in exclude_ids:
+                slot = self.slots.get(project_id)
+                if slot is not None:
+                    eligible[slot] = False
+            candidates = np.flatnonzero(eligible)
+            if not len(candidates):
+                return []
+            if len(candidates) > limit:
+                best = np.argpartition(-scores[candidates], limit - 1)[:limit]
+                candidates = candidates[best]
+            # Ties break on the newer (higher id) project
+            order = np.lexsort((-self.ids[candidates], -scores[candidates]))
+            return [
+                (int(self.ids[slot]), float(scores[slot]), float(skill[slot]))
+                for slot in candidates[order]
+            ]
+
+
+class DeveloperProfile:
+    """A developer's language weights and experience level from user_language_stats"""
+
+    def __init__(self, stats):
+        self.weights = {}
+        total_repos = total_stars = 0
+        for row in stats:
+            total_repos += row.repo_count
+            total_stars += row.total_stars
+            if row.language == NO_LANGUAGE:
+                continue
+            self.weights[Skill.slugify(row.language)] = row.repo_count + STAR_WEIGHT * math.log1p(row.total_stars)
+        norm = math.sqrt(sum(weight * weight for weight in self.weights.values())) or 1.0
+        self.weights = {slug: weight / norm for slug, weight in self.weights.items()}
+        # 0 for a handful of unstarred repositories, 1 from ~50 repositories and ~500 stars
+        self.level = min(1.0, 0.6 * math.log1p(total_repos) / math.log1p(50) +
+                         0.4 * math.log1p(total_stars) / math.log1p(500))
+        self.languages = sorted(self.weights, key=self.weights.get, reverse=True)
+
+    def vector(self, index):
+        vector = np.zeros(len(index.term_names) + 1, dtype=np.float32)
+        for slug, weight in self.weights.items():
+            column = index.terms.get(slug)
+            if column is not None:
+                vector[column] = weight
+        return vector
+
+
+project_index = ProjectIndex()
+
+
+def recommend_projects(user_id, limit=20, session=None):
+    """
+    (profile, [(project, score, skill match)]) for a developer, best first,
+    leaving out their own projects and ones they already applied to.
+    """
+    session = session or db.session
+    project_index.refresh(session)
+    profile = DeveloperProfile(user_language_stats(user_id, session=session))
+    applied = session.execute(
+        select(ProjectApplication.project_id).where(ProjectApplication.developer_id == user_id)
+    ).scalars().all()
+    while True:
+        ranked = project_index.score(profile, exclude_ids=applied, exclude_client=user_id, limit=limit)
+        if not ranked:
+            return profile, []
+        projects = session.execute(
+            select(Project)
+            .options(joinedload(Project.client), selectinload(Project.skills))
+            .where(Project.id.in_([project_id for project_id, _, _ in ranked]))
+        ).unique().scalars().all()
+        by_id = {project.id: project for project in projects}
+        # Deleted projects never show up in the updated_at refresh: drop them
+        # from the index and rank again
+        deleted = [project_id for project_id, _, _ in ranked if project_id not in by_id]
+        if not deleted:
+            return profile, [(by_id[project_id], score, skill) for project_id, score, skill in ranked]
+        project_index.discard(deleted)
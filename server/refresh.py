@@ -0,0 +1,259 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, func, or_, select, union
+
+from github_analysis import sync_user_repositories
+from github_client import GithubError
+from github_governor import GithubUnavailable
+from models import db, Project, ProjectApplication, User
+from repo_sync import record_sync_attempt
+
+
+# Fleet-wide background refresh of every user's GitHub repositories.
+# `flask refresh-repositories` runs in its own process, never in the web
+# workers: each cycle builds a priority queue of users not synced for
+# REFRESH_MIN_AGE seconds, stalest first, with users active in the last
+# REFRESH_ACTIVE_DAYS days (applications, posted projects) ranked as if their
+# data were REFRESH_ACTIVE_BOOST times older, and syncs them in batches on
+# REFRESH_CONCURRENCY threads, at most REFRESH_RATE users a minute, until the
+# queue is empty or the cycle's REFRESH_CYCLE_SECONDS are spent. Syncs are incremental (see github_analysis)
+# and ask the governor for background budget, so interactive analyses keep
+# their reserve; the cycle stops early when GitHub is held back. Each cycle
+# reports coverage (share of users synced within REFRESH_TARGET_AGE), lag
+# (age of the stalest sync) and throughput; coverage and lag are also
+# exported on /metrics, recomputed at most every REFRESH_STATS_TTL seconds so
+# scrapes don't run the users aggregate in a web worker each time.
+
+logger = logging.getLogger(__name__)
+
+
+def fleet_freshness(target_age, session=None, now=None):
+    """Coverage and lag of the users with a GitHub username (one pass over ix_users_github_username_repos_synced_at)"""
+    session = session or db.session
+    now = now or datetime.utcnow()
+    fresh_since = now - timedelta(seconds=target_age)
+    users, fresh, never, oldest = session.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(case((User.repos_synced_at >= fresh_since, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((User.repos_synced_at.is_(None), 1), else_=0)), 0),
+            func.min(User.repos_synced_at),
+        ).where(User.github_username.isnot(None), User.github_username != '')
+    ).one()
+    return {
+        'users': users,
+        'fresh': fresh,
+        'never_synced': never,
+        'coverage': round(fresh / users, 4) if users else 1.0,
+        'max_lag_seconds': round((now - oldest).total_seconds()) if oldest else 0,
+    }
+
+
+def active_user_ids(since, session=None):
+    """Users who applied to, or posted, a project updated since `since`"""
+    session = session or db.session
+    return set(session.execute(union(
+        select(ProjectApplication.developer_id).where(ProjectApplication.updated_at >= since),
+        select(Project.client_id).where(Project.updated_at >= since),
+    )).scalars())
+
+
+class RepositoryRefresher:
+    def __init__(self, concurrency=2, batch_size=50, cycle_seconds=300, interval=900, min_age=3600,
+                 target_age=86400, active_days=7, active_boost=4, rate=300, stats_ttl=60):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.cycle_seconds = cycle_seconds
+        self.interval = interval
+        self.min_age = min_age
+        self.target_age = target_age
+        self.active_days = active_days
+        self.active_boost = active_boost
+        self.rate = rate
+        self.stats_ttl = stats_ttl
+        self.app = None
+        self.last_cycle = {}
+        self._freshness = (0.0, None)  # (expires_at, fleet_freshness)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        for name in ('concurrency', 'batch_size', 'cycle_seconds', 'interval', 'min_age', 'target_age',
+                     'active_days', 'active_boost', 'rate', 'stats_ttl'):
+            setattr(self, name, app.config.get(f"REFRESH_{name.upper()}", getattr(self, name)))
+        self.app = app
+        app.extensions['repository_refresh'] = self
+        app.cli.add_command(refresh_repositories)
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+
+    def freshness(self):
+        """fleet_freshness, reused for stats_ttl seconds"""
+        with self._lock:
+            expires_at, freshness = self._freshness
+            if freshness is None or expires_at <= time.monotonic():
+                freshness = fleet_freshness(self.target_age)
+                self._freshness = (time.monotonic() + self.stats_ttl, freshness)
+            return dict(freshness)
+
+    def stats(self):
+        stats = self.freshness()
+        # Throughput is only known in the process running the cycles
+        for key in ('refreshed', 'failed', 'users_per_minute'):
+            if key in self.last_cycle:
+                stats[f"last_cycle_{key}"] = self.last_cycle[key]
+        return stats
+
+    def queue(self, session=None, now=None, min_age=None):
+        """Heap of (-priority, inactive, user_id, github_username) for every user due a refresh"""
+        session = session or db.session
+        now = now or datetime.utcnow()
+        due_before = now - timedelta(seconds=self.min_age if min_age is None else min_age)
+        active = active_user_ids(now - timedelta(days=self.active_days), session)
+        heap = []
+        for user_id, username, synced_at in session.execute(
+            select(User.id, User.github_username, User.repos_synced_at)
+            .where(User.github_username.isnot(None), User.github_username != '',
+                   or_(User.repos_synced_at.is_(None), User.repos_synced_at < due_before))
+        ):
+            # Never synced first; the boost makes an active user's data count as older than it is
+            age = (now - synced_at).total_seconds() if synced_at else float('inf')
+            inactive = user_id not in active
+            if not inactive:
+                age *= self.active_boost
+            heap.append((-age, inactive, user_id, username))
+        heapq.heapify(heap)
+        return heap
+
+    def run_cycle(self, concurrency=None, cycle_seconds=None, batch_size=None, min_age=None, rate=None):
+        """Refresh due users, most overdue first, until done or out of time. Returns the cycle report"""
+        concurrency = concurrency or self.concurrency
+        cycle_seconds = cycle_seconds or self.cycle_seconds
+        batch_size = batch_size or self.batch_size
+        rate = self.rate if rate is None else rate
+        spacing = 60.0 / rate if rate else 0
+        started = time.monotonic()
+        deadline = started + cycle_seconds
+        heap = self.queue(min_age=min_age)
+        db.session.remove()
+        report = {'due': len(heap), 'refreshed': 0, 'changed': 0, 'failed': 0, 'deferred': 0,
+                  'repos_fetched': 0, 'stopped': None}
+        stop = threading.Event()
+        lock = threading.Lock()
+        slots = itertools.count()
+
+        def refresh(user):
+            # Paced to `rate` users a minute: a cycle spreads over its budget
+            # instead of competing with requests in one burst
+            with lock:
+                start_at = started + next(slots) * spacing
+            if start_at > time.monotonic():
+                stop.wait(start_at - time.monotonic())
+            if stop.is_set() or time.monotonic() >= deadline:
+                return
+            user_id, username = user[2:]
+            with self.app.app_context():
+                try:
+                    result = sync_user_repositories(user_id, username, priority='background')
+                except GithubUnavailable as e:
+                    # Rate limit reserve reached or breaker open: the rest of the queue would fail too
+                    db.session.rollback()
+                    with lock:
+                        report['stopped'] = str(e)
+                    stop.set()
+                    return
+                except GithubError as e:
+                    db.session.rollback()
+                    if e.status_code == 404:
+                        # Account deleted or renamed: don't let it sit at the head of the queue
+                        record_sync_attempt(user_id)
+                        db.session.commit()
+                    outcome = None
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Refreshing repositories of user %s failed", user_id)
+                    outcome = None
+                else:
+                    outcome = result
+            with lock:
+                if outcome is None:
+                    report['failed'] += 1
+                else:
+                    report['refreshed'] += 1
+                    report['repos_fetched'] += outcome['fetched']
+                    if outcome['inserted'] or outcome['updated'] or outcome['deleted']:
+                        report['changed'] += 1
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='refresh') as executor:
+            while heap and not stop.is_set() and time.monotonic() < deadline:
+                batch = [heapq.heappop(heap) for _ in range(min(batch_size, len(heap)))]
+                list(executor.map(refresh, batch))
+
+        elapsed = time.monotonic() - started
+        attempted = report['refreshed'] + report['failed']
+        report.update(
+            deferred=report['due'] - attempted,
+            seconds=round(elapsed, 1),
+            users_per_minute=round(attempted / elapsed * 60, 1) if elapsed else 0.0,
+        )
+        if report['deferred'] and not report['stopped']:
+            report['stopped'] = 'time budget'
+        freshness = fleet_freshness(self.target_age)
+        with self._lock:
+            self._freshness = (time.monotonic() + self.stats_ttl, freshness)
+        report.update(freshness)
+        self.last_cycle = report
+        return report
+
+
+repository_refresher = RepositoryRefresher()
+
+
+def format_report(report):
+    line = (
+        f"refreshed {report['refreshed']}/{report['due']} due users ({report['changed']} changed, "
+        f"{report['failed']} failed, {report['deferred']} deferred) in {report['seconds']}s, "
+        f"{report['users_per_minute']} users/min, {report['repos_fetched']} repositories fetched; "
+        f"coverage {report['coverage']:.1%} of {report['users']} users, "
+        f"{report['never_synced']} never synced, max lag {report['max_lag_seconds']}s"
+    )
+    if report['stopped']:
+        line += f"; stopped early: {report['stopped']}"
+    return line
+
+
+@click.command('refresh-repositories')
+@click.option('--once', is_flag=True, help='Run one cycle and exit')
+@click.option('--concurrency', type=int, help='Users synced at a time (REFRESH_CONCURRENCY)')
+@click.option('--budget', 'cycle_seconds', type=float, help='Seconds a cycle may spend (REFRESH_CYCLE_SECONDS)')
+@click.option('--batch-size', type=int, help='Users taken off the queue at a time (REFRESH_BATCH_SIZE)')
+@click.option('--interval', type=float, help='Seconds from one cycle start to the next (REFRESH_INTERVAL)')
+@click.option('--rate', type=float, help='At most this many users a minute, 0 for no limit (REFRESH_RATE)')
+@click.option('--min-age', type=float, help='Skip users synced less than this many seconds ago (REFRESH_MIN_AGE)')
+@click.option('--nice', type=int, default=10, show_default=True,
+              help='Lower this process\'s CPU priority, so web workers on the same host win')
+@with_appcontext
+def refresh_repositories(once, concurrency, cycle_seconds, batch_size, interval, rate, min_age, nice):
+    """Refresh every user's GitHub repositories in the background, stalest first"""
+    if nice and hasattr(os, 'nice'):
+        os.nice(nice)
+    interval = interval or repository_refresher.interval
+    while True:
+        started = time.monotonic()
+        report = repository_refresher.run_cycle(concurrency, cycle_seconds, batch_size, min_age, rate)
+        click.echo(f"[{datetime.utcnow().isoformat(timespec='seconds')}] {format_report(report)}")
+        if once:
+            return
+        try:
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            return
@@ -0,0 +1,177 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import select, insert, update, delete, func, or_
+
+from language_stats import LanguageDeltas, apply_deltas
+from models import db, Repository, User
+from portfolio import owner_login, score_repository
+
+
+# Bulk persistence for repositories fetched from GitHub.
+# A sync costs one SELECT ... IN for the user's existing rows, one executemany
+# INSERT for new repositories and one executemany UPDATE for changed ones,
+# however many repositories the user has, plus one upsert batch for the
+# user's language stats. Portfolio scores are computed here too, so a row
+# whose score is stale (the weights changed) is rewritten on the next sync.
+# Rows are matched on GitHub's id, so a renamed repository is updated in place;
+# rows stored before ids were kept are matched on name and pick the id up. A
+# stored row whose name an incoming repository with another id has taken
+# (deleted and recreated upstream) is deleted before that name is written.
+
+SYNCED_FIELDS = ('name', 'github_id', 'description', 'primary_language', 'stars', 'has_pages', 'homepage',
+                 'pushed_at', 'fork', 'portfolio_score', 'portfolio_reasons')
+
+
+def parse_github_time(value):
+    """Naive UTC datetime from a GitHub timestamp ('2024-05-01T12:00:00Z'), None if missing"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def repository_values(repo, github_username=None):
+    """Map a GitHub API repository payload onto Repository columns"""
+    values = {
+        'name': repo.get('name', 'No Name'),
+        'github_id': repo.get('id'),
+        'description': repo.get('description', ''),
+        'primary_language': repo.get('language', 'Unknown'),
+        'stars': repo.get('stargazers_count', 0),
+        'has_pages': bool(repo.get('has_pages')),
+        'homepage': repo.get('homepage') or None,
+        'pushed_at': parse_github_time(repo.get('pushed_at')),
+        'fork': bool(repo.get('fork')),
+    }
+    values['portfolio_score'], values['portfolio_reasons'] = score_repository(
+        values['name'], values['description'], values['has_pages'], values['homepage'], github_username
+    )
+    return values
+
+
+def upsert_repositories(user_id, repos, session=None, github_username=None):
+    """
+    Insert new repositories for user_id and refresh the synced fields
+    (description, language, stars, deployment, push time, portfolio score...)
+    on the ones that changed. The username match is scored against
+    github_username (default: portfolio.owner_login). Stored rows holding the name of
+    an incoming repository with another GitHub id (deleted and recreated
+    upstream) are deleted first. Does not commit.
+    Returns (inserted, updated, deleted) counts.
+    """
+    session = session or db.session
+    if github_username is None:
+        github_username = session.execute(select(owner_login()).where(User.__table__.c.id == user_id)).scalar()
+    incoming = {}
+    for repo in repos:
+        values = repository_values(repo, github_username)
+        incoming[values['name']] = values
+    if not incoming:
+        return 0, 0, 0
+
+    github_ids = [values['github_id'] for values in incoming.values() if values['github_id'] is not None]
+    rows = session.execute(
+        select(Repository.id, *[getattr(Repository, f) for f in SYNCED_FIELDS])
+        .where(Repository.user_id == user_id,
+               or_(Repository.github_id.in_(github_ids), Repository.name.in_(list(incoming))))
+    ).all()
+    by_github_id = {row.github_id: row for row in rows if row.github_id is not None}
+    # Only rows without an id are matched on name: another repository may have taken over the name
+    by_name = {row.name: row for row in rows if row.github_id is None}
+
+    now = datetime.utcnow()
+    to_insert = []
+    to_update = []
+    matched = set()
+    # Bulk statements skip mapper events, so language stats deltas are tracked here
+    deltas = LanguageDeltas()
+    for name, values in incoming.items():
+        row = by_github_id.get(values['github_id']) or by_name.get(name)
+        if row is None:
+            project_type = 'forked' if values['fork'] else 'personal'
+            to_insert.append(dict(values, user_id=user_id, project_type=project_type, updated_at=now))
+            deltas.add(user_id, values['primary_language'], values['stars'])
+            continue
+        matched.add(row.id)
+        if any(getattr(row, f) != values[f] for f in SYNCED_FIELDS):
+            to_update.append(dict(values, id=row.id, updated_at=now))
+            deltas.remove(user_id, row.primary_language, row.stars)
+            deltas.add(user_id, values['primary_language'], values['stars'])
+
+    # Selected for its name only: another repository has that name upstream
+    # now, so this one is gone (or renamed, and comes back with the next full listing)
+    stale = [row for row in rows if row.id not in matched]
+    if stale:
+        for row in stale:
+            deltas.remove(user_id, row.primary_language, row.stars)
+        session.execute(delete(Repository).where(Repository.id.in_([row.id for row in stale])))
+    if to_update:
+        # Repositories that swapped names: move the old names out of the way
+        # first (GitHub names have no spaces, so the placeholder can't clash)
+        renamed = {row.id: row.name for row in rows if row.id in matched}
+        targets = {values['name'] for values in to_update if values['name'] != renamed[values['id']]}
+        parked = [{'id': values['id'], 'name': f"{renamed[values['id']]} renaming:{values['id']}"}
+                  for values in to_update if renamed[values['id']] in targets]
+        if parked:
+            session.execute(update(Repository), parked)
+        # executemany UPDATE keyed on primary key; before the inserts, a rename
+        # frees its old name for a new repository in the same batch
+        session.execute(update(Repository), to_update)
+    if to_insert:
+        session.execute(insert(Repository), to_insert)
+    apply_deltas(session.connection(), deltas)
+    return len(to_insert), len(to_update), len(stale)
+
+
+def synced_repository_count(user_id, session=None):
+    """How many of the user's rows came from GitHub (carry a GitHub id)"""
+    session = session or db.session
+    return session.execute(
+        select(func.count()).select_from(Repository)
+        .where(Repository.user_id == user_id, Repository.github_id.isnot(None))
+    ).scalar()
+
+
+def delete_missing_repositories(user_id, github_ids, session=None):
+    """
+    Delete the user's synced rows whose GitHub id is not in github_ids (the
+    complete upstream listing). Rows that never came from GitHub are kept.
+    Does not commit. Returns the number deleted.
+    """
+    session = session or db.session
+    github_ids = set(github_ids)
+    gone = [
+        row for row in session.execute(
+            select(Repository.id, Repository.github_id, Repository.primary_language, Repository.stars)
+            .where(Repository.user_id == user_id, Repository.github_id.isnot(None))
+        )
+        if row.github_id not in github_ids
+    ]
+    if not gone:
+        return 0
+    deltas = LanguageDeltas()
+    for row in gone:
+        deltas.remove(user_id, row.primary_language, row.stars)
+    session.execute(delete(Repository).where(Repository.id.in_([row.id for row in gone])))
+    apply_deltas(session.connection(), deltas)
+    return len(gone)
+
+
+def record_sync(user_id, github_username, watermark, session=None):
+    """Store when and for which login the user's repositories were synced, and the new watermark"""
+    session = session or db.session
+    session.execute(
+        update(User.__table__)
+        .where(User.__table__.c.id == user_id)
+        .values(repos_synced_at=datetime.utcnow(), repos_synced_login=github_username, repos_watermark=watermark)
+    )
+
+
+def record_sync_attempt(user_id, session=None):
+    """Mark the user as synced now without touching the watermark (the account is gone or renamed)"""
+    session = session or db.session
+    session.execute(
+        update(User.__table__).where(User.__table__.c.id == user_id).values(repos_synced_at=datetime.utcnow())
+    )
@@ -0,0 +1,525 @@
+from urllib.parse import urlencode
+
+from flask import Response, request, make_response, session, stream_with_context
+from flask_restful import Resource
+from sqlalchemy.exc import IntegrityError
+
+import portfolio
+from cache import response_cache, MISSING
+from conditional import (
+    project_list_validators, project_validators, repository_validators, make_etag,
+    last_modified_of, is_not_modified, not_modified_response, validator_headers
+)
+from database import read_session
+from github_client import GithubError, is_valid_login
+from github_analysis import run_github_analysis, stored_github_analysis
+from github_governor import GithubUnavailable
+from jobs import analysis_jobs, JobQueueFull, MAX_JOB_WAIT_SECONDS
+from language_stats import user_language_stats
+from models import User, db, Project, ProjectApplication
+from passwords import password_hasher, HashingBusy
+from queries import (
+    open_projects_page, project_with_applications, repositories_page, iter_repositories,
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
+from recommendations import recommend_projects
+from search import search_projects, SearchUnavailable
+from serializers import (
+    user_shallow, repository_schema, language_stat_schema, portfolio_candidate_schema, project_summary, project_detail,
+    project_search_result, application_for_client_schema, dumps
+)
+
+
+# The API's resources. create_app registers them on its Api, so importing app
+# (seed scripts, tooling) doesn't load them or what they pull in.
+
+class Start(Resource):
+    def get(self):
+        response={"message": "Hello Launchpad"}
+        return response, 200
+    
+class Signup(Resource):
+    def post(self):
+
+        data=request.get_json()
+        existing_user=User.query.filter_by(email=data['email']).first()
+        if existing_user:
+            return {"error": " Email already exists!"}, 400
+        try:
+            new_user=User(
+                first_name=data['first_name'],
+                last_name=data['last_name'],
+                github_username=data['github_username'],
+                email=data['email'],
+                password=data['password']
+
+            )
+        except HashingBusy as e:
+            return {'error': str(e)}, 503, {'Retry-After': str(e.retry_after)}
+        
+        db.session.add(new_user)
+        db.session.commit()
+        new_user_dict=user_shallow.dump(new_user)
+        response_body=make_response(new_user_dict, 201)
+        return response_body
+
+class Login(Resource):
+    def post(self):
+        data=request.get_json()
+        if not data:
+            return {'error': 'Please fill in all the fields'}
+        email=data['email']
+        password=data['password']
+        if not email or not password:
+            return {'error': 'Both email and password required'}, 404
+        user=User.query.filter_by(email=email).first()
+        try:
+            authenticated=user is not None and user.authenticate(password)
+        except HashingBusy as e:
+            return {'error': str(e)}, 503, {'Retry-After': str(e.retry_after)}
+        if authenticated:
+            # Upgrade hashes made at an older work factor while we have the plain password
+            if password_hasher.needs_rehash(user.password_hash):
+                try:
+                    user.password=password
+                    db.session.commit()
+                except HashingBusy:
+                    pass
+            session['user_id']=user.id
+            user_dict=user_shallow.dump(user)
+            response=make_response(user_dict, 200)
+            return response
+        else:
+            response_body={"error":"Invalid email or password"}
+            return response_body, 400
+
+class Logout(Resource):
+    def post(self):
+        session.pop('user_id', None)
+        response_body={'message': "Logged out successfully!"}
+        response=make_response(response_body, 200)
+        return response
+
+class GithubAnalysis(Resource):
+    def post(self):
+        try:
+            data = request.get_json()
+            github_username = data.get('github_username')
+            
+            if not github_username:
+                return {'error': "GitHub username is required"}, 400
+            # It becomes part of API paths sent with our token
+            if not is_valid_login(github_username):
+                return {'error': "Invalid GitHub username"}, 400
+            
+            # Get current user (for now, use a test user)
+            test_user = User.query.first()  # Get first user in database
+            if not test_user:
+                return {'error': "No user found. Sign up first."}, 400
+            
+            
+            # Queue the analysis and answer right away when a job is requested
+            if data.get('async') or request.args.get('mode') == 'job':
+                try:
+                    job, created = analysis_jobs.submit(test_user.id, github_username)
+                except JobQueueFull as e:
+                    return {'error': str(e)}, 503, {'Retry-After': str(e.retry_after)}
+                return {
+                    'job_id': job.id,
+                    'status': job.status,
+                    'deduplicated': not created,
+                    'status_url': f"/githubanalysis/{job.id}"
+                }, 202
+            
+            try:
+                return run_github_analysis(test_user.id, github_username), 200
+            except GithubUnavailable as e:
+                # Rate limited or the breaker is open: serve what the last sync stored
+                db.session.rollback()
+                headers = {'Retry-After': str(e.retry_after)}
+                stored = stored_github_analysis(test_user.id, github_username, e)
+                if stored is None:
+                    return {'error': str(e)}, 503, headers
+                return stored, 200, headers
+            except GithubError as e:
+                return {'error': f"GitHub API error: {e.status_code}"}, e.status_code
+            
+        except Exception as e:
+            db.session.rollback()
+            return {'error': str(e)}, 500
+        
+class GithubAnalysisJob(Resource):
+    def get(self, job_id):
+        """Status of a queued analysis; ?wait=<seconds> long-polls until it finishes"""
+        wait = min(max(request.args.get('wait', 0, type=float), 0), MAX_JOB_WAIT_SECONDS)
+        job = analysis_jobs.wait(job_id, wait) if wait else analysis_jobs.get(job_id)
+        if not job:
+            return {'error': 'Job not found'}, 404
+        
+        return {
+            'job_id': job.id,
+            'github_username': job.github_username,
+            'status': job.status,
+            'progress': job.progress,
+            'result': job.result,
+            'error': job.error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None
+        }, 200
+
+
+class UserRepositories(Resource):
+    def get(self):
+        """The logged in user's repositories, paginated JSON or streamed NDJSON"""
+        user_id = session.get('user_id')
+        if not user_id:
+            return {'error': 'Please log in to view your repositories'}, 401
+        
+        validators = repository_validators(user_id, session=read_session())
+        query = urlencode(sorted(request.args.items(multi=True)))
+        etag, last_modified = make_etag('repositories', validators, user_id, query), last_modified_of(validators)
+        
+        stream = request.args.get('stream') in ('1', 'true') or \
+            request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+        if stream:
+            etag = make_etag('repositories-stream', validators, user_id)
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        
+        if stream:
+            # One JSON object per line, rows fetched in batches as the client reads
+            def generate():
+                for repo in iter_repositories(user_id, session=read_session()):
+                    yield dumps(repository_schema.dump(repo))
+            response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+            response.headers.update(validator_headers(etag, last_modified))
+            return response
+        
+        try:
+            after_id = request.args.get('after', type=int)
+            limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+            repos, next_after = repositories_page(user_id, after_id, limit, session=read_session())
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        return {
+            'total_repositories': validators[0],
+            'repositories': repository_schema.dump_many(repos),
+            'next_after': next_after
+        }, 200, validator_headers(etag, last_modified)
+    
+
+class UserLanguageStats(Resource):
+    def get(self, user_id):
+        """Aggregated language stats for a user's synced repositories"""
+        stats = user_language_stats(user_id, session=read_session())
+        languages = language_stat_schema.dump_many(stats)
+        return {
+            'user_id': user_id,
+            'total_repos': sum(row.repo_count for row in stats),
+            'most_used_language': stats[0].language if stats else None,
+            'language_stats': {row.language: row.repo_count for row in stats},
+            'languages': languages
+        }, 200
+    
+
+class UserPortfolio(Resource):
+    def get(self, user_id):
+        """A user's best portfolio candidates, scored when their repositories were synced"""
+        limit = max(1, min(request.args.get('limit', 5, type=int), MAX_PAGE_SIZE))
+        candidates = portfolio.portfolio_candidates(user_id, limit, session=read_session())
+        best = candidates[0] if candidates and candidates[0].portfolio_score >= portfolio.MIN_PORTFOLIO_SCORE else None
+        return {
+            'user_id': user_id,
+            'portfolio': portfolio_candidate_schema.dump(best) if best else None,
+            'candidates': portfolio_candidate_schema.dump_many(candidates)
+        }, 200
+
+
+class UserRecommendedProjects(Resource):
+    def get(self, user_id):
+        """Open projects ranked by how well they fit a developer's repositories"""
+        limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+        profile, ranked = recommend_projects(user_id, limit, session=read_session())
+        projects = project_summary.dump_many([project for project, _, _ in ranked])
+        for project, (_, score, skill_match) in zip(projects, ranked):
+            project['score'] = round(score, 4)
+            project['skill_match'] = round(skill_match, 4)
+        return {
+            'user_id': user_id,
+            'languages': profile.languages,
+            'experience_level': round(profile.level, 2),
+            'projects': projects
+        }, 200
+
+
+# PROJECTS ENDPOINTS
+
+class Projects(Resource):
+    def get(self):
+        """Get a page of open projects (with optional filters)"""
+        try:
+            try:
+                filters = {
+                    'difficulty': request.args.get('difficulty') or None,
+                    'project_type': request.args.get('project_type') or None,
+                    'min_budget': request.args.get('min_budget', type=int),
+                    'max_budget': request.args.get('max_budget', type=int),
+                    'client_id': request.args.get('client', type=int),
+                    'min_applications': request.args.get('min_applications', type=int),
+                    'max_applications': request.args.get('max_applications', type=int),
+                    'skills': [s.strip() for s in request.args.get('skills', '').split(',') if s.strip()],
+                    'skills_match': request.args.get('skills_match', 'all')
+                }
+                if filters['skills_match'] not in ('any', 'all'):
+                    raise ValueError("skills_match must be 'any' or 'all'")
+                limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+                limit = max(1, min(limit, MAX_PAGE_SIZE))
+                
+                query = urlencode(sorted(request.args.items(multi=True)))
+                validators = project_list_validators(session=read_session())
+                etag, last_modified = make_etag('projects', validators, query), last_modified_of(validators)
+                if is_not_modified(etag, last_modified):
+                    return not_modified_response(etag, last_modified)
+                
+                # The ETag is part of the key: a body stored before a write nothing bumped for
+                # (an application status change, say) can't be paired with newer validators
+                cache_key = response_cache.key('projects', etag, query)
+                cached = response_cache.get(cache_key)
+                if cached is not MISSING:
+                    return cached, 200, validator_headers(etag, last_modified)
+                
+                # Clients come back in the same statement, counts are columns on projects
+                projects, next_cursor = open_projects_page(
+                    filters, request.args.get('cursor'), limit, session=read_session(),
+                    sort=request.args.get('sort', 'newest')
+                )
+            except ValueError as e:
+                return {'error': str(e)}, 400
+            
+            response_body = {
+                'projects': project_summary.dump_many(projects),
+                'next_cursor': next_cursor,
+                'limit': limit
+            }
+            response_cache.set(cache_key, response_body)
+            return response_body, 200, validator_headers(etag, last_modified)
+            
+        except Exception as e:
+            return {'error': str(e)}, 500
+    
+    def post(self):
+        """Create a new project (for clients)"""
+        try:
+            data = request.get_json()
+            
+            # Get user from session (for now, get user_id from request)
+            user_id = data.get('user_id')
+            if not user_id:
+                # Fallback: use test client
+                test_client = User.query.filter_by(email="client@example.com").first()
+                if not test_client:
+                    return {'error': 'No user found'}, 404
+                user_id = test_client.id
+            
+            # Create project
+            project = Project(
+                title=data['title'],
+                description=data['description'],
+                budget_min=data['budget_min'],
+                budget_max=data['budget_max'],
+                timeline_weeks=data['timeline_weeks'],
+                project_type=data.get('project_type', 'individual'),
+                difficulty=data.get('difficulty', 'beginner'),
+                team_size_min=data.get('team_size_min', 1),
+                team_size_max=data.get('team_size_max', 1),
+                client_id=user_id,
+                status='open'
+            )
+            project.set_skills(data.get('skills_required', []))
+            
+            db.session.add(project)
+            db.session.commit()
+            response_cache.bump('projects')
+            
+            return {
+                'message': 'Project created successfully',
+                'project_id': project.id,
+                'title': project.title
+            }, 201
+            
+        except Exception as e:
+            db.session.rollback()
+            return {'error': str(e)}, 500
+
+
+class ProjectSearch(Resource):
+    def get(self):
+        """Keyword search over open projects, best matches first"""
+        try:
+            q = request.args.get('q', '').strip()
+            if not q:
+                return {'error': 'Search query (q) is required'}, 400
+            page = max(1, request.args.get('page', 1, type=int))
+            per_page = max(1, min(request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+            
+            validators = project_list_validators(session=read_session())
+            etag, last_modified = make_etag('search', validators, q, page, per_page), last_modified_of(validators)
+            if is_not_modified(etag, last_modified):
+                return not_modified_response(etag, last_modified)
+            
+            try:
+                results, has_more = search_projects(q, page, per_page, session=read_session())
+            except SearchUnavailable as e:
+                return {'error': str(e)}, 501
+            
+            results_data = []
+            for project, rank, snippet in results:
+                result = project_search_result.dump(project)
+                result['snippet'] = snippet
+                result['rank'] = rank
+                results_data.append(result)
+            
+            return {
+                'query': q,
+                'results': results_data,
+                'page': page,
+                'per_page': per_page,
+                'has_more': has_more
+            }, 200, validator_headers(etag, last_modified)
+            
+        except Exception as e:
+            return {'error': str(e)}, 500
+
+
+class SingleProject(Resource):
+    def get(self, project_id):
+        """Get a single project by ID"""
+        try:
+            validators = project_validators(project_id, session=read_session())
+            etag, last_modified = make_etag('project', validators), last_modified_of(validators)
+            if is_not_modified(etag, last_modified):
+                return not_modified_response(etag, last_modified)
+            
+            cache_key = response_cache.key(f"project:{project_id}", 'detail', etag)
+            cached = response_cache.get(cache_key)
+            if cached is not MISSING:
+                return cached, 200, validator_headers(etag, last_modified)
+            
+            # Client, applications and developers are eager loaded
+            project = project_with_applications(project_id, session=read_session())
+            
+            if not project:
+                return {'error': 'Project not found'}, 404
+            
+            response_body = project_detail.dump(project)
+            response_cache.set(cache_key, response_body)
+            return response_body, 200, validator_headers(etag, last_modified)
+            
+        except Exception as e:
+            return {'error': str(e)}, 500
+
+
+class ProjectApplications(Resource):
+    def post(self, project_id):
+        """Apply to a project (for developers)"""
+        try:
+            data = request.get_json()
+            
+            # Check if project exists
+            project = Project.query.get(project_id)
+            if not project:
+                return {'error': 'Project not found'}, 404
+            
+            # Check if project is open
+            if project.status != 'open':
+                return {'error': 'Project is not accepting applications'}, 400
+            
+            # Get developer (for now, use first user as developer)
+            # In real app, get from session
+            developer = User.query.filter_by(email="cheryl@example.com").first()
+            if not developer:
+                developer = User.query.first()
+            
+            # Check if already applied (a probe of the unique (project_id, developer_id) index)
+            existing = db.session.query(ProjectApplication.id).filter_by(
+                project_id=project_id,
+                developer_id=developer.id
+            ).first()
+            
+            if existing:
+                return {'error': 'You have already applied to this project'}, 400
+            
+            # Create application
+            application = ProjectApplication(
+                project_id=project_id,
+                developer_id=developer.id,
+                proposal=data.get('proposal', ''),
+                estimated_time=data.get('estimated_time'),
+                estimated_cost=data.get('estimated_cost'),
+                status='pending'
+            )
+            
+            db.session.add(application)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Lost a race with a concurrent application from the same developer
+                db.session.rollback()
+                return {'error': 'You have already applied to this project'}, 400
+            # Listing shows application counts, the project pages list applications
+            response_cache.bump('projects', f"project:{project_id}")
+            
+            return {
+                'message': 'Application submitted successfully',
+                'application_id': application.id,
+                'status': application.status
+            }, 201
+            
+        except Exception as e:
+            db.session.rollback()
+            return {'error': str(e)}, 500
+    
+    def get(self, project_id):
+        """Get all applications for a project (for client)"""
+        try:
+            validators = project_validators(project_id, session=read_session())
+            etag, last_modified = make_etag('applications', validators), last_modified_of(validators)
+            if is_not_modified(etag, last_modified):
+                return not_modified_response(etag, last_modified)
+            
+            cache_key = response_cache.key(f"project:{project_id}", 'applications', etag)
+            cached = response_cache.get(cache_key)
+            if cached is not MISSING:
+                return cached, 200, validator_headers(etag, last_modified)
+            
+            project = project_with_applications(project_id, session=read_session())
+            if not project:
+                return {'error': 'Project not found'}, 404
+            
+            applications = application_for_client_schema.dump_many(project.applications)
+            
+            response_cache.set(cache_key, applications)
+            return applications, 200, validator_headers(etag, last_modified)
+            
+        except Exception as e:
+            return {'error': str(e)}, 500
+
+
+def register_resources(api):
+    api.add_resource(Start, '/welcome')
+    api.add_resource(Signup, '/signup')
+    api.add_resource(Login, '/login')
+    api.add_resource(Logout, '/logout')
+    api.add_resource(GithubAnalysis, '/githubanalysis')
+    api.add_resource(GithubAnalysisJob, '/githubanalysis/<string:job_id>')
+    api.add_resource(UserRepositories, '/user/repositories')
+    api.add_resource(UserLanguageStats, '/users/<int:user_id>/language-stats')
+    api.add_resource(UserPortfolio, '/users/<int:user_id>/portfolio')
+    api.add_resource(UserRecommendedProjects, '/users/<int:user_id>/recommended-projects')
+    # Projects endpoints
+    api.add_resource(Projects, '/projects')
+    api.add_resource(ProjectSearch, '/projects/search')
+    api.add_resource(SingleProject, '/projects/<int:project_id>')
+    api.add_resource(ProjectApplications, '/projects/<int:project_id>/apply')
@@ -0,0 +1,128 @@
+import html
+import re
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import db, Project
+
+
+# Full-text search over Project.title and Project.description.
+# projects_fts is an external-content FTS5 table: it stores only the index and
+# reads column values back from projects, and the triggers below keep it in
+# sync row by row on insert, update and delete.
+# Snippets are HTML: the description text is escaped and only the <mark> tags
+# around matches are markup, so clients can render them as is.
+
+FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+        title, description,
+        content='projects', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_fts_ai AFTER INSERT ON projects BEGIN
+        INSERT INTO projects_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_fts_ad AFTER DELETE ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_fts_au AFTER UPDATE OF title, description ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO projects_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+SEARCH_SQL = text("""
+    SELECT projects_fts.rowid AS id,
+           bm25(projects_fts, 10.0, 1.0) AS rank,
+           snippet(projects_fts, 1, :open_mark, :close_mark, '...', 16) AS snippet
+    FROM projects_fts
+    JOIN projects ON projects.id = projects_fts.rowid
+    WHERE projects_fts MATCH :query AND projects.status = 'open'
+    ORDER BY rank
+    LIMIT :limit OFFSET :offset
+""")
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Placeholders snippet() puts around matches, control characters no description uses
+OPEN_MARK, CLOSE_MARK = '\x02', '\x03'
+
+
+class SearchUnavailable(Exception):
+    pass
+
+
+def install_project_search(connection):
+    """Create the FTS table and triggers on a database built without migrations"""
+    for statement in FTS_DDL:
+        connection.execute(text(statement))
+    connection.execute(text("INSERT INTO projects_fts(projects_fts) VALUES ('rebuild')"))
+
+
+def build_match_query(q):
+    """
+    Turn free text into a safe FTS5 query: every word is quoted so user input
+    can't inject FTS syntax, words are ANDed, and the last one is a prefix so
+    the board can search as you type.
+    """
+    tokens = TOKEN_RE.findall(q or '')
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def highlight(snippet):
+    """Escape a snippet's text and turn its placeholders into <mark> tags"""
+    if snippet is None:
+        return None
+    return html.escape(snippet, quote=False).replace(OPEN_MARK, '<mark>').replace(CLOSE_MARK, '</mark>')
+
+
+def search_projects(q, page=1, per_page=20, session=None):
+    """
+    BM25-ranked open projects matching q, with a highlighted description snippet.
+    Returns (results, has_more) where results is a list of (project, rank, snippet).
+    """
+    session = session or db.session
+    if session.get_bind().dialect.name != 'sqlite':
+        raise SearchUnavailable("Full-text search requires SQLite FTS5")
+
+    match = build_match_query(q)
+    if not match:
+        return [], False
+
+    hits = session.execute(SEARCH_SQL, {
+        'query': match,
+        'open_mark': OPEN_MARK,
+        'close_mark': CLOSE_MARK,
+        'limit': per_page + 1,
+        'offset': (page - 1) * per_page
+    }).all()
+    has_more = len(hits) > per_page
+    hits = hits[:per_page]
+    if not hits:
+        return [], False
+
+    projects = session.execute(
+        select(Project)
+        .options(joinedload(Project.client), selectinload(Project.skills))
+        .where(Project.id.in_([hit.id for hit in hits]))
+    ).unique().scalars()
+    by_id = {project.id: project for project in projects}
+
+    results = [(by_id[hit.id], hit.rank, highlight(hit.snippet)) for hit in hits if hit.id in by_id]
+    return results, has_more
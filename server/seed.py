@@ -1,9 +1,10 @@
 # seed_projects.py
-from app import app, db
-from models import User, Project
+from app import create_app
+from models import db, User, Project
 from datetime import datetime
 
 def seed_projects():
+    app = create_app()
     with app.app_context():
         # Get or create a test client
         client = User.query.filter_by(email="client@example.com").first()
@@ -69,7 +70,9 @@ def seed_projects():
         ]
         
         for project_data in sample_projects:
+            skills = project_data.pop("skills_required").split(",")
             project = Project(**project_data)
+            project.set_skills(skills)
             db.session.add(project)
         
         db.session.commit()
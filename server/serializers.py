@@ -0,0 +1,188 @@
+import json
+from operator import attrgetter
+
+from flask import current_app, make_response
+from flask.json.provider import DefaultJSONProvider
+
+from portfolio import reason_texts
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib encoder is used without it
+    orjson = None
+
+
+# Explicit response schemas for the models.
+# A Schema compiles its fields into (key, getter) pairs once at import time, so
+# dumping a row is one call per field with no rule parsing or relationship
+# walking like SerializerMixin.to_dict does. Nested schemas are only followed
+# where a view asks for them, which keeps every view's query cost explicit.
+
+class Schema:
+    def __init__(self, *fields, **computed):
+        """
+        fields are attribute names (or 'key:attr.path' to rename), computed
+        maps keys to callables taking the object.
+        """
+        getters = []
+        for field in fields:
+            key, _, path = field.partition(':')
+            getters.append((key, attrgetter(path or key)))
+        getters.extend(computed.items())
+        self._getters = tuple(getters)
+
+    def dump(self, obj):
+        return {key: getter(obj) for key, getter in self._getters}
+
+    def dump_many(self, objs):
+        dump = self.dump
+        return [dump(obj) for obj in objs]
+
+    def extend(self, *fields, **computed):
+        """A new schema with this one's fields plus some more"""
+        schema = Schema(*fields, **computed)
+        schema._getters = self._getters + schema._getters
+        return schema
+
+
+def isoformat(name):
+    getter = attrgetter(name)
+
+    def get(obj):
+        value = getter(obj)
+        return value.isoformat() if value else None
+    return get
+
+
+def full_name(user):
+    return f"{user.first_name} {user.last_name}" if user else "Unknown"
+
+
+def short_description(project):
+    description = project.description
+    return description[:150] + '...' if len(description) > 150 else description
+
+
+def client_summary(project):
+    client = project.client
+    return {'id': client.id if client else None, 'name': full_name(client)}
+
+
+def skill_names(project):
+    return [skill.name for skill in project.skills]
+
+
+# Users
+
+user_shallow = Schema(
+    'id', 'first_name', 'last_name', 'github_username', 'email',
+    created_at=isoformat('created_at'),
+    updated_at=isoformat('updated_at')
+)
+
+# Repositories
+
+repository_schema = Schema(
+    'id', 'name', 'description', 'language:primary_language', 'stars', 'type:project_type', 'has_pages', 'homepage',
+    'fork', updated_at=isoformat('updated_at'), pushed_at=isoformat('pushed_at')
+)
+
+portfolio_candidate_schema = repository_schema.extend(
+    'score:portfolio_score',
+    reasons=lambda repo: reason_texts(repo.portfolio_reasons)
+)
+
+language_stat_schema = Schema('language', 'repo_count', 'total_stars')
+
+user_deep = user_shallow.extend(
+    repositories=lambda user: repository_schema.dump_many(user.repositories)
+)
+
+# Applications
+
+def developer_summary(application, with_email=False):
+    dev = application.developer
+    summary = {
+        'id': dev.id if dev else None,
+        'name': full_name(dev),
+        'github_username': dev.github_username if dev else None
+    }
+    if with_email:
+        summary['email'] = dev.email if dev else None
+    return summary
+
+
+application_schema = Schema(
+    'id', 'proposal', 'estimated_time', 'estimated_cost', 'status',
+    developer=developer_summary,
+    created_at=isoformat('created_at')
+)
+
+# The project's client also sees how to reach each developer
+application_for_client_schema = Schema(
+    'id', 'proposal', 'estimated_time', 'estimated_cost', 'status',
+    developer=lambda application: developer_summary(application, with_email=True),
+    created_at=isoformat('created_at')
+)
+
+# Projects
+
+project_base = Schema(
+    'id', 'title', 'description', 'budget_min', 'budget_max', 'timeline_weeks',
+    'difficulty', 'project_type', 'team_size_min', 'team_size_max',
+    skills_required=skill_names
+)
+
+project_summary = project_base.extend(
+    'status', 'applications_count', 'pending_applications_count', 'team_member_count',
+    short_description=short_description,
+    client=client_summary,
+    created_at=isoformat('created_at')
+)
+
+project_detail = project_base.extend(
+    'status', 'applications_count', 'pending_applications_count', 'team_member_count',
+    client=client_summary,
+    applications=lambda project: application_schema.dump_many(project.applications),
+    created_at=isoformat('created_at')
+)
+
+project_search_result = Schema(
+    'id', 'title', 'budget_min', 'budget_max', 'timeline_weeks', 'difficulty', 'project_type',
+    skills_required=skill_names,
+    client=client_summary,
+    created_at=isoformat('created_at')
+)
+
+
+# JSON encoding
+
+def dumps(data, pretty=False):
+    """Compact JSON bytes, through orjson when it is installed"""
+    if pretty:
+        return json.dumps(data, indent=4).encode('utf-8') + b'\n'
+    if orjson is not None:
+        return orjson.dumps(data) + b'\n'
+    return json.dumps(data, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """app.json provider used by jsonify / make_response(dict)"""
+
+    def response(self, *args, **kwargs):
+        data = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            dumps(data, pretty=self._pretty()), mimetype=self.mimetype
+        )
+
+    def _pretty(self):
+        # Same rule as Flask's default: pretty only in debug unless set explicitly
+        return self.compact is False or (self.compact is None and self._app.debug)
+
+
+def output_json(data, code, headers=None):
+    """flask-restful representation for application/json"""
+    response = make_response(dumps(data, pretty=current_app.debug), code)
+    response.headers['Content-Type'] = 'application/json'
+    response.headers.extend(headers or {})
+    return response
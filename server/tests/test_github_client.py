@@ -0,0 +1,22 @@
+from github_client import ConditionalCache, REPO_FIELDS, select_fields
+
+
+def test_bodies_keep_only_the_selected_fields():
+    repos = [{'id': 1, 'name': 'a', 'owner': {'login': 'octocat'}, 'topics': ['x'] * 50}, {'id': 2}]
+
+    assert select_fields(repos, REPO_FIELDS) == [{'id': 1, 'name': 'a'}, {'id': 2}]
+
+
+def test_the_cache_is_bounded_by_bytes():
+    cache = ConditionalCache(max_entries=10, max_bytes=100)
+    cache.set('a', ('etag-a', None, [], None), 60)
+    cache.set('b', ('etag-b', None, [], None), 30)
+    cache.get('a')
+    cache.set('c', ('etag-c', None, [], None), 30)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats() == {'cache_entries': 2, 'cache_bytes': 90}
+
+    cache.set('a', ('etag-a2', None, [], None), 10)
+    assert cache.stats() == {'cache_entries': 2, 'cache_bytes': 40}
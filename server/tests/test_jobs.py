@@ -0,0 +1,23 @@
+from jobs import AnalysisJobRunner
+from models import db, AnalysisJob
+
+
+def test_submit_returns_the_job_another_process_queued(app, user, monkeypatch):
+    runner = AnalysisJobRunner()
+    runner.init_app(app)
+    monkeypatch.setattr(runner, '_recover', lambda: None)
+    monkeypatch.setattr(runner, '_enqueue', lambda job_id: None)
+    # Queued by another worker after this one looked and found nothing
+    db.session.add(AnalysisJob(id='a' * 32, github_username='octocat', user_id=user.id, status='running'))
+    db.session.commit()
+    lookups = []
+
+    def active_job(username):
+        lookups.append(username)
+        return None if len(lookups) == 1 else AnalysisJobRunner._active_job(username)
+    monkeypatch.setattr(runner, '_active_job', active_job)
+
+    job, created = runner.submit(user.id, 'octocat')
+
+    assert (job.id, created) == ('a' * 32, False)
+    assert AnalysisJob.query.count() == 1
@@ -0,0 +1,29 @@
+import os
+import signal
+
+import pytest
+
+from passwords import HashingBusy, PasswordHasher
+
+
+def test_a_broken_pool_is_replaced():
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=4)
+    try:
+        password_hash = hasher.hash('secret')
+        for pid in list(hasher.executor._processes):
+            os.kill(pid, signal.SIGKILL)
+
+        with pytest.raises(HashingBusy):
+            hasher.hash('secret')
+        assert hasher.verify('secret', password_hash)
+    finally:
+        hasher.shutdown()
+
+
+def test_a_timeout_is_busy():
+    hasher = PasswordHasher(rounds=14, workers=1, max_pending=4, timeout=0.01, executor='thread')
+    try:
+        with pytest.raises(HashingBusy):
+            hasher.hash('secret')
+    finally:
+        hasher.shutdown()
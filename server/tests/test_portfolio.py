@@ -0,0 +1,19 @@
+from models import db, Repository
+from portfolio import rescore_repositories
+
+
+def test_rescore_matches_the_synced_login(user):
+    user.repos_synced_login = 'hubot'
+    db.session.add_all([
+        Repository(name='hubot', project_type='personal', user_id=user.id),
+        Repository(name='octocat', project_type='personal', user_id=user.id),
+    ])
+    db.session.commit()
+
+    # Rows start unscored, so a rescore writes what the sync would have
+    db.session.execute(Repository.__table__.update().values(portfolio_score=0, portfolio_reasons=''))
+    rescore_repositories(db.session.connection(), [user.id])
+    db.session.commit()
+
+    reasons = dict(db.session.query(Repository.name, Repository.portfolio_reasons))
+    assert reasons == {'hubot': 'username', 'octocat': ''}
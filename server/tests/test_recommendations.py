@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from models import db, Project
+from recommendations import ProjectIndex
+
+
+def add_project(user, title, updated_at):
+    project = Project(title=title, description=title, budget_min=100, budget_max=200, timeline_weeks=2,
+                      project_type='individual', difficulty='beginner', client_id=user.id)
+    db.session.add(project)
+    db.session.flush()
+    # Set after the insert: updated_at is stamped by onupdate otherwise
+    project.updated_at = updated_at
+    db.session.commit()
+    return project
+
+
+def test_a_late_commit_behind_the_watermark_is_loaded(user):
+    now = datetime.utcnow()
+    index = ProjectIndex()
+    first = add_project(user, 'First', now)
+    assert index.refresh(db.session) == 1
+
+    # Stamped before the first project, committed after the refresh
+    late = add_project(user, 'Late', now - timedelta(seconds=5))
+    index.refresh(db.session)
+
+    assert {first.id, late.id} <= set(index.slots)
@@ -0,0 +1,62 @@
+from sqlalchemy import select
+
+from github_analysis import sync_user_repositories
+from github_client import github
+from language_stats import user_language_stats
+from models import db, Repository
+from repo_sync import upsert_repositories
+
+
+def repo(github_id, name, language='Python', updated_at='2025-01-01T00:00:00Z'):
+    return {'id': github_id, 'name': name, 'language': language, 'stargazers_count': 1,
+            'updated_at': updated_at, 'pushed_at': updated_at}
+
+
+def stored(user_id):
+    return dict(db.session.execute(
+        select(Repository.name, Repository.github_id).where(Repository.user_id == user_id)
+    ).all())
+
+
+def languages(user_id):
+    return {row.language: row.repo_count for row in user_language_stats(user_id)}
+
+
+def test_recreated_repository_replaces_the_deleted_one(user):
+    upsert_repositories(user.id, [repo(1, 'site'), repo(2, 'tools')])
+    db.session.commit()
+
+    # 'site' deleted and created again upstream: same name, new id
+    assert upsert_repositories(user.id, [repo(3, 'site', language='Go'), repo(2, 'tools')]) == (1, 0, 1)
+    db.session.commit()
+
+    assert stored(user.id) == {'site': 3, 'tools': 2}
+    assert languages(user.id) == {'Go': 1, 'Python': 1}
+
+
+def test_repositories_can_swap_names(user):
+    upsert_repositories(user.id, [repo(1, 'a'), repo(2, 'b')])
+    db.session.commit()
+
+    assert upsert_repositories(user.id, [repo(1, 'b'), repo(2, 'a')]) == (0, 2, 0)
+    db.session.commit()
+
+    assert stored(user.id) == {'a': 2, 'b': 1}
+
+
+def test_sync_after_recreating_a_repository(user, monkeypatch):
+    listing = [repo(1, 'site'), repo(2, 'tools')]
+    monkeypatch.setattr(github, 'list_user_repos', lambda *args: listing)
+    monkeypatch.setattr(github, 'iter_user_repos_by_update', lambda *args: iter([
+        sorted(listing, key=lambda r: r['updated_at'], reverse=True)
+    ]))
+    monkeypatch.setattr(github, 'get_user', lambda *args: {'public_repos': len(listing)})
+    assert sync_user_repositories(user.id, 'octocat')['mode'] == 'full'
+
+    listing[0] = repo(3, 'site', updated_at='2025-02-01T00:00:00Z')
+    result = sync_user_repositories(user.id, 'octocat')
+    assert (result['mode'], result['inserted'], result['deleted']) == ('incremental', 1, 1)
+    assert stored(user.id) == {'site': 3, 'tools': 2}
+
+    # And the next sync doesn't trip over it either
+    assert sync_user_repositories(user.id, 'octocat')['inserted'] == 0
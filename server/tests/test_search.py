@@ -0,0 +1,19 @@
+from models import db, Project
+from search import install_project_search, search_projects
+
+
+def test_snippets_escape_the_description(user):
+    with db.engine.begin() as connection:
+        install_project_search(connection)
+    db.session.add(Project(
+        title='Widget', description='A <script>alert(1)</script> widget & gadget store',
+        budget_min=100, budget_max=200, timeline_weeks=2, project_type='individual',
+        difficulty='beginner', client_id=user.id,
+    ))
+    db.session.commit()
+
+    results, has_more = search_projects('widget')
+
+    assert not has_more
+    [(_, _, snippet)] = results
+    assert snippet == 'A &lt;script&gt;alert(1)&lt;/script&gt; <mark>widget</mark> &amp; gadget store'
@@ -0,0 +1,31 @@
+"""
+WSGI entry point for production serving.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (the default in gunicorn.conf.py) this module is imported
+once in the gunicorn master: the app, its imports and the recommendation
+index are built before the workers fork and shared with them copy-on-write.
+gunicorn.conf.py's post_fork hook then runs app.after_fork in each worker.
+"""
+import logging
+import os
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import create_app
+from models import db
+
+logger = logging.getLogger(__name__)
+
+app = create_app()
+
+if os.environ.get('WARM_RECOMMENDATIONS', '1') == '1':
+    from recommendations import project_index
+    with app.app_context():
+        try:
+            project_index.refresh(db.session)
+        except SQLAlchemyError:
+            # Not migrated yet, say; workers build the index on first use instead
+            logger.exception("Could not build the recommendation index at startup")
+        db.session.remove()